@@ -0,0 +1,689 @@
+"""
+Read Pybricks blocks files and check that they still match their code.
+
+A blocks file starts with a one-line `# pybricks blocks file:{...}` header
+holding the Blockly program as JSON, followed by the Python that Pybricks
+generated from it. This tool parses the header into a flat block graph,
+generates the Python again and compares it with the code in the file.
+
+    python .vscode/blocks_file.py                    # check every blocks file
+    python .vscode/blocks_file.py blocks.py --diff   # show what differs
+    python .vscode/blocks_file.py blocks.py --show   # print generated code
+    python .vscode/blocks_file.py blocks.py --graph  # print the block graph
+
+Only the header line is read to build the graph. The JSON is parsed
+without recursion, so long `next` chains cost the same per block as short
+ones. Files using blocks the generator does not know are reported as
+unsupported instead of as mismatches. Exits with 1 if any file differs.
+"""
+import argparse
+import difflib
+import json
+import os
+import re
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEADER = "# pybricks blocks file:"
+
+# Hat blocks, the only top level blocks that produce code
+SETUP = "blockGlobalSetup"
+START = "blockGlobalStart"
+
+
+class BlocksFileError(Exception):
+    """Raised when a blocks file header cannot be parsed."""
+
+
+class UnsupportedBlock(Exception):
+    """Raised when code is generated for a block type with no generator."""
+
+
+# JSON
+
+_TOKEN = re.compile(
+    r'[ \t\r\n]*(?:([{}\[\],:])|"((?:[^"\\]|\\.)*)"'
+    r'|(-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?)'
+    r'|(true|false|null))')
+
+_LITERALS = {"true": True, "false": False, "null": None}
+
+# Parser states: what the next token must be
+_VALUE, _KEY, _COLON, _NEXT = range(4)
+
+
+def _string(raw):
+    return json.loads('"' + raw + '"') if "\\" in raw else raw
+
+
+def parse_json(text, pos=0):
+    """
+    Parse one JSON value from text, starting at pos.
+
+    Containers are tracked on an explicit stack, so nesting depth is only
+    limited by memory.
+
+    Returns:
+        tuple: (value, position after the value).
+    """
+    stack = []  # [container, pending key] of every open container
+    state = _VALUE
+    opened = False  # The top container was just opened
+    while True:
+        match = _TOKEN.match(text, pos)
+        if match is None:
+            raise BlocksFileError("invalid JSON at offset {}".format(pos))
+        pos = match.end()
+        punct, string, number, literal = match.groups()
+
+        if state == _KEY:
+            if string is not None:
+                stack[-1][1] = _string(string)
+                state = _COLON
+                continue
+            if not (punct == "}" and opened):
+                raise BlocksFileError("expected a key at offset {}".format(pos))
+        elif state == _COLON:
+            if punct != ":":
+                raise BlocksFileError("expected ':' at offset {}".format(pos))
+            state = _VALUE
+            continue
+        elif state == _NEXT:
+            if punct == ",":
+                state = _KEY if isinstance(stack[-1][0], dict) else _VALUE
+                opened = False
+                continue
+            closer = "}" if isinstance(stack[-1][0], dict) else "]"
+            if punct != closer:
+                raise BlocksFileError(
+                    "expected ',' or '{}' at offset {}".format(closer, pos))
+        elif punct == "]" and opened and isinstance(stack[-1][0], list):
+            pass
+        else:
+            # A value
+            if punct == "{":
+                value = {}
+            elif punct == "[":
+                value = []
+            elif string is not None:
+                value = _string(string)
+            elif number is not None:
+                value = (float(number) if "." in number or "e" in number
+                         or "E" in number else int(number))
+            elif literal is not None:
+                value = _LITERALS[literal]
+            else:
+                raise BlocksFileError(
+                    "expected a value at offset {}".format(pos))
+            if stack:
+                container, key = stack[-1]
+                if isinstance(container, list):
+                    container.append(value)
+                else:
+                    container[key] = value
+            if punct is not None:
+                stack.append([value, None])
+                state = _KEY if punct == "{" else _VALUE
+                opened = True
+            elif not stack:
+                return value, pos
+            else:
+                state = _NEXT
+            continue
+
+        # Close the top container
+        value = stack.pop()[0]
+        if not stack:
+            return value, pos
+        state = _NEXT
+        opened = False
+
+
+# Block graph
+
+class Block:
+    """
+    One block of the graph.
+
+    inputs maps an input name to the id of the block plugged into it, or
+    of its shadow if nothing is plugged in. next and parent are block ids
+    or None. As in Blockly, the parent of a block connected through `next`
+    is the block before it.
+    """
+
+    __slots__ = ("id", "type", "fields", "inputs", "next", "parent",
+                 "shadow", "enabled", "extra", "x", "y")
+
+    def __init__(self, data, parent, shadow):
+        self.id = data["id"]
+        self.type = data["type"]
+        self.fields = data.get("fields", {})
+        self.inputs = {}
+        self.next = None
+        self.parent = parent
+        self.shadow = shadow
+        self.enabled = data.get("enabled", True)
+        self.extra = data.get("extraState", {})
+        self.x = data.get("x")
+        self.y = data.get("y")
+
+    def option_level(self):
+        return self.extra.get("optionLevel", 0)
+
+    def __repr__(self):
+        return "Block({!r}, {!r})".format(self.type, self.id)
+
+
+class BlockGraph:
+    """
+    The blocks of a program, flattened and indexed by id.
+
+    Attributes:
+        blocks: Every block by id.
+        top: Ids of the top level blocks, in file order.
+        variables: (name, type) of every variable by id.
+        version: Version of the Pybricks editor that saved the file.
+    """
+
+    def __init__(self, data):
+        """Flatten the parsed header JSON."""
+        self.blocks = {}
+        self.variables = {}
+        for variable in data.get("variables", ()):
+            self.variables[variable["id"]] = (variable["name"],
+                                              variable.get("type"))
+        self.version = data.get("info", {}).get("version")
+
+        top = data.get("blocks", {}).get("blocks", ())
+        self.top = [block["id"] for block in top]
+        stack = [(block, None, False) for block in reversed(top)]
+        while stack:
+            data, parent, shadow = stack.pop()
+            block = Block(data, parent, shadow)
+            if block.id in self.blocks:
+                raise BlocksFileError("duplicate block id " + block.id)
+            self.blocks[block.id] = block
+            follower = data.get("next", {}).get("block")
+            if follower is not None:
+                block.next = follower["id"]
+                stack.append((follower, block.id, False))
+            for name, connection in data.get("inputs", {}).items():
+                child = connection.get("block")
+                child_shadow = connection.get("shadow")
+                if child_shadow is not None:
+                    stack.append((child_shadow, block.id, True))
+                if child is not None:
+                    stack.append((child, block.id, False))
+                    block.inputs[name] = child["id"]
+                elif child_shadow is not None:
+                    block.inputs[name] = child_shadow["id"]
+
+    def input(self, block, name):
+        """Return the block plugged into an input, or None."""
+        child = block.inputs.get(name)
+        return None if child is None else self.blocks[child]
+
+    def chain(self, block):
+        """Yield a block and every block after it through `next`."""
+        while block is not None:
+            yield block
+            block = None if block.next is None else self.blocks[block.next]
+
+    def variable_name(self, variable_id):
+        """Return the name of a variable, as in the Blockly editor."""
+        try:
+            return self.variables[variable_id][0]
+        except KeyError:
+            raise BlocksFileError("unknown variable id " + variable_id)
+
+    def __len__(self):
+        return len(self.blocks)
+
+
+def read(path):
+    """
+    Read a blocks file.
+
+    Returns:
+        tuple: (BlockGraph, Python code after the header), or None if the
+               file has no blocks header.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        first = f.readline()
+        if not first.startswith(HEADER):
+            return None
+        data, end = parse_json(first, len(HEADER))
+        if first[end:].strip():
+            raise BlocksFileError("unexpected text after the header JSON")
+        return BlockGraph(data), f.read()
+
+
+# Code generation
+
+STATEMENTS = {}
+VALUES = {}
+
+
+def statement(*types):
+    """Register a generator for statement blocks: f(gen, block) -> lines."""
+    def register(function):
+        for name in types:
+            STATEMENTS[name] = function
+        return function
+    return register
+
+
+def value(*types):
+    """Register a generator for value blocks: f(gen, block) -> expression."""
+    def register(function):
+        for name in types:
+            VALUES[name] = function
+        return function
+    return register
+
+
+def _number(number):
+    if isinstance(number, float) and number.is_integer():
+        number = int(number)
+    return repr(number)
+
+
+def identifier(name):
+    """Turn a Blockly variable name into a Python name."""
+    name = re.sub(r"\W", "_", name)
+    if not name or name[0].isdigit():
+        name = "_" + name
+    return name
+
+
+class CodeGenerator:
+    """Generates the Python code of a BlockGraph like the Pybricks editor."""
+
+    INDENT = "    "
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.imports = {}
+        self.functions = []
+        self._names = set()
+        self._taken = []
+
+    def need(self, module, name):
+        """Record that `from module import name` is needed."""
+        self.imports.setdefault(module, set()).add(name)
+
+    def distinct_name(self, base):
+        """Return base, or base2, base3... if it is already taken."""
+        name = base
+        number = 2
+        while name in self._names:
+            name = base + str(number)
+            number += 1
+        self._names.add(name)
+        self._taken.append(base)
+        return name
+
+    def mark(self):
+        """Return a marker for the names taken so far, for `take_again`."""
+        return len(self._taken)
+
+    def take_again(self, mark):
+        """Take a name for every base taken since `mark` once more."""
+        for base in self._taken[mark:]:
+            self.distinct_name(base)
+
+    def variable(self, block, field="VAR"):
+        """Return the Python name of the variable in a field."""
+        return identifier(self.graph.variable_name(block.fields[field]["id"]))
+
+    def value(self, block, name):
+        """Return the expression of the block plugged into an input."""
+        child = self.graph.input(block, name)
+        if child is None:
+            raise BlocksFileError(
+                "{} has nothing in input {}".format(block.type, name))
+        try:
+            generate = VALUES[child.type]
+        except KeyError:
+            raise UnsupportedBlock(child.type)
+        return generate(self, child)
+
+    def statements(self, first):
+        """Return the lines of a chain of statement blocks, unindented."""
+        lines = []
+        for block in self.graph.chain(first):
+            if not block.enabled:
+                continue
+            try:
+                generate = STATEMENTS[block.type]
+            except KeyError:
+                raise UnsupportedBlock(block.type)
+            lines.extend(generate(self, block))
+        return lines
+
+    def body(self, block, name):
+        """Return the indented lines of a statement input."""
+        lines = self.statements(self.graph.input(block, name))
+        return [self.INDENT + line for line in lines or ["pass"]]
+
+    def define(self, name, lines):
+        """Add an `async def name():` with the given body lines."""
+        self.functions.append(["async def {}():".format(name)]
+                              + [self.INDENT + line for line in lines or ["pass"]])
+
+    def generate(self):
+        """Return the Python code for the whole graph."""
+        graph = self.graph
+        setup = []
+        main = None
+        for block_id in graph.top:
+            block = graph.blocks[block_id]
+            if not block.enabled or block.type not in (SETUP, START):
+                continue
+            first = None if block.next is None else graph.blocks[block.next]
+            if block.type == SETUP:
+                setup = self.statements(first)
+            else:
+                main = self.statements(first)
+        if main is not None:
+            self.define("main", main)
+            self.need("pybricks.tools", "run_task")
+
+        sections = []
+        sections.append("\n".join(
+            "from {} import {}".format(module, ", ".join(sorted(names)))
+            for module, names in sorted(self.imports.items())))
+        if setup:
+            sections.append("\n".join(["# Set up all devices."] + setup))
+        for function in self.functions:
+            sections.append("\n".join(function))
+        code = "\n\n".join(sections)
+        if main is not None:
+            code += "\n\n\nrun_task(main())"
+        return code
+
+
+def generate(graph):
+    """Return the Python code for a BlockGraph."""
+    return CodeGenerator(graph).generate()
+
+
+# Values
+
+@value("blockMathNumber")
+def _(gen, block):
+    return _number(block.fields["NUM"])
+
+
+@value("unit_distance", "unit_angle", "unit_time", "unit_angularVelocity")
+def _(gen, block):
+    return _number(block.fields["VALUE0"])
+
+
+@value("text")
+def _(gen, block):
+    return repr(block.fields["TEXT"])
+
+
+@value("parameters_stop_4")
+def _(gen, block):
+    gen.need("pybricks.parameters", "Stop")
+    return block.fields["VALUE"]
+
+
+@value("blockParametersPort")
+def _(gen, block):
+    gen.need("pybricks.parameters", "Port")
+    return "Port." + block.fields["NAME"]
+
+
+@value("blockParametersDirection")
+def _(gen, block):
+    gen.need("pybricks.parameters", "Direction")
+    return block.fields["SELECTION"]
+
+
+@value("blockParametersAxis")
+def _(gen, block):
+    gen.need("pybricks.parameters", "Axis")
+    return "Axis." + block.fields["VALUE"].upper()
+
+
+@value("variables_get_motor_device", "variables_get_drive_base_device",
+       "variables_get_imu_hub")
+def _(gen, block):
+    return gen.variable(block)
+
+
+# Setup
+
+@statement("variables_set_prime_hub")
+def _(gen, block):
+    gen.need("pybricks.hubs", "PrimeHub")
+    args = ""
+    if block.option_level() >= 1:
+        args = "top_side={}, front_side={}".format(
+            gen.value(block, "AXIS_TOP"), gen.value(block, "AXIS_FRONT"))
+    return ["{} = PrimeHub({})".format(gen.variable(block), args)]
+
+
+@statement("variables_set_motor")
+def _(gen, block):
+    gen.need("pybricks.pupdevices", "Motor")
+    return ["{} = Motor({}, {})".format(
+        gen.variable(block), gen.value(block, "PORT"),
+        gen.value(block, "POSITIVE_DIRECTION"))]
+
+
+@statement("variables_set_drive_base")
+def _(gen, block):
+    gen.need("pybricks.robotics", "DriveBase")
+    return ["{} = DriveBase({}, {}, {}, {})".format(
+        gen.variable(block), gen.value(block, "VAR"),
+        gen.value(block, "VAR2"), gen.value(block, "VALUE0"),
+        gen.value(block, "VALUE1"))]
+
+
+# Statements
+
+def _then(gen, block, name):
+    """Return ', then=...' for a stop input, or '' for the default."""
+    stop = gen.value(block, name)
+    return "" if stop == "Stop.HOLD" else ", then=" + stop
+
+
+@statement("blockComment")
+def _(gen, block):
+    return ["# " + block.fields["FIELDNAME"]]
+
+
+@statement("blockPrint")
+def _(gen, block):
+    args = []
+    index = 0
+    while "TEXT{}".format(index) in block.inputs:
+        args.append(gen.value(block, "TEXT{}".format(index)))
+        index += 1
+    return ["print({})".format(", ".join(args))]
+
+
+@statement("blockWaitTime")
+def _(gen, block):
+    gen.need("pybricks.tools", "wait")
+    return ["await wait({})".format(gen.value(block, "VALUE0"))]
+
+
+@statement("blockFlowRepeat")
+def _(gen, block):
+    gen.need("pybricks.tools", "wait")
+    counter = gen.distinct_name("count")
+    return (["for {} in range({}):".format(counter,
+                                           gen.value(block, "TIMES")),
+             gen.INDENT + "await wait(0)"]
+            + gen.body(block, "DO"))
+
+
+@statement("blockMultiTask")
+def _(gen, block):
+    gen.need("pybricks.tools", "multitask")
+    method = block.fields["METHOD"]
+    if method not in ("MULTITASK_ALL", "MULTITASK_RACE"):
+        raise UnsupportedBlock(block.type + " " + method)
+    calls = []
+    index = 0
+    while "TASK{}".format(index) in block.inputs:
+        name = "TASK{}".format(index)
+        mark = gen.mark()
+        body = gen.statements(gen.graph.input(block, name))
+        # The editor generates every task twice and keeps the first, so
+        # names made inside a task are taken twice (count, count3, ...)
+        gen.take_again(mark)
+        function = gen.distinct_name("subtask")
+        gen.define(function, body)
+        calls.append(gen.INDENT + function + "(),")
+        index += 1
+    race = ["race=True,"] if method == "MULTITASK_RACE" else []
+    return (["await multitask("] + calls
+            + [gen.INDENT + arg for arg in race] + [")"])
+
+
+@statement("blockDriveBaseUseGyro")
+def _(gen, block):
+    use = {"DRIVEBASE_USE_GYRO_TRUE": "True",
+           "DRIVEBASE_USE_GYRO_FALSE": "False"}
+    return ["{}.use_gyro({})".format(gen.value(block, "VAR"),
+                                     use[block.fields["METHOD"]])]
+
+
+@statement("blockDriveBaseDrive2")
+def _(gen, block):
+    methods = {"DRIVEBASE_DRIVE_TURN": "turn",
+               "DRIVEBASE_DRIVE_STRAIGHT": "straight"}
+    method = methods.get(block.fields["METHOD"])
+    if method is None:
+        raise UnsupportedBlock(block.type + " " + block.fields["METHOD"])
+    return ["await {}.{}({}{})".format(
+        gen.value(block, "VAR"), method, gen.value(block, "ARG0"),
+        _then(gen, block, "ARG1"))]
+
+
+@statement("blockMotorRun")
+def _(gen, block):
+    method = block.fields["METHOD"]
+    motor = gen.value(block, "VAR")
+    speed = gen.value(block, "VALUE0")
+    if method == "MOTOR_RUN":
+        return ["{}.run({})".format(motor, speed)]
+    if method == "MOTOR_RUN_FOR":
+        return ["await {}.run_angle({}, {}{})".format(
+            motor, speed, gen.value(block, "ANGLE"),
+            _then(gen, block, "THEN"))]
+    raise UnsupportedBlock(block.type + " " + method)
+
+
+# Checking
+
+def blocks_files(folder=ROOT):
+    """
+    Return the .py files that start with a blocks header in a folder and
+    its subfolders, skipping hidden folders and __pycache__.
+    """
+    found = []
+    for parent, folders, names in os.walk(folder):
+        folders[:] = sorted(name for name in folders
+                            if not name.startswith(".")
+                            and name != "__pycache__")
+        for name in sorted(names):
+            if not name.endswith(".py"):
+                continue
+            path = os.path.join(parent, name)
+            with open(path, encoding="utf-8", errors="replace") as f:
+                if f.read(len(HEADER)) == HEADER:
+                    found.append(path)
+    return found
+
+
+def check(graph, code):
+    """
+    Compare the code of a blocks file with the code generated from its
+    header.
+
+    Args:
+        graph: The BlockGraph of the header, as returned by read().
+        code: The code in the file, as returned by read().
+
+    Returns:
+        tuple: (status, generated code), where status is 'ok', 'differs'
+               or 'unsupported: <block type>'.
+    """
+    try:
+        generated = generate(graph)
+    except UnsupportedBlock as e:
+        return "unsupported: " + str(e), None
+    # Line endings are not part of the program
+    if generated.splitlines() == code.splitlines():
+        return "ok", generated
+    return "differs", generated
+
+
+def print_graph(graph):
+    """Print every code producing chain of the graph with its nesting."""
+    for block_id in graph.top:
+        stack = [(graph.blocks[block_id], 0)]
+        while stack:
+            block, depth = stack.pop()
+            for item in graph.chain(block):
+                print("{}{} {}{}".format(
+                    "  " * depth, item.type, item.id,
+                    "" if item.enabled else " (disabled)"))
+                for name in reversed(list(item.inputs)):
+                    child = graph.blocks[item.inputs[name]]
+                    if not child.shadow:
+                        stack.append((child, depth + 1))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check that blocks files match their code.")
+    parser.add_argument("files", nargs="*",
+                        help="blocks files (default: all in the repository)")
+    parser.add_argument("--diff", action="store_true",
+                        help="show a diff for files that differ")
+    parser.add_argument("--show", action="store_true",
+                        help="print the generated code")
+    parser.add_argument("--graph", action="store_true",
+                        help="print the block graph")
+    args = parser.parse_args()
+
+    files = args.files or blocks_files()
+    failed = False
+    for path in files:
+        name = os.path.relpath(path)
+        try:
+            result = read(path)
+        except BlocksFileError as e:
+            print("{}: invalid header: {}".format(name, e))
+            failed = True
+            continue
+        if result is None:
+            print("{}: not a blocks file".format(name))
+            continue
+        graph, code = result
+        if args.graph:
+            print_graph(graph)
+        status, generated = check(graph, code)
+        print("{}: {} ({} blocks)".format(name, status, len(graph)))
+        if args.show and generated is not None:
+            print(generated)
+        if status == "differs":
+            failed = True
+            if args.diff:
+                sys.stdout.writelines(difflib.unified_diff(
+                    code.splitlines(True), (generated + "\n").splitlines(True),
+                    name, name + " (generated)"))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
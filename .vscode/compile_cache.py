@@ -0,0 +1,199 @@
+"""
+On-disk cache of compiled program modules.
+
+A program is uploaded as one blob holding the compiled .mpy of the main
+file and of every local module it imports. Instead of recompiling all of
+them on every run, each module's compiled output is stored under a key
+made from the module name, a hash of its source and the compiler version.
+Only modules whose source changed are compiled again.
+
+    python .vscode/compile_cache.py menu.py          # compile, show hits
+    python .vscode/compile_cache.py --clear
+
+The session server (pybricks_session.py) compiles through this cache.
+"""
+import argparse
+import asyncio
+import hashlib
+import marshal
+import os
+import shutil
+import sys
+from modulefinder import ModuleFinder
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DIRECTORY = os.path.join(ROOT, ".pybricks_cache")
+
+
+def local_modules(path):
+    """
+    Find the modules a program imports from its own directory.
+
+    Returns:
+        list: (module name, file path) pairs, the program itself first as
+              '__main__', the rest sorted by name.
+    """
+    path = os.path.abspath(path)
+    folder = os.path.dirname(path)
+    finder = ModuleFinder(path=[folder])
+    finder.run_script(path)
+    modules = []
+    for name, module in finder.modules.items():
+        filename = module.__file__
+        if name == "__main__" or not filename:
+            continue
+        filename = os.path.abspath(filename)
+        if filename.startswith(folder + os.sep):
+            modules.append((name, filename))
+    modules.sort()
+    return [("__main__", path)] + modules
+
+
+def _package_version(name):
+    try:
+        from importlib.metadata import version
+        return version(name)
+    except Exception:
+        return "unknown"
+
+
+class MpyCompiler:
+    """Compiles modules to MicroPython .mpy with pybricksdev."""
+
+    def __init__(self, abi=6):
+        self.abi = abi
+        self.version = "mpy-cross-v{} {} pybricksdev {}".format(
+            abi, _package_version("mpy-cross-v{}".format(abi)),
+            _package_version("pybricksdev"))
+
+    async def compile(self, name, filename, folder):
+        from pybricksdev.compile import compile_file
+
+        # Like pybricksdev, name the source by its path in the program
+        # folder, so modules in packages keep their package path
+        return await compile_file(folder, os.path.relpath(filename, folder),
+                                  self.abi)
+
+
+class HostCompiler:
+    """
+    Compiles modules to CPython bytecode. Used with the simulated hubs,
+    where programs run on the host.
+    """
+
+    def __init__(self):
+        self.version = "cpython {}".format(sys.version.split()[0])
+
+    async def compile(self, name, filename, folder):
+        with open(filename, "rb") as f:
+            return marshal.dumps(compile(f.read(), filename, "exec"))
+
+
+class CompileCache:
+    """Stores compiled modules on disk, keyed by source and compiler."""
+
+    def __init__(self, compiler, directory=DEFAULT_DIRECTORY):
+        """
+        Initialize the cache.
+
+        Args:
+            compiler: Object with a `version` string and an async
+                      `compile(name, filename, folder)` returning bytes,
+                      where folder is the directory of the program.
+            directory: Where compiled modules are stored.
+        """
+        self.compiler = compiler
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, name, source):
+        """Return the cache key of a module's source."""
+        digest = hashlib.sha256()
+        for part in (self.compiler.version.encode(), name.encode(), source):
+            digest.update(len(part).to_bytes(8, "little"))
+            digest.update(part)
+        return digest.hexdigest()
+
+    async def compile_module(self, name, filename, folder=None):
+        """
+        Return the compiled module, compiling it only on a cache miss.
+
+        Args:
+            name: Module name, such as 'missions.crane'.
+            filename: Path of the source file.
+            folder: Directory of the program the module belongs to. If
+                    None, the directory of the file.
+        """
+        if folder is None:
+            folder = os.path.dirname(filename)
+        with open(filename, "rb") as f:
+            source = f.read()
+        relative = os.path.relpath(filename, folder).replace(os.sep, "/")
+        path = os.path.join(self.directory,
+                            self.key(name + ":" + relative, source) + ".mpy")
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            self.hits += 1
+            return data
+        except FileNotFoundError:
+            pass
+
+        self.misses += 1
+        data = await self.compiler.compile(name, filename, folder)
+        os.makedirs(self.directory, exist_ok=True)
+        # Write to a temporary file first so a crash never leaves a
+        # truncated entry behind
+        temporary = path + ".tmp"
+        with open(temporary, "wb") as f:
+            f.write(data)
+        os.replace(temporary, path)
+        return data
+
+    async def compile_program(self, path):
+        """
+        Compile a program and its local modules into one upload blob.
+
+        The blob has the Pybricks multi-file layout: for each module the
+        size of its compiled code (4 bytes, little endian), its name ending
+        in a zero byte, and the compiled code.
+        """
+        parts = []
+        folder = os.path.dirname(os.path.abspath(path))
+        for name, filename in local_modules(path):
+            data = await self.compile_module(name, filename, folder)
+            parts.append(len(data).to_bytes(4, "little"))
+            parts.append(name.encode() + b"\0")
+            parts.append(data)
+        return b"".join(parts)
+
+    def clear(self):
+        """Delete all cached modules."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compile a program through the on-disk cache.")
+    parser.add_argument("file", nargs="?", help="program to compile")
+    parser.add_argument("--host", action="store_true",
+                        help="compile to CPython bytecode for the simulator")
+    parser.add_argument("--abi", type=int, default=6,
+                        help="MicroPython .mpy ABI version (default 6)")
+    parser.add_argument("--clear", action="store_true",
+                        help="delete the cache")
+    args = parser.parse_args()
+
+    compiler = HostCompiler() if args.host else MpyCompiler(args.abi)
+    cache = CompileCache(compiler)
+    if args.clear:
+        cache.clear()
+    if args.file:
+        blob = asyncio.run(cache.compile_program(args.file))
+        print("{} bytes, {} cache hits, {} misses".format(
+            len(blob), cache.hits, cache.misses))
+
+
+if __name__ == "__main__":
+    main()
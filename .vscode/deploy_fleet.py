@@ -0,0 +1,210 @@
+"""
+Deploy one program to several robots at once.
+
+    python .vscode/deploy_fleet.py --name DudeBot --name ChickenBot menu.py
+    python .vscode/deploy_fleet.py --all menu.py
+
+Each robot gets its own pybricksdev process; at most --workers of them run
+at the same time. Output lines are prefixed with the robot name, and a
+summary of successes, failures and timing is printed at the end. --all
+deploys to every robot listed in launch.json.
+
+By default the program is uploaded and started without waiting for it to
+finish. Use --wait to stream the program output until it ends.
+
+--command replaces the pybricksdev command, which is how the script is
+tested without robots. {name} and {file} in it are filled in, e.g.
+
+    --command "python tests/stub_robot.py {name} {file}"
+"""
+import argparse
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pybricks_output import OutputParser, TRACEBACK
+
+LAUNCH_JSON = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                           "launch.json")
+
+_print_lock = threading.Lock()
+
+
+def fleet_names(path=LAUNCH_JSON):
+    """Return the robot names offered by the robotName input in launch.json."""
+    with open(path, encoding="utf-8") as f:
+        # launch.json allows comments
+        text = re.sub(r"^\s*//.*$", "", f.read(), flags=re.MULTILINE)
+    for entry in json.loads(text).get("inputs", []):
+        if entry.get("id") == "robotName":
+            return list(entry.get("options", []))
+    return []
+
+
+def pybricksdev_command(name, file, wait=False):
+    """Build the pybricksdev command that deploys `file` to robot `name`."""
+    command = [sys.executable, "-m", "pybricksdev", "run", "--name", name]
+    if not wait:
+        command.append("--no-wait")
+    return command + ["ble", file]
+
+
+def template_command(template):
+    """Return a command factory that fills {name} and {file} into template."""
+    parts = shlex.split(template)
+
+    def build(name, file, wait=False):
+        return [p.format(name=name, file=file) for p in parts]
+    return build
+
+
+class Result:
+    """Outcome of deploying to one robot."""
+
+    def __init__(self, name, ok, returncode, seconds, error=None):
+        self.name = name
+        self.ok = ok
+        self.returncode = returncode
+        self.seconds = seconds
+        self.error = error
+
+
+def _emit(name, text):
+    with _print_lock:
+        print("[{}] {}".format(name, text), flush=True)
+
+
+def deploy_one(name, file, build_command=pybricksdev_command, wait=False,
+               timeout=None, emit=_emit):
+    """
+    Deploy to one robot and wait for its process to finish.
+
+    Returns:
+        Result: The outcome. A robot fails if its process exits with an
+                error, times out, or the program raises anything other than
+                SystemExit.
+    """
+    start = time.monotonic()
+    errors = []
+
+    def on_traceback(event):
+        if event.data[0] != "SystemExit":
+            errors.append(event.data[0] or "traceback")
+
+    parser = OutputParser()
+    parser.subscribe(on_traceback, kinds=(TRACEBACK,))
+
+    try:
+        process = subprocess.Popen(
+            build_command(name, file, wait), stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT, encoding="utf-8", errors="replace")
+    except OSError as e:
+        return Result(name, False, None, time.monotonic() - start, str(e))
+
+    timed_out = []
+
+    def kill():
+        timed_out.append(True)
+        process.kill()
+
+    timer = None
+    if timeout is not None:
+        timer = threading.Timer(timeout, kill)
+        timer.start()
+    try:
+        for line in process.stdout:
+            emit(name, line.rstrip("\r\n"))
+            parser.feed(line)
+        parser.close()
+        returncode = process.wait()
+    finally:
+        if timer is not None:
+            timer.cancel()
+
+    seconds = time.monotonic() - start
+    if timed_out:
+        errors.append("timed out")
+    elif returncode != 0:
+        errors.append("exit code {}".format(returncode))
+    return Result(name, not errors, returncode, seconds,
+                  ", ".join(errors) or None)
+
+
+def deploy(names, file, workers=3, build_command=pybricksdev_command,
+           wait=False, timeout=None, emit=_emit):
+    """
+    Deploy to several robots in parallel.
+
+    Args:
+        names: Robot names.
+        file: Program to deploy.
+        workers: Largest number of robots handled at the same time.
+        build_command: Function (name, file, wait) returning the command.
+        wait: If True, wait for the programs to finish.
+        timeout: Seconds after which a robot's process is killed.
+        emit: Function (name, text) called for every output line.
+
+    Returns:
+        list: One Result per robot, in the order of `names`.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(deploy_one, name, file, build_command, wait,
+                               timeout, emit)
+                   for name in names]
+        return [f.result() for f in futures]
+
+
+def print_summary(results, seconds):
+    """Print one line per robot and the totals."""
+    print("\nDeployment summary:")
+    for r in results:
+        print("  {:<16} {:<6} {:6.1f} s{}".format(
+            r.name, "ok" if r.ok else "FAILED", r.seconds,
+            "  (" + r.error + ")" if r.error else ""))
+    ok = sum(1 for r in results if r.ok)
+    print("{} of {} robots succeeded in {:.1f} s (longest robot {:.1f} s)."
+          .format(ok, len(results), seconds,
+                  max((r.seconds for r in results), default=0)))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Deploy one program to several robots at once.")
+    parser.add_argument("file", help="program to deploy")
+    parser.add_argument("--name", action="append", default=[],
+                        help="robot name (repeatable)")
+    parser.add_argument("--all", action="store_true",
+                        help="deploy to every robot listed in launch.json")
+    parser.add_argument("--workers", type=int, default=3,
+                        help="robots handled at the same time (default 3)")
+    parser.add_argument("--wait", action="store_true",
+                        help="wait for the programs to finish")
+    parser.add_argument("--timeout", type=float,
+                        help="seconds before a robot counts as failed")
+    parser.add_argument("--command", metavar="TEMPLATE",
+                        help="command to run instead of pybricksdev")
+    args = parser.parse_args()
+
+    names = list(args.name)
+    if args.all:
+        names += [n for n in fleet_names() if n not in names]
+    if not names:
+        parser.error("give at least one --name, or --all")
+
+    build_command = (template_command(args.command) if args.command
+                     else pybricksdev_command)
+    start = time.monotonic()
+    results = deploy(names, args.file, args.workers, build_command,
+                     args.wait, args.timeout)
+    print_summary(results, time.monotonic() - start)
+    sys.exit(0 if all(r.ok for r in results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Incremental parser for the output of `pybricksdev run`.
+
+Text is fed in chunks as it arrives, in any split, and is turned into
+typed events that subscribers receive as soon as a line is complete:
+
+    status     pybricksdev's own messages (searching, connecting, upload)
+    start      the upload finished and the program started
+    print      a line printed by the program
+    telemetry  a printed line starting with the telemetry prefix ('@'),
+               split into a tag and comma separated fields
+    traceback  a complete traceback; data is (exception type, lines)
+    stop       the program ended with SystemExit or was stopped
+
+Run this file on a saved transcript to see the events it produces:
+
+    python .vscode/pybricks_output.py transcript.txt
+"""
+import re
+import sys
+
+STATUS = "status"
+START = "start"
+PRINT = "print"
+TELEMETRY = "telemetry"
+TRACEBACK = "traceback"
+STOP = "stop"
+
+_LINE_END = re.compile(r"\r\n|\r|\n")
+
+STATUS_PREFIXES = (
+    "Searching for",
+    "Connecting to",
+    "Connected to",
+    "Disconnected",
+    "Downloading",
+    "Compiling",
+    "Starting",
+)
+
+
+class Event:
+    """One parsed piece of output."""
+
+    __slots__ = ("kind", "text", "data")
+
+    def __init__(self, kind, text, data=None):
+        self.kind = kind
+        self.text = text
+        self.data = data
+
+    def __repr__(self):
+        return "Event({!r}, {!r}, {!r})".format(
+            self.kind, self.text, self.data)
+
+
+class OutputParser:
+    """
+    Turns a stream of pybricksdev output into Events.
+
+    Lines end at '\\n' or '\\r', so progress bars that redraw themselves
+    with '\\r' produce one status event per redraw.
+    """
+
+    def __init__(self, telemetry_prefix="@"):
+        """
+        Initialize the parser.
+
+        Args:
+            telemetry_prefix: Printed lines starting with this are telemetry
+                              records. Use None to treat them as prints.
+        """
+        self.telemetry_prefix = telemetry_prefix
+        self.started = False
+        self.stopped = False
+        self._buffer = ""
+        self._traceback = None
+        self._subscribers = []
+
+    def subscribe(self, callback, kinds=None):
+        """
+        Call `callback(event)` for every event of the given kinds.
+
+        Args:
+            callback: Function taking an Event.
+            kinds: Iterable of event kinds, or None for all events.
+        """
+        self._subscribers.append(
+            (callback, None if kinds is None else frozenset(kinds)))
+
+    def _emit(self, kind, text, data=None):
+        event = Event(kind, text, data)
+        for callback, kinds in self._subscribers:
+            if kinds is None or kind in kinds:
+                callback(event)
+        return event
+
+    def feed(self, text):
+        """Parse a chunk of output. Incomplete lines are kept for later."""
+        lines = _LINE_END.split(self._buffer + text)
+        self._buffer = lines.pop()
+        for line in lines:
+            self._line(line)
+
+    def close(self):
+        """Parse whatever is left at the end of the stream."""
+        if self._buffer:
+            self._line(self._buffer)
+            self._buffer = ""
+        if self._traceback is not None:
+            self._end_traceback(None)
+
+    def _line(self, line):
+        if not line.strip():
+            return
+
+        if self._traceback is not None:
+            if line.startswith((" ", "\t")):
+                self._traceback.append(line)
+                return
+            # The first unindented line names the exception
+            self._traceback.append(line)
+            self._end_traceback(line.split(":", 1)[0].strip())
+            return
+
+        if line.startswith("Traceback (most recent call last)"):
+            self._traceback = [line]
+            return
+
+        if "%|" in line or line.startswith(STATUS_PREFIXES):
+            self._emit(STATUS, line)
+            if not self.started and "100%|" in line:
+                self.started = True
+                self._emit(START, line)
+            return
+
+        if "was stopped" in line or line.startswith("SystemExit"):
+            self._stop(line)
+            return
+
+        if not self.started:
+            # Output without a progress bar, e.g. when the upload was quick
+            self.started = True
+            self._emit(START, line)
+
+        prefix = self.telemetry_prefix
+        if prefix and line.startswith(prefix):
+            fields = line[len(prefix):].split(",")
+            self._emit(TELEMETRY, line, (fields[0], fields[1:]))
+        else:
+            self._emit(PRINT, line)
+
+    def _end_traceback(self, exception):
+        lines = self._traceback
+        self._traceback = None
+        self._emit(TRACEBACK, "\n".join(lines), (exception, lines))
+        if exception == "SystemExit":
+            self._stop(lines[-1])
+
+    def _stop(self, line):
+        if not self.stopped:
+            self.stopped = True
+            self._emit(STOP, line)
+
+
+def parse_transcript(text, telemetry_prefix="@"):
+    """Parse a complete transcript and return the list of events."""
+    events = []
+    parser = OutputParser(telemetry_prefix)
+    parser.subscribe(events.append)
+    parser.feed(text)
+    parser.close()
+    return events
+
+
+if __name__ == "__main__":
+    with open(sys.argv[1], encoding="utf-8", errors="replace") as f:
+        for event in parse_transcript(f.read()):
+            print(event)
@@ -0,0 +1,422 @@
+"""
+Long-lived session that keeps hubs connected between runs.
+
+`pybricksdev run` scans, connects and uploads from scratch every time. This
+script instead runs a small server that holds one connection per robot
+name, and a client that sends it programs over a local TCP socket:
+
+    python .vscode/pybricks_session.py serve
+    python .vscode/pybricks_session.py run --name LHHDemoBot menu.py
+
+`run` starts the server in the background when none is listening. The
+program is compiled on every run through the on-disk CompileCache, so only
+changed modules are recompiled. It is only uploaded when the compiled
+program differs from the last one uploaded to that robot; otherwise the
+program already on the hub is started again.
+
+With `serve --fake`, robots are stood in for by FakeHub, which runs the
+program in the host simulator (sim/run_sim.py) as a child process.
+
+The server shuts itself down after --idle-timeout seconds without requests
+(30 minutes by default), so one started in the background by `run` does
+not keep the robots connected forever.
+
+BleHub only uses the public PybricksHub API of pybricksdev 1.1, the version
+pinned in requirements.txt. It needs a hub with Pybricks firmware new
+enough to start a program that was uploaded before (Pybricks profile 1.2
+or newer).
+
+Protocol: one JSON object per line in each direction. Requests are
+{"cmd": "run", "name": ..., "file": ...}, {"cmd": "stop", "name": ...},
+{"cmd": "status"} and {"cmd": "shutdown"}. Replies to "run" are a stream of
+{"event": "output", "text": ...} followed by one
+{"event": "done", "uploaded": bool, "error": str or null}.
+"""
+import argparse
+import asyncio
+import codecs
+import hashlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from compile_cache import CompileCache, HostCompiler, MpyCompiler
+
+HOST = "127.0.0.1"
+DEFAULT_PORT = 5712
+
+# Seconds without requests after which the server shuts down
+DEFAULT_IDLE_TIMEOUT = 1800
+
+# .mpy ABI of the multi-file programs that hubs with Pybricks profile 1.2 or
+# newer run, the format PybricksHub.download() uses as well
+MPY_ABI = 6
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class BleHub:
+    """A hub reached over BLE through the pybricksdev API."""
+
+    def __init__(self, name):
+        self.name = name
+        self.cache = None
+        self._hub = None
+
+    async def connect(self):
+        from pybricksdev.ble import find_device
+        from pybricksdev.connections.pybricks import PybricksHubBLE
+
+        device = await find_device(self.name)
+        self.attach(PybricksHubBLE(device))
+        await self._hub.connect()
+
+    def attach(self, hub):
+        """Use a pybricksdev PybricksHub, connected or not."""
+        self._hub = hub
+        self.cache = CompileCache(MpyCompiler(MPY_ABI))
+
+    async def compile(self, path):
+        return await self.cache.compile_program(path)
+
+    async def download(self, program):
+        await self._hub.download_user_program(program)
+
+    async def start(self, output):
+        """Start the program on the hub and relay its output until it ends."""
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+        def relay(data):
+            text = decoder.decode(bytes(data))
+            if text:
+                output(text)
+
+        # With no path, run() starts the program uploaded last and waits
+        # until it stops
+        with self._hub.stdout_observable.subscribe(relay):
+            await self._hub.run(None, wait=True, print_output=False,
+                                line_handler=False)
+        text = decoder.decode(b"", final=True)
+        if text:
+            output(text)
+
+    async def stop(self):
+        await self._hub.stop_user_program()
+
+    async def disconnect(self):
+        if self._hub is not None:
+            await self._hub.disconnect()
+            self._hub = None
+
+
+class FakeHub:
+    """
+    Stands in for a BLE hub in tests. Programs are compiled to CPython
+    bytecode, and running one starts the host simulator as a separate
+    process.
+    """
+
+    def __init__(self, name, until=60000):
+        self.name = name
+        self.until = until
+        self.connected = False
+        self.cache = CompileCache(HostCompiler())
+        self._compiled = None
+        self._path = None
+        self._process = None
+
+    async def connect(self):
+        self.connected = True
+
+    async def compile(self, path):
+        program = await self.cache.compile_program(path)
+        self._compiled = (program, path)
+        return program
+
+    async def download(self, program):
+        # The simulator runs from source; remember which program this is
+        compiled, path = self._compiled
+        if compiled == program:
+            self._path = path
+
+    async def start(self, output):
+        self._process = await asyncio.create_subprocess_exec(
+            sys.executable, os.path.join(ROOT, "sim", "run_sim.py"),
+            self._path, "--until", str(self.until),
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT)
+        try:
+            while True:
+                chunk = await self._process.stdout.read(4096)
+                if not chunk:
+                    break
+                output(chunk.decode("utf-8", "replace"))
+            await self._process.wait()
+        finally:
+            self._process = None
+
+    async def stop(self):
+        if self._process is not None:
+            self._process.terminate()
+
+    async def disconnect(self):
+        self.connected = False
+
+
+class Robot:
+    """A connected hub and the hash of the program last uploaded to it."""
+
+    def __init__(self, hub):
+        self.hub = hub
+        self.program_hash = None
+        self.lock = asyncio.Lock()
+        self.runs = 0
+        self.uploads = 0
+
+
+class SessionServer:
+    """Serves run requests, keeping one connection per robot name."""
+
+    def __init__(self, hub_factory, idle_timeout=None):
+        """
+        Initialize the server.
+
+        Args:
+            hub_factory: Function taking a robot name and returning a hub
+                         object (BleHub or FakeHub).
+            idle_timeout: Seconds without requests after which the server
+                          shuts down, or None to serve until a shutdown
+                          request.
+        """
+        self.hub_factory = hub_factory
+        self.idle_timeout = idle_timeout
+        self.robots = {}
+        self.port = None
+        self._server = None
+        self._active = 0
+        self._last_request = time.monotonic()
+
+    async def _robot(self, name):
+        robot = self.robots.get(name)
+        if robot is None:
+            robot = Robot(self.hub_factory(name))
+            await robot.hub.connect()
+            self.robots[name] = robot
+        return robot
+
+    async def run_program(self, name, path, output):
+        """
+        Run a program on a robot, connecting first if needed.
+
+        Returns:
+            bool: True if the program was uploaded, False if the program on
+                  the hub was already up to date.
+        """
+        robot = await self._robot(name)
+        async with robot.lock:
+            cache = robot.hub.cache
+            hits, misses = cache.hits, cache.misses
+            program = await robot.hub.compile(path)
+            output("[Session] Compiled: {} cached, {} rebuilt\n".format(
+                cache.hits - hits, cache.misses - misses))
+            digest = hashlib.sha256(program).hexdigest()
+            uploaded = digest != robot.program_hash
+            if uploaded:
+                await robot.hub.download(program)
+                robot.program_hash = digest
+                robot.uploads += 1
+            robot.runs += 1
+            await robot.hub.start(output)
+            return uploaded
+
+    async def _handle(self, reader, writer):
+        def send(message):
+            writer.write((json.dumps(message) + "\n").encode())
+
+        self._active += 1
+        try:
+            line = await reader.readline()
+            if not line:
+                return
+            request = json.loads(line)
+            cmd = request.get("cmd")
+            if cmd == "run":
+                try:
+                    uploaded = await self.run_program(
+                        request["name"], request["file"],
+                        lambda text: send({"event": "output", "text": text}))
+                    send({"event": "done", "uploaded": uploaded,
+                          "error": None})
+                except Exception as e:
+                    # Drop the connection so the next run reconnects
+                    robot = self.robots.pop(request.get("name"), None)
+                    if robot is not None:
+                        try:
+                            await robot.hub.disconnect()
+                        except Exception:
+                            pass
+                    send({"event": "done", "uploaded": False,
+                          "error": "{}: {}".format(type(e).__name__, e)})
+            elif cmd == "stop":
+                robot = self.robots.get(request.get("name"))
+                if robot is not None:
+                    await robot.hub.stop()
+                send({"event": "stopped"})
+            elif cmd == "status":
+                send({"robots": {
+                    name: {"runs": r.runs, "uploads": r.uploads,
+                           "program_hash": r.program_hash}
+                    for name, r in self.robots.items()}})
+            elif cmd == "shutdown":
+                send({"event": "shutdown"})
+                self._server.close()
+            else:
+                send({"error": "unknown command " + repr(cmd)})
+            await writer.drain()
+        finally:
+            self._active -= 1
+            self._last_request = time.monotonic()
+            writer.close()
+
+    async def _close_when_idle(self):
+        """Close the server once no request came in for idle_timeout."""
+        while True:
+            if self._active:
+                delay = self.idle_timeout
+            else:
+                delay = (self._last_request + self.idle_timeout
+                         - time.monotonic())
+                if delay <= 0:
+                    self._server.close()
+                    return
+            await asyncio.sleep(delay)
+
+    async def serve(self, port=DEFAULT_PORT):
+        """
+        Serve requests until a shutdown request arrives or the server was
+        idle for idle_timeout. Use port 0 to pick a free port; the port in
+        use is then in the `port` attribute.
+        """
+        self._server = await asyncio.start_server(self._handle, HOST, port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._last_request = time.monotonic()
+        watcher = None
+        if self.idle_timeout is not None:
+            watcher = asyncio.ensure_future(self._close_when_idle())
+        try:
+            await self._server.wait_closed()
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+            for robot in self.robots.values():
+                try:
+                    await robot.hub.disconnect()
+                except Exception:
+                    pass
+
+
+def _connect(port, timeout=None):
+    """Connect to the server, starting it if nothing is listening."""
+    try:
+        return socket.create_connection((HOST, port))
+    except OSError:
+        if timeout is None:
+            raise
+
+    command = [sys.executable, os.path.abspath(__file__),
+               "--port", str(port), "serve"]
+    if os.environ.get("PYBRICKS_SESSION_FAKE"):
+        command.append("--fake")
+    subprocess.Popen(command, stdin=subprocess.DEVNULL,
+                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                     start_new_session=True)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return socket.create_connection((HOST, port))
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def request(message, port=DEFAULT_PORT, start_server=False):
+    """
+    Send a request and yield each reply message.
+
+    Args:
+        message: The request as a dict.
+        port: Port of the server.
+        start_server: If True, start the server when it is not running.
+    """
+    with _connect(port, 10 if start_server else None) as sock:
+        sock.sendall((json.dumps(message) + "\n").encode())
+        with sock.makefile("r", encoding="utf-8") as replies:
+            for line in replies:
+                yield json.loads(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Keep hubs connected between program runs.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="run the session server")
+    serve.add_argument("--fake", action="store_true",
+                       help="use simulated hubs instead of BLE")
+    serve.add_argument("--idle-timeout", type=float,
+                       default=DEFAULT_IDLE_TIMEOUT,
+                       help="seconds without requests before the server "
+                            "shuts down, 0 for never (default {})".format(
+                                DEFAULT_IDLE_TIMEOUT))
+
+    run = commands.add_parser("run", help="run a program on a robot")
+    run.add_argument("--name", required=True, help="robot name")
+    run.add_argument("file", help="program to run")
+
+    stop = commands.add_parser("stop", help="stop the program on a robot")
+    stop.add_argument("--name", required=True, help="robot name")
+
+    commands.add_parser("status", help="show connected robots")
+    commands.add_parser("shutdown", help="stop the session server")
+
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        hub_type = FakeHub if args.fake else BleHub
+        asyncio.run(SessionServer(hub_type, args.idle_timeout or None)
+                    .serve(args.port))
+
+    elif args.command == "run":
+        message = {"cmd": "run", "name": args.name,
+                   "file": os.path.abspath(args.file)}
+        try:
+            for reply in request(message, args.port, start_server=True):
+                if reply.get("event") == "output":
+                    print(reply["text"], end="", flush=True)
+                elif reply.get("event") == "done":
+                    if reply["error"]:
+                        print("[Session] " + reply["error"], flush=True)
+                        sys.exit(1)
+                    print("[Session] Program {} on {}.".format(
+                        "uploaded and run" if reply["uploaded"]
+                        else "unchanged, run again", args.name), flush=True)
+        except KeyboardInterrupt:
+            # Stop the program but keep the connection for the next run
+            list(request({"cmd": "stop", "name": args.name}, args.port))
+            print("\n[Session] Interrupted by user", flush=True)
+            sys.exit(130)
+
+    elif args.command == "stop":
+        list(request({"cmd": "stop", "name": args.name}, args.port))
+
+    else:
+        for reply in request({"cmd": args.command}, args.port):
+            print(json.dumps(reply, indent=2))
+
+
+if __name__ == "__main__":
+    main()
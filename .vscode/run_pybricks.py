@@ -1,100 +1,160 @@
 """
 Wrapper script to run pybricksdev and handle SystemExit properly.
 This ensures the debugger session terminates when the robot program stops.
+
+With `--telemetry FILE` before the pybricksdev arguments, telemetry frames
+printed by the program (see telemetry.py) are decoded and saved as CSV.
 """
-import sys
-import subprocess
+import codecs
 import os
+import queue
+import subprocess
+import sys
+import threading
+import time
 
-def main():
-    # Build pybricksdev command
-    args = [sys.executable, "-m", "pybricksdev"] + sys.argv[1:]
-    
+from pybricks_output import OutputParser, STOP, TELEMETRY
+from telemetry_decode import TelemetryDecoder
+
+# Seconds to keep reading after the program stopped, so a traceback or
+# '@run' lines printed after the stop message are not lost
+STOP_GRACE = 1.0
+
+
+def terminate(process):
+    """Stop the pybricksdev process, killing it if it does not exit."""
+    process.terminate()
     try:
-        # Start pybricksdev process with unbuffered output
-        # Use UTF-8 encoding to handle progress bar characters
-        process = subprocess.Popen(
-            args,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            bufsize=0,  # Unbuffered
-            encoding='utf-8',
-            errors='replace'  # Replace undecodable characters instead of crashing
-        )
+        process.wait(timeout=2)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def read_chunks(stream, chunks):
+    """Put everything read from the stream on a queue, then None at EOF."""
+    fd = stream.fileno()
+    while True:
+        # Returns as soon as any output is available
+        chunk = os.read(fd, 4096)
+        if not chunk:
+            chunks.put(None)
+            return
+        chunks.put(chunk)
+
+
+def run(args, telemetry_file=None, stop_grace=STOP_GRACE):
+    """
+    Run a command, echo its output and stop it once the program stopped.
+
+    Args:
+        args: The pybricksdev command line.
+        telemetry_file: If given, telemetry is decoded and saved as CSV.
+        stop_grace: Seconds to keep reading output after the stop message
+                    before the process is terminated.
+
+    Returns:
+        int: The exit code for the wrapper.
+    """
+    # Start pybricksdev process with unbuffered binary output; it is
+    # decoded incrementally so progress bar characters split across
+    # reads are handled
+    process = subprocess.Popen(
+        args,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        bufsize=0,  # Unbuffered
+    )
+    try:
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        
+        parser = OutputParser()
+        stop_events = []
+        parser.subscribe(stop_events.append, kinds=(STOP,))
+        telemetry = None
+        if telemetry_file is not None:
+            telemetry = TelemetryDecoder()
+            parser.subscribe(telemetry.on_event, kinds=(TELEMETRY,))
+        
+        def handle(text):
+            # Print immediately for real-time output
+            print(text, end='', flush=True)
+            parser.feed(text)
         
-        system_exit_detected = False
+        # The pipe is read on a thread so waiting for output can time out
+        # on every platform
+        chunks = queue.Queue()
+        reader = threading.Thread(target=read_chunks,
+                                  args=(process.stdout, chunks), daemon=True)
+        reader.start()
         
-        # Read output line by line
+        deadline = None
         while True:
-            line = process.stdout.readline()
-            
-            if line:
-                # Print immediately for real-time output
-                print(line, end='', flush=True)
-                
-                # Check for SystemExit message - look for either pattern
-                if "SystemExit" in line or "was stopped" in line:
-                    system_exit_detected = True
-                    # Give it a moment to finish any remaining output
-                    import time
-                    time.sleep(0.3)
-                    
-                    # Read any remaining output
-                    remaining = []
-                    process.stdout.flush()
-                    while True:
-                        try:
-                            # Non-blocking read attempt
-                            import select
-                            if hasattr(select, 'select'):
-                                # Unix-like systems
-                                readable, _, _ = select.select([process.stdout], [], [], 0.1)
-                                if readable:
-                                    extra = process.stdout.readline()
-                                    if extra:
-                                        remaining.append(extra)
-                                    else:
-                                        break
-                                else:
-                                    break
-                            else:
-                                # Windows - just try to read with a short timeout
-                                break
-                        except:
-                            break
-                    
-                    # Print any remaining output
-                    for r in remaining:
-                        print(r, end='', flush=True)
-                    
-                    # Terminate the process
-                    process.terminate()
-                    try:
-                        process.wait(timeout=2)
-                    except subprocess.TimeoutExpired:
-                        process.kill()
-                        process.wait()
-                    
-                    print("\n[Wrapper] Program terminated on robot, stopping debugger.", flush=True)
-                    sys.exit(0)
-            
-            # Check if process has ended
-            retcode = process.poll()
-            if retcode is not None:
-                # Process ended, read any remaining output
-                remaining = process.stdout.read()
-                if remaining:
-                    print(remaining, end='', flush=True)
-                
-                if system_exit_detected:
-                    print("\n[Wrapper] Program terminated on robot, stopping debugger.", flush=True)
-                
-                sys.exit(retcode if retcode == 0 or system_exit_detected else retcode)
-                
+            timeout = None
+            if deadline is not None:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+            try:
+                chunk = chunks.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if chunk is None:
+                break
+            handle(decoder.decode(chunk))
+            if stop_events and deadline is None:
+                # The program ended on the robot. Keep reading until
+                # pybricksdev exits or the grace period is over.
+                deadline = time.monotonic() + stop_grace
+        
+        if process.poll() is None:
+            terminate(process)
+        # The pipe closes once the process is gone
+        reader.join(timeout=1)
+        while True:
+            try:
+                chunk = chunks.get_nowait()
+            except queue.Empty:
+                break
+            if chunk is None:
+                break
+            handle(decoder.decode(chunk))
+        text = decoder.decode(b'', final=True)
+        if text:
+            handle(text)
+        parser.close()
+        
+        if telemetry is not None:
+            with open(telemetry_file, "w", newline="") as f:
+                telemetry.write_csv(f)
+            print(f"\n[Wrapper] Saved {len(telemetry.rows)} telemetry rows "
+                  f"to {telemetry_file} ({telemetry.lost} frames lost)",
+                  flush=True)
+        
+        retcode = process.wait()
+        if parser.stopped:
+            print("\n[Wrapper] Program terminated on robot, stopping debugger.", flush=True)
+            return 0
+        return retcode
+    finally:
+        if process.poll() is None:
+            terminate(process)
+
+
+def main():
+    argv = sys.argv[1:]
+    telemetry_file = None
+    if argv[:1] == ["--telemetry"]:
+        telemetry_file = argv[1]
+        argv = argv[2:]
+    
+    # Build pybricksdev command
+    args = [sys.executable, "-m", "pybricksdev"] + argv
+    
+    try:
+        sys.exit(run(args, telemetry_file))
     except KeyboardInterrupt:
         print("\n[Wrapper] Interrupted by user", flush=True)
-        if 'process' in locals():
-            process.terminate()
         sys.exit(130)
     except Exception as e:
         print(f"[Wrapper] Error running pybricksdev: {e}", flush=True)
@@ -0,0 +1,147 @@
+"""
+Decode the telemetry frames printed by telemetry.Telemetry on the hub.
+
+The hub prints a schema line ('@tlmdef,period,name:fmt:scale,...') and
+then one '@tlm,<base64>' line per frame. Each frame holds a header
+(sequence number, row count, time of the first row) and packed rows of
+(time offset, value per signal). TelemetryDecoder takes the telemetry
+events of OutputParser and turns the frames back into rows.
+
+    python .vscode/telemetry_decode.py transcript.txt             # CSV to stdout
+    python .vscode/telemetry_decode.py transcript.txt -o run.csv
+    python .vscode/run_pybricks.py --telemetry run.csv run --name Bot ble menu.py
+
+NumPy is optional and only needed for to_numpy().
+"""
+import argparse
+import base64
+import binascii
+import csv
+import struct
+import sys
+
+from pybricks_output import OutputParser, TELEMETRY
+
+SCHEMA_TAG = "tlmdef"
+FRAME_TAG = "tlm"
+
+HEADER = "<HBI"
+ROW_TIME = "H"
+
+
+class TelemetryDecoder:
+    """
+    Collects decoded telemetry rows.
+
+    Attributes:
+        columns: Column names: 'time_ms', then one per signal.
+        rows: Decoded rows as lists, time first. Scaled values are floats.
+        lost: Number of frames missing from the sequence numbers.
+        errors: Number of frame lines that could not be decoded.
+    """
+
+    def __init__(self):
+        self.columns = []
+        self.rows = []
+        self.lost = 0
+        self.errors = 0
+        self._row = None
+        self._scales = ()
+        self._sequence = None
+
+    def on_event(self, event):
+        """Handle an OutputParser event. Other events are ignored."""
+        if event.kind == TELEMETRY:
+            self.feed(*event.data)
+
+    def feed(self, tag, fields):
+        """Handle one telemetry record, split as OutputParser does."""
+        if tag == SCHEMA_TAG:
+            self.schema(fields[1:])
+        elif tag == FRAME_TAG and fields:
+            try:
+                self.frame(base64.b64decode(fields[0], validate=True))
+            except (binascii.Error, struct.error, ValueError):
+                self.errors += 1
+
+    def schema(self, signals):
+        """Set the signals from the fields of a schema line."""
+        names = []
+        formats = []
+        scales = []
+        for signal in signals:
+            name, fmt, scale = signal.split(":")
+            names.append(name)
+            formats.append(fmt)
+            scales.append(int(scale))
+        self.columns = ["time_ms"] + names
+        self._row = struct.Struct("<" + ROW_TIME + "".join(formats))
+        self._scales = scales
+        self._sequence = None
+
+    def frame(self, data):
+        """Decode one frame and append its rows."""
+        if self._row is None:
+            raise ValueError("frame before the schema line")
+        sequence, count, first = struct.unpack_from(HEADER, data)
+        offset = struct.calcsize(HEADER)
+        if offset + count * self._row.size != len(data):
+            raise ValueError("frame size does not match the schema")
+        if self._sequence is not None:
+            self.lost += (sequence - self._sequence - 1) & 0xFFFF
+        self._sequence = sequence
+        scales = self._scales
+        for values in self._row.iter_unpack(data[offset:]):
+            row = [first + values[0]]
+            for value, scale in zip(values[1:], scales):
+                row.append(value if scale == 1 else value / scale)
+            self.rows.append(row)
+
+    def write_csv(self, file):
+        """Write the columns and rows as CSV to an open file."""
+        writer = csv.writer(file)
+        writer.writerow(self.columns)
+        writer.writerows(self.rows)
+
+    def to_numpy(self):
+        """
+        Return the rows as a NumPy structured array, one field per column.
+        """
+        import numpy
+
+        dtype = [("time_ms", "i8")] + [
+            (name, "f8" if scale != 1 else "i8")
+            for name, scale in zip(self.columns[1:], self._scales)]
+        return numpy.array([tuple(row) for row in self.rows], dtype=dtype)
+
+
+def decode_transcript(text):
+    """Decode the telemetry in a complete output transcript."""
+    decoder = TelemetryDecoder()
+    parser = OutputParser()
+    parser.subscribe(decoder.on_event, kinds=(TELEMETRY,))
+    parser.feed(text)
+    parser.close()
+    return decoder
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Decode hub telemetry from saved program output.")
+    parser.add_argument("transcript", help="saved pybricksdev output")
+    parser.add_argument("-o", "--output", help="CSV file (default: stdout)")
+    args = parser.parse_args()
+
+    with open(args.transcript, encoding="utf-8", errors="replace") as f:
+        decoder = decode_transcript(f.read())
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            decoder.write_csv(f)
+    else:
+        decoder.write_csv(sys.stdout)
+    print("{} rows, {} frames lost, {} bad frames".format(
+        len(decoder.rows), decoder.lost, decoder.errors), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,472 @@
+"""
+Benchmarks for the display and menu hot paths, run on the host.
+
+The on-hub modules are imported against the simulated pybricks modules in
+sim/, and every call goes to a stub hub whose display does nothing, so only
+the cost of our own code is measured. For each benchmark the per call
+latency is timed, then the calls are repeated under tracemalloc to find
+how much memory each call allocates (peak) and keeps (retained).
+
+Usage:
+    python benchmarks/bench.py                      # run all, save JSON
+    python benchmarks/bench.py -k display_content   # only matching names
+    python benchmarks/bench.py --compare old.json   # flag regressions
+
+CPython timings are not hub timings, but a change in the relative cost or
+in the allocations of a path shows up here before the code is flashed.
+"""
+import argparse
+import atexit
+import gc
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "sim")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from pybricks_sim import sim  # noqa: E402
+
+DEFAULT_OUTPUT = os.path.join(ROOT, "benchmarks", "results.json")
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """
+    Register a benchmark.
+
+    The decorated function is called once to set up and must return
+    (call, inputs): `call(x)` is timed for every x in `inputs`.
+    """
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+class _StubDisplay:
+    def char(self, char):
+        pass
+
+    def number(self, number):
+        pass
+
+    def icon(self, icon):
+        pass
+
+    def pixel(self, row, column, brightness=100):
+        pass
+
+    def off(self):
+        pass
+
+
+class _StubButtons:
+    def pressed(self):
+        return set()
+
+
+class StubHub:
+    """A hub whose methods do nothing, so only the caller is measured."""
+
+    def __init__(self):
+        self.display = _StubDisplay()
+        self.buttons = _StubButtons()
+
+
+# Display benchmarks
+
+BRIGHTNESS_PATTERNS = [
+    ["  8  ", " 898 ", "86#68", "6 # 6", "  #  "],
+    ["13579", "2468#", "97531", "#8642", "12345"],
+    ["     ", " # # ", "     ", "#   #", " ### "],
+]
+
+
+def _display_content_case(inputs):
+    import pix_display
+    hub = StubHub()
+    return (lambda content: pix_display.display_content(hub, content)), inputs
+
+
+@benchmark("display_content/int_0_9")
+def _():
+    return _display_content_case(list(range(0, 10)))
+
+
+@benchmark("display_content/int_10_19")
+def _():
+    return _display_content_case(list(range(10, 20)))
+
+
+@benchmark("display_content/int_20_99")
+def _():
+    return _display_content_case(list(range(20, 100)))
+
+
+@benchmark("display_content/int_negative")
+def _():
+    return _display_content_case(list(range(-99, 0)))
+
+
+@benchmark("display_content/int_full_range")
+def _():
+    # Every number is one table lookup, so this should match the ranges
+    return _display_content_case(list(range(-99, 100)))
+
+
+@benchmark("display_content/char")
+def _():
+    return _display_content_case(list("ABCXYZ?!"))
+
+
+@benchmark("display_content/pattern")
+def _():
+    return _display_content_case(BRIGHTNESS_PATTERNS)
+
+
+@benchmark("display_number/0_99")
+def _():
+    import pix_display
+    hub = StubHub()
+    return (lambda n: pix_display.display_number(hub, n)), list(range(100))
+
+
+@benchmark("display_pattern/cached")
+def _():
+    import pix_display
+    hub = StubHub()
+    return (lambda p: pix_display.display_pattern(hub, p)), BRIGHTNESS_PATTERNS
+
+
+@benchmark("display_pattern/uncached")
+def _():
+    import pix_display
+    hub = StubHub()
+
+    def call(pattern):
+        # A fresh list every call always misses the cache
+        pix_display.display_pattern(hub, list(pattern))
+    return call, BRIGHTNESS_PATTERNS
+
+
+@benchmark("pattern/compile_strings")
+def _():
+    import pix_display
+    return pix_display.compile_pattern, BRIGHTNESS_PATTERNS
+
+
+@benchmark("pattern/unpack_packed")
+def _():
+    import pix_display
+    blob = pix_display.pack_patterns(BRIGHTNESS_PATTERNS)
+    return (lambda i: pix_display.unpack_pattern(blob, i)), [0, 1, 2]
+
+
+@benchmark("pattern/pack_getitem")
+def _():
+    # Frames are decoded once and kept, so later calls allocate nothing
+    import pix_display
+    pack = pix_display.PatternPack(
+        pix_display.pack_patterns(BRIGHTNESS_PATTERNS))
+    return (lambda i: pack[i]), [0, 1, 2]
+
+
+def _frame_rows(frame):
+    """Turn a frame back into the string syntax of a pattern."""
+    return ["".join(" " if frame[r, c] == 0 else "#" if frame[r, c] == 100
+                    else str(frame[r, c] // 10) for c in range(5))
+            for r in range(5)]
+
+
+@benchmark("pattern/pack_numbers")
+def _():
+    # Retained bytes is the memory cost of keeping the patterns
+    import pix_display
+    numbers = [_frame_rows(pix_display.number_frame(n)) for n in range(20)]
+    return pix_display.pack_patterns, [numbers]
+
+
+# Menu benchmarks
+
+def _menu_items():
+    """Display values covering every content type."""
+    return [1, 7, 12, 19, 25, 99, "A", "Z"] + BRIGHTNESS_PATTERNS
+
+
+@benchmark("menu/navigate_right")
+def _():
+    from menu import Menu
+    menu = Menu(StubHub())
+    for display in _menu_items():
+        menu.add_item(display, None)
+    return (lambda _: menu._navigate_right()), list(range(len(menu)))
+
+
+@benchmark("menu/navigate_left")
+def _():
+    from menu import Menu
+    menu = Menu(StubHub())
+    for display in _menu_items():
+        menu.add_item(display, None)
+    return (lambda _: menu._navigate_left()), list(range(len(menu)))
+
+
+@benchmark("menu/redraw_unchanged")
+def _():
+    from menu import Menu
+    menu = Menu(StubHub())
+    for display in _menu_items():
+        menu.add_item(display, None)
+    return (lambda _: menu._display_current_item()), list(range(len(menu)))
+
+
+@benchmark("menu/add_item")
+def _():
+    from menu import Menu
+    menu = Menu(StubHub())
+    items = _menu_items()
+
+    def call(display):
+        # Retained bytes per call is the memory cost of one item
+        if len(menu) >= 1000:
+            menu.clear_items()
+        menu.add_item(display, None)
+    return call, items
+
+
+@benchmark("menu/add_submenu")
+def _():
+    from menu import Menu
+    menu = Menu(StubHub())
+    
+    def call(display):
+        # Retained bytes per call is the memory cost of one submenu
+        if len(menu) >= 100:
+            menu.clear_items()
+        menu.add_submenu(display).add_item(1, None)
+    return call, list(range(10))
+
+
+# Startup benchmarks
+
+MISSION_SOURCE = """
+from pybricks.tools import wait
+
+MOVES = [{moves}]
+
+
+def _drive(hub, distance):
+    wait(abs(distance))
+
+
+def _turn(hub, angle):
+    wait(abs(angle))
+
+
+def run(hub):
+    for kind, value in MOVES:
+        if kind == "drive":
+            _drive(hub, value)
+        else:
+            _turn(hub, value)
+"""
+
+_mission_dir = None
+
+
+def _mission_modules(count):
+    """Write `count` mission modules to a temporary directory."""
+    global _mission_dir
+    if _mission_dir is None:
+        _mission_dir = tempfile.mkdtemp(prefix="bench_missions_")
+        atexit.register(shutil.rmtree, _mission_dir, True)
+        sys.path.insert(0, _mission_dir)
+    names = []
+    for i in range(count):
+        name = "bench_mission_{}".format(i)
+        path = os.path.join(_mission_dir, name + ".py")
+        if not os.path.exists(path):
+            moves = ", ".join('("drive", {}), ("turn", {})'.format(i + j, j)
+                              for j in range(40))
+            with open(path, "w") as f:
+                f.write(MISSION_SOURCE.format(moves=moves))
+        names.append(name)
+    return names
+
+
+def _startup_case(count, lazy):
+    """Time from an empty module cache to the first menu frame."""
+    from menu import Menu
+    names = _mission_modules(count)
+
+    def call(_):
+        for name in names:
+            sys.modules.pop(name, None)
+        menu = Menu(StubHub())
+        for i, name in enumerate(names):
+            if lazy:
+                menu.add_item(i, name + ":run")
+            else:
+                menu.add_item(i, __import__(name).run)
+        menu._display_current_item()
+    return call, [None]
+
+
+for _count in (5, 20):
+    benchmark("startup/eager_{}".format(_count))(
+        lambda count=_count: _startup_case(count, False))
+    benchmark("startup/lazy_{}".format(_count))(
+        lambda count=_count: _startup_case(count, True))
+
+
+# Runner
+
+def measure(call, inputs, min_time=0.2):
+    """
+    Time and trace a benchmark.
+
+    Returns:
+        dict: Per call latency in µs (mean, min, max) and allocation in
+              bytes (mean and max peak, mean retained).
+    """
+    # Warm up caches and imports
+    for x in inputs:
+        call(x)
+
+    # Latency: repeat rounds over all inputs until min_time has passed
+    per_call = []
+    total = 0.0
+    gc.disable()
+    try:
+        while total < min_time:
+            for x in inputs:
+                start = time.perf_counter()
+                call(x)
+                elapsed = time.perf_counter() - start
+                per_call.append(elapsed)
+                total += elapsed
+    finally:
+        gc.enable()
+
+    # Allocations: one traced call per input
+    peaks = []
+    retained = []
+    tracemalloc.start()
+    try:
+        for x in inputs:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            call(x)
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - base)
+            retained.append(current - base)
+    finally:
+        tracemalloc.stop()
+
+    per_call.sort()
+    return {
+        "calls": len(per_call),
+        "mean_us": round(1e6 * total / len(per_call), 3),
+        "median_us": round(1e6 * per_call[len(per_call) // 2], 3),
+        "min_us": round(1e6 * per_call[0], 3),
+        "max_us": round(1e6 * per_call[-1], 3),
+        "alloc_peak_bytes": round(sum(peaks) / len(peaks), 1),
+        "alloc_peak_max_bytes": max(peaks),
+        "retained_bytes": round(sum(retained) / len(retained), 1),
+    }
+
+
+def run(names, min_time=0.2):
+    """Run the named benchmarks and return their results by name."""
+    results = {}
+    for name in names:
+        sim.reset()
+        call, inputs = BENCHMARKS[name]()
+        results[name] = measure(call, inputs, min_time)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare results against a saved run.
+
+    Returns:
+        list: (name, metric, old, new) for every metric that got worse
+              by more than the threshold factor.
+    """
+    regressions = []
+    for name, new in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        for metric in ("median_us", "alloc_peak_bytes", "retained_bytes"):
+            if metric not in old:
+                continue
+            limit = old[metric] * threshold
+            if metric != "median_us":
+                # Allow a few bytes of noise on allocation-free paths
+                limit = max(limit, old[metric] + 16)
+            if new[metric] > limit:
+                regressions.append((name, metric, old[metric], new[metric]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the host benchmarks.")
+    parser.add_argument("-k", metavar="TEXT", default="",
+                        help="only run benchmarks whose name contains TEXT")
+    parser.add_argument("--min-time", type=float, default=0.2,
+                        help="seconds to spend timing each benchmark")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT,
+                        help="JSON file to save the results to")
+    parser.add_argument("--compare", metavar="FILE",
+                        help="saved results to check for regressions")
+    parser.add_argument("--threshold", type=float, default=1.5,
+                        help="factor a metric may grow before it counts "
+                             "as a regression (default 1.5)")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        # Read it first: --output may point at the same file
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+    names = [n for n in BENCHMARKS if args.k in n]
+    results = run(names, args.min_time)
+
+    print("{:<34} {:>10} {:>10} {:>12} {:>10}".format(
+        "benchmark", "median µs", "max µs", "peak bytes", "retained"))
+    for name, r in results.items():
+        print("{:<34} {:>10.2f} {:>10.2f} {:>12.1f} {:>10.1f}".format(
+            name, r["median_us"], r["max_us"], r["alloc_peak_bytes"],
+            r["retained_bytes"]))
+
+    with open(args.output, "w") as f:
+        json.dump({
+            "python": platform.python_implementation() + " "
+            + platform.python_version(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "results": results,
+        }, f, indent=2)
+    print("Saved to " + os.path.relpath(args.output))
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for name, metric, old, new in regressions:
+            print("REGRESSION {} {}: {} -> {}".format(name, metric, old, new))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
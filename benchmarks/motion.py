@@ -0,0 +1,136 @@
+"""
+Compare the virtual run time of missions run move by move and as a
+MotionPlan.
+
+blocks.py runs subtask() and subtask2() side by side: one awaited move at a
+time with wait() gaps in between. The same moves are then run as one
+MotionPlan in a single task, once with the gaps kept as pauses and once
+without them. Its moves never continue into each other, so nothing blends
+and the difference between the two comes from removing the gaps.
+
+A second mission, a path of straights and curves with an attachment that
+changes speed, is where blending applies. It is run as a MotionPlan with
+every move holding and with blending, so the gain of blending is measured
+on its own. All runs use the simulator in sim/, so the times are virtual ms
+of robot motion, not host CPU time.
+
+Usage:
+    python benchmarks/motion.py
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, "sim")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from pybricks_sim import sim  # noqa: E402
+from run_sim import run_program  # noqa: E402
+
+
+def blocks_time():
+    """Virtual time of blocks.py as generated by the Pybricks editor."""
+    summary = run_program(os.path.join(ROOT, "blocks.py"))
+    return summary["virtual_ms"]
+
+
+def plan_time(gaps):
+    """
+    Virtual time of the blocks.py moves as one MotionPlan.
+
+    Args:
+        gaps: If True, keep the wait(100) gaps as pauses.
+    """
+    from pybricks.parameters import Direction, Port
+    from pybricks.pupdevices import Motor
+    from pybricks.robotics import DriveBase
+    from pybricks.tools import run_task
+    from motion import MotionPlan
+
+    sim.reset()
+    left_wheel = Motor(Port.F, Direction.COUNTERCLOCKWISE)
+    right_wheel = Motor(Port.B, Direction.CLOCKWISE)
+    drive_base = DriveBase(left_wheel, right_wheel, 56, 114)
+    attachment = Motor(Port.D, Direction.CLOCKWISE)
+
+    plan = MotionPlan(drive_base)
+    for _ in range(4):
+        plan.turn(90)
+        if gaps:
+            plan.pause(100)
+    for _ in range(10):
+        plan.run_angle(attachment, 500, 180)
+        if gaps:
+            plan.pause(100, attachment)
+        plan.run_angle(attachment, 500, -180)
+        if gaps:
+            plan.pause(100, attachment)
+
+    run_task(plan.run_async())
+    return sim.now, len(plan)
+
+
+PATH = [
+    ("straight", 300), ("curve", 150, 90), ("straight", 200),
+    ("curve", 150, 90), ("straight", 100),
+]
+
+
+def path_time(blend):
+    """
+    Virtual time of a path that blends, as one MotionPlan.
+
+    Args:
+        blend: If False, every move holds at its end as if nothing blended.
+    """
+    from pybricks.parameters import Direction, Port, Stop
+    from pybricks.pupdevices import Motor
+    from pybricks.robotics import DriveBase
+    from pybricks.tools import run_task
+    from motion import MotionPlan
+
+    sim.reset()
+    left_wheel = Motor(Port.F, Direction.COUNTERCLOCKWISE)
+    right_wheel = Motor(Port.B, Direction.CLOCKWISE)
+    drive_base = DriveBase(left_wheel, right_wheel, 56, 114)
+    attachment = Motor(Port.D, Direction.CLOCKWISE)
+
+    plan = MotionPlan.from_moves(drive_base, PATH)
+    for speed in (300, 600, 900, 600):
+        plan.run_angle(attachment, speed, 180)
+    segments = plan.compile()
+    if not blend:
+        for segment in segments:
+            for device, moves in segment:
+                for move in moves:
+                    move[3] = Stop.HOLD
+
+    run_task(plan.run_async())
+    return sim.now, len(plan)
+
+
+def _row(name, ms, moves, baseline=None):
+    change = "" if baseline is None else "  {:+.1%}".format(
+        (ms - baseline) / baseline)
+    print("{:<28} {:>10} {:>8}{}".format(name, ms, moves, change))
+
+
+def main():
+    baseline = blocks_time()
+    print("{:<28} {:>10} {:>8}".format("version", "virtual ms", "moves"))
+    _row("blocks.py", baseline, "-")
+    kept, moves = plan_time(True)
+    _row("MotionPlan with pauses", kept, moves, baseline)
+    removed, moves = plan_time(False)
+    _row("MotionPlan without pauses", removed, moves, baseline)
+    print("Removing the pauses: {:+.1%}".format((removed - kept) / kept))
+    print()
+    held, moves = path_time(False)
+    _row("path, every move holds", held, moves)
+    blended, moves = path_time(True)
+    _row("path, blended", blended, moves, held)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+try:
+    from typing import Callable, Optional
+except ImportError:
+    pass
+
+from pybricks.hubs import PrimeHub
+from pybricks.parameters import Button
+from pybricks.tools import StopWatch
+from loop_timer import LoopTimer
+
+# Event kinds
+PRESS = 1
+RELEASE = 2
+LONG_PRESS = 3
+REPEAT = 4
+
+KIND_NAMES = {
+    PRESS: "press",
+    RELEASE: "release",
+    LONG_PRESS: "long_press",
+    REPEAT: "repeat",
+}
+
+BUTTONS = (Button.LEFT, Button.RIGHT, Button.CENTER, Button.BLUETOOTH)
+
+
+class ButtonInput:
+    """
+    Turns the hub buttons into a queue of press/release events.
+
+    The buttons are read once per sample. Each button keeps its own state,
+    so edges are detected even when several buttons change in the same
+    sample. Events are (kind, button) tuples where kind is one of PRESS,
+    RELEASE, LONG_PRESS or REPEAT.
+
+    Debouncing uses a lockout: the first edge is reported straight away and
+    further edges on the same button are ignored for `debounce` ms. This
+    filters contact bounce without adding latency to the first press.
+
+    The waiting methods sample every `period` ms through a LoopTimer, the
+    `loop` attribute, which makes up for the time spent sampling and
+    measures the average and worst sample interval. Call
+    input.loop.report('buttons') to print them.
+    """
+
+    def __init__(self, hub: PrimeHub, period: int = 10, debounce: int = 20,
+                 long_press: int = 700, repeat_delay: int = 500,
+                 repeat_interval: int = 150, repeat_buttons: tuple = (),
+                 queue_size: int = 8,
+                 clock: Optional[Callable[[], int]] = None):
+        """
+        Initialize the input engine.
+
+        Args:
+            hub: PrimeHub instance whose buttons are sampled.
+            period: Time in ms between samples while waiting for an event.
+            debounce: Time in ms during which further edges on a button are
+                      ignored after an accepted edge.
+            long_press: Time in ms a button must be held to send LONG_PRESS.
+                        Use 0 to disable long press events.
+            repeat_delay: Time in ms a repeat button must be held before the
+                          first REPEAT event.
+            repeat_interval: Time in ms between REPEAT events.
+            repeat_buttons: Buttons that send REPEAT events while held.
+            queue_size: Number of events kept. The oldest event is dropped
+                        when the queue is full.
+            clock: Function returning the time in ms. If None, a StopWatch
+                   is used.
+        """
+        self.hub = hub
+        self.period = period
+        self.debounce = debounce
+        self.long_press = long_press
+        self.repeat_delay = repeat_delay
+        self.repeat_interval = repeat_interval
+        self.repeat_buttons = repeat_buttons
+        self.clock = clock if clock is not None else StopWatch().time
+        self.loop = LoopTimer(period, clock=self.clock)
+        self.dropped = 0
+
+        self._queue = [None] * queue_size
+        self._head = 0
+        self._count = 0
+
+        # Per button state: pressed, time of last accepted edge,
+        # long press sent, time of next repeat
+        self._pressed = {}
+        self._edge_time = {}
+        self._long_sent = {}
+        self._next_repeat = {}
+        self.sync()
+
+    def sync(self):
+        """
+        Take the current button state as the baseline without sending events.
+
+        Call this after something else has been reading the buttons (or
+        nothing has for a while) so that a button that is still held does
+        not show up as a new press.
+        """
+        pressed = self.hub.buttons.pressed()
+        now = self.clock()
+        for button in BUTTONS:
+            self._pressed[button] = button in pressed
+            self._edge_time[button] = now
+            self._long_sent[button] = True
+            self._next_repeat[button] = None
+        self.clear()
+
+    def _put(self, kind: int, button):
+        size = len(self._queue)
+        if self._count == size:
+            self._head = (self._head + 1) % size
+            self._count -= 1
+            self.dropped += 1
+        self._queue[(self._head + self._count) % size] = (kind, button)
+        self._count += 1
+
+    def sample(self, now: Optional[int] = None):
+        """
+        Read the buttons once and queue any events.
+
+        Args:
+            now: The current time in ms. If None, the clock is read.
+        """
+        if now is None:
+            now = self.clock()
+        pressed = self.hub.buttons.pressed()
+        for button in BUTTONS:
+            is_pressed = button in pressed
+            if is_pressed != self._pressed[button]:
+                if now - self._edge_time[button] < self.debounce:
+                    continue
+                self._pressed[button] = is_pressed
+                self._edge_time[button] = now
+                if is_pressed:
+                    self._long_sent[button] = False
+                    if button in self.repeat_buttons:
+                        self._next_repeat[button] = now + self.repeat_delay
+                    self._put(PRESS, button)
+                else:
+                    self._next_repeat[button] = None
+                    self._put(RELEASE, button)
+            elif is_pressed:
+                held = now - self._edge_time[button]
+                if (self.long_press and not self._long_sent[button]
+                        and held >= self.long_press):
+                    self._long_sent[button] = True
+                    self._put(LONG_PRESS, button)
+                next_repeat = self._next_repeat[button]
+                if next_repeat is not None and now >= next_repeat:
+                    self._next_repeat[button] = next_repeat + self.repeat_interval
+                    self._put(REPEAT, button)
+
+    def get(self):
+        """
+        Take the oldest event from the queue.
+
+        Returns:
+            tuple: A (kind, button) event, or None if the queue is empty.
+        """
+        if not self._count:
+            return None
+        event = self._queue[self._head]
+        self._queue[self._head] = None
+        self._head = (self._head + 1) % len(self._queue)
+        self._count -= 1
+        return event
+
+    def clear(self):
+        """Drop all queued events."""
+        for i in range(len(self._queue)):
+            self._queue[i] = None
+        self._head = 0
+        self._count = 0
+
+    def is_pressed(self, button) -> bool:
+        """Return the debounced state of a button as of the last sample."""
+        return self._pressed[button]
+
+    def changed_at(self, button) -> int:
+        """
+        Return the time in ms of the last accepted press or release of a
+        button. Read it with the PRESS event to get the time of the press.
+        """
+        return self._edge_time[button]
+
+    def wait_event(self, timeout: Optional[int] = None):
+        """
+        Sample the buttons until an event is available.
+
+        Args:
+            timeout: Maximum time to wait in ms. If None, waits forever.
+
+        Returns:
+            tuple: A (kind, button) event, or None on timeout.
+        """
+        start = self.clock()
+        self.loop.start()
+        while True:
+            self.sample()
+            event = self.get()
+            if event is not None:
+                return event
+            if timeout is not None and self.clock() - start >= timeout:
+                return None
+            self.loop.wait()
+
+    def wait_release(self, button):
+        """Sample the buttons until the given button is released."""
+        self.loop.start()
+        self.sample()
+        while self._pressed[button]:
+            self.loop.wait()
+            self.sample()
+
+    def __len__(self):
+        """Return the number of queued events."""
+        return self._count
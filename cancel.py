@@ -0,0 +1,163 @@
+try:
+    from typing import Callable, Optional
+except ImportError:
+    pass
+
+from pybricks.tools import StopWatch, wait
+from run_log import STOPPED, TIMEOUT
+
+# Longest time CancelToken.wait() sleeps between checks, in ms
+CHECK_INTERVAL = 10
+
+
+class Cancelled(Exception):
+    """Raised by CancelToken.check() when the running item should stop."""
+
+
+class CancelToken:
+    """
+    Tells a running menu item that it should stop, and cleans up after it.
+
+    The menu creates a token for every run. A token is cancelled when CENTER
+    is pressed or when its deadline passes. Items that take the token call
+    check() (or wait() instead of pybricks wait()) in their loops, which
+    raises Cancelled so the item unwinds at a safe point.
+
+    Cleanup callbacks registered with on_cleanup() run when the item ends,
+    however it ends, newest first. Use them to stop motors and turn off
+    lights so nothing is left running mid-move.
+
+    Example:
+        def sweep(hub, token):
+            token.on_cleanup(arm.stop)
+            while True:
+                arm.run_angle(300, 90)
+                arm.run_angle(300, -90)
+                token.check()
+
+        menu.add_item(4, sweep, token=True, deadline=10000)
+    """
+
+    def __init__(self, deadline: Optional[int] = None,
+                 poll: Optional[Callable[[], bool]] = None,
+                 clock: Optional[Callable[[], int]] = None):
+        """
+        Initialize the token.
+
+        Args:
+            deadline: Time in ms from now after which the item is cancelled
+                      with reason TIMEOUT, or None for no deadline.
+            poll: Function returning True when the item should stop, called
+                  by check(). The menu uses it to read the CENTER button.
+            clock: Function returning the time in ms. If None, a StopWatch
+                   is used.
+        """
+        self.clock = clock if clock is not None else StopWatch().time
+        self.poll = poll
+        self.deadline = None
+        self.set_deadline(deadline)
+        self.reason = None
+        self.cancelled_at = None
+        self.cleaned_at = None
+        self._callbacks = []
+
+    @property
+    def cancelled(self) -> bool:
+        """True once the token is cancelled or its deadline has passed."""
+        if self.reason is None:
+            if self.deadline is not None and self.clock() >= self.deadline:
+                # Count the stop latency from the deadline, not from when
+                # it was noticed
+                self.cancel(TIMEOUT, self.deadline)
+            elif self.poll is not None and self.poll():
+                self.cancel(STOPPED)
+        return self.reason is not None
+
+    def cancel(self, reason: str = STOPPED, at: Optional[int] = None):
+        """
+        Cancel the token. Only the first reason is kept.
+
+        Args:
+            reason: Why the item should stop, STOPPED or TIMEOUT.
+            at: Time in ms at which the stop was asked for, such as the
+                time of the button press. If None, the clock is read.
+        """
+        if self.reason is None:
+            self.reason = reason
+            self.cancelled_at = self.clock() if at is None else at
+
+    def set_deadline(self, deadline: Optional[int]):
+        """Set the deadline to `deadline` ms from now, or None for none."""
+        self.deadline = None if deadline is None else self.clock() + deadline
+
+    def remaining(self) -> Optional[int]:
+        """Get the time in ms until the deadline, or None if there is none."""
+        if self.deadline is None:
+            return None
+        remaining = self.deadline - self.clock()
+        return remaining if remaining > 0 else 0
+
+    def check(self):
+        """Raise Cancelled if the item should stop."""
+        if self.cancelled:
+            raise Cancelled(self.reason)
+
+    def wait(self, time: int):
+        """
+        Wait like pybricks wait(), but raise Cancelled as soon as the item
+        should stop.
+        """
+        end = self.clock() + time
+        while True:
+            self.check()
+            left = end - self.clock()
+            if left <= 0:
+                return
+            try:
+                wait(left if left < CHECK_INTERVAL else CHECK_INTERVAL)
+            except SystemExit:
+                # The stop button was pressed: note the time before the
+                # item unwinds, so its stop latency counts from the press
+                self.cancel(STOPPED)
+                raise
+
+    def on_cleanup(self, callback: Callable[[], None]):
+        """
+        Register a function to call when the item ends.
+
+        Returns:
+            The callback, so this can be used as a decorator.
+        """
+        self._callbacks.append(callback)
+        return callback
+
+    def cleanup(self):
+        """
+        Run and forget the cleanup callbacks, newest first.
+
+        Every callback runs even if an earlier one fails; the first error is
+        raised after all of them ran.
+        """
+        error = None
+        callbacks = self._callbacks
+        self._callbacks = []
+        while callbacks:
+            try:
+                callbacks.pop()()
+            except Exception as e:
+                if error is None:
+                    error = e
+        self.cleaned_at = self.clock()
+        if error is not None:
+            raise error
+
+    @property
+    def stop_latency(self) -> Optional[int]:
+        """
+        Time in ms from the stop request (the button press or the
+        deadline) to the end of cleanup, or None if the token was not
+        cancelled or not cleaned up yet.
+        """
+        if self.cancelled_at is None or self.cleaned_at is None:
+            return None
+        return self.cleaned_at - self.cancelled_at
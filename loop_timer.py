@@ -0,0 +1,186 @@
+try:
+    from typing import Callable, Optional
+except ImportError:
+    pass
+
+try:
+    from array import array
+except ImportError:
+    array = None
+
+from pybricks.tools import StopWatch, wait
+
+# Prefix of every line written by LoopTimer.report()
+PREFIX = '@loop'
+
+
+class SampleBuffer:
+    """
+    A ring buffer of integers, allocated once.
+
+    Adding a value overwrites the oldest one when the buffer is full, so a
+    loop can keep recent values without creating objects.
+    """
+
+    def __init__(self, size: int, typecode: str = 'i'):
+        """
+        Initialize the buffer.
+
+        Args:
+            size: Number of values kept.
+            typecode: array typecode of the values. Where the array module
+                      is not available a list is used instead.
+        """
+        values = [0] * size
+        self._values = array(typecode, values) if array is not None else values
+        self._size = size
+        self._next = 0
+        self._count = 0
+
+    def add(self, value: int):
+        """Add a value, replacing the oldest if the buffer is full."""
+        self._values[self._next] = value
+        self._next += 1
+        if self._next == self._size:
+            self._next = 0
+        if self._count < self._size:
+            self._count += 1
+
+    def __getitem__(self, index: int) -> int:
+        """Get a value by age: 0 is the oldest kept, -1 the newest."""
+        if index < 0:
+            index += self._count
+        if index < 0 or index >= self._count:
+            raise IndexError('SampleBuffer index out of range')
+        return self._values[(self._next - self._count + index) % self._size]
+
+    def clear(self):
+        """Forget all values."""
+        self._next = 0
+        self._count = 0
+
+    def __len__(self):
+        """Return the number of values kept."""
+        return self._count
+
+
+class LoopTimer:
+    """
+    Runs a loop at a fixed period and measures how steady it is.
+
+    Call start() before the loop and wait() at the end of every pass.
+    wait() sleeps until the next deadline, so the time spent in the loop
+    body is made up for. If the body overran the deadline, the loop goes
+    on straight away and the next deadline is one period from then, so
+    missed passes are not run in a burst.
+
+    Every pass is measured from the previous one. The timer keeps the
+    count, the total and the longest interval, and how many intervals
+    were late (longer than period + tolerance). It only updates integer
+    attributes, so measuring allocates nothing.
+
+    Example:
+        timer = LoopTimer(10)
+        timer.start()
+        while not done():
+            update()
+            timer.wait()
+        timer.report('mission')
+    """
+
+    def __init__(self, period: int, tolerance: Optional[int] = None,
+                 history: int = 0,
+                 clock: Optional[Callable[[], int]] = None):
+        """
+        Initialize the timer.
+
+        Args:
+            period: Time in ms between the starts of two passes.
+            tolerance: How much longer than the period an interval may be
+                       before it counts as late. Defaults to half a period.
+            history: If more than 0, the last `history` intervals are kept
+                     in the `intervals` SampleBuffer.
+            clock: Function returning the time in ms. If None, a StopWatch
+                   is used.
+        """
+        self.period = period
+        self.tolerance = period // 2 if tolerance is None else tolerance
+        self.clock = clock if clock is not None else StopWatch().time
+        self.intervals = SampleBuffer(history) if history else None
+        self._deadline = 0
+        self._last = None
+        self.reset()
+
+    def reset(self):
+        """Forget the measurements."""
+        self.count = 0
+        self.total = 0
+        self.longest = 0
+        self.late = 0
+        self.overruns = 0
+        if self.intervals is not None:
+            self.intervals.clear()
+
+    def start(self):
+        """Start a loop. The first interval is measured from here."""
+        now = self.clock()
+        self._last = now
+        self._deadline = now + self.period
+
+    def _sleep_time(self) -> int:
+        """Return how long to sleep until the deadline, counting overruns."""
+        left = self._deadline - self.clock()
+        if left <= 0:
+            self.overruns += 1
+            return 0
+        return left
+
+    def _tick(self):
+        """Measure the interval that just ended and set the next deadline."""
+        now = self.clock()
+        if self._last is not None:
+            interval = now - self._last
+            self.count += 1
+            self.total += interval
+            if interval > self.longest:
+                self.longest = interval
+            if interval > self.period + self.tolerance:
+                self.late += 1
+            if self.intervals is not None:
+                self.intervals.add(interval)
+        self._last = now
+        self._deadline += self.period
+        if self._deadline <= now:
+            self._deadline = now + self.period
+
+    def wait(self):
+        """Sleep until the next pass is due."""
+        left = self._sleep_time()
+        if left:
+            wait(left)
+        self._tick()
+
+    async def wait_async(self):
+        """Coroutine version of wait(), for use inside run_task()."""
+        # Always yield, so other tasks run even if the body overran
+        await wait(self._sleep_time())
+        self._tick()
+
+    def mean(self) -> int:
+        """Return the average interval in ms, or 0 before the first one."""
+        return self.total // self.count if self.count else 0
+
+    def stats(self) -> tuple:
+        """Return (count, mean_ms, longest_ms, late, overruns)."""
+        return (self.count, self.mean(), self.longest, self.late,
+                self.overruns)
+
+    def report(self, name: str):
+        """
+        Print the measurements as one line of comma separated values:
+        PREFIX,name,period,count,mean_ms,longest_ms,late,overruns.
+        """
+        fields = [PREFIX, name, str(self.period)]
+        for value in self.stats():
+            fields.append(str(value))
+        print(','.join(fields))
@@ -0,0 +1,200 @@
+try:
+    from typing import Optional
+except ImportError:
+    pass
+
+try:
+    import gc
+except ImportError:
+    gc = None
+
+try:
+    import micropython
+except ImportError:
+    micropython = None
+
+try:
+    # Only on the host (CPython), where the simulator runs
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from run_log import mem_free
+
+# Sections measured by the menu
+NAVIGATE = 'navigate'
+RENDER = 'render'
+RUN = 'run'
+
+# Prefix of every line written by MemProfiler.dump()
+PREFIX = '@mem'
+
+# Profiler picked up by every Menu created after enable()
+profiler = None
+
+
+def mem_alloc():
+    """Return the allocated heap in bytes, or None where it cannot be read."""
+    if gc is None or not hasattr(gc, 'mem_alloc'):
+        return None
+    return gc.mem_alloc()
+
+
+class MemProfiler:
+    """
+    Measures heap use around sections of code, such as menu navigation,
+    rendering and item runs.
+
+    On the hub a section is measured with gc.mem_alloc() and gc.mem_free():
+    the heap is collected before the outermost section starts, so the
+    allocated bytes at the end are what the section allocated. On the host
+    tracemalloc is used instead, which also gives the peak of each section.
+
+    Per section the profiler keeps
+    [count, total_alloc, max_alloc, max_peak, min_free], where the
+    allocation values are bytes per call and min_free is the lowest free
+    heap seen at the end of a call. Values the platform cannot report
+    stay None.
+
+    Sections can be nested. Profiling slows the measured code down, as it
+    collects the heap on the hub and traces every allocation on the host.
+
+    Example:
+        import mem_profile
+        mem_profile.enable()
+        menu = Menu(hub)
+        ...
+        mem_profile.profiler.dump()
+    """
+
+    def __init__(self, tracing: Optional[bool] = None):
+        """
+        Initialize the profiler.
+
+        Args:
+            tracing: If True, measure with tracemalloc. If None, tracemalloc
+                     is used where it is available.
+        """
+        if tracing is None:
+            tracing = tracemalloc is not None
+        if tracing and tracemalloc is None:
+            raise ValueError("tracemalloc is not available")
+        self.tracing = tracing
+        self._stats = {}
+        self._stack = []
+
+    def start(self, section: str):
+        """Start measuring a section. Every start() needs a stop()."""
+        if self.tracing:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                # Keep the peak of the enclosing section before resetting it
+                outer = self._stack[-1]
+                if peak > outer[2]:
+                    outer[2] = peak
+            tracemalloc.reset_peak()
+            self._stack.append([section, current, current])
+        else:
+            if not self._stack and gc is not None:
+                gc.collect()
+            self._stack.append([section, mem_alloc(), None])
+
+    def stop(self):
+        """
+        Stop measuring the section started last.
+
+        Does nothing if no section is being measured.
+
+        Returns:
+            int: Bytes allocated by the section, or None if unknown.
+        """
+        if not self._stack:
+            return None
+        section, base, peak = self._stack.pop()
+        if self.tracing:
+            current, traced_peak = tracemalloc.get_traced_memory()
+            if traced_peak > peak:
+                peak = traced_peak
+            if self._stack and peak > self._stack[-1][2]:
+                self._stack[-1][2] = peak
+            alloc = current - base
+            peak -= base
+        else:
+            after = mem_alloc()
+            alloc = None if base is None else after - base
+        self._record(section, alloc, peak, mem_free())
+        return alloc
+
+    def _record(self, section, alloc, peak, free):
+        stats = self._stats.get(section)
+        if stats is None:
+            stats = [0, None, None, None, None]
+            self._stats[section] = stats
+        stats[0] += 1
+        if alloc is not None:
+            stats[1] = alloc if stats[1] is None else stats[1] + alloc
+            if stats[2] is None or alloc > stats[2]:
+                stats[2] = alloc
+        if peak is not None and (stats[3] is None or peak > stats[3]):
+            stats[3] = peak
+        if free is not None and (stats[4] is None or free < stats[4]):
+            stats[4] = free
+
+    def stats(self) -> dict:
+        """Return the stats of every measured section by name."""
+        return self._stats
+
+    def clear(self):
+        """Forget all measurements."""
+        self._stats = {}
+        self._stack = []
+
+    @staticmethod
+    def format(section: str, stats: list) -> str:
+        """
+        Format the stats of a section as one line of comma separated values.
+
+        The line is PREFIX,section,count,mean_alloc,max_alloc,max_peak,
+        min_free with empty fields for unknown values.
+        """
+        count, total, max_alloc, max_peak, min_free = stats
+        mean = None if total is None else total // count
+        fields = [PREFIX, section.replace(',', ' '), str(count)]
+        for value in (mean, max_alloc, max_peak, min_free):
+            fields.append('' if value is None else str(value))
+        return ','.join(fields)
+
+    def dump(self, verbose: bool = False):
+        """
+        Print the stats of every section, one line each.
+
+        Args:
+            verbose: If True, also print micropython.mem_info() where it
+                     is available.
+        """
+        for section in sorted(self._stats):
+            print(self.format(section, self._stats[section]))
+        if verbose and micropython is not None:
+            micropython.mem_info()
+
+
+def enable(tracing: Optional[bool] = None) -> MemProfiler:
+    """
+    Turn on profiling for every Menu created from now on.
+
+    Returns:
+        MemProfiler: The profiler the menus report to.
+    """
+    global profiler
+    profiler = MemProfiler(tracing)
+    return profiler
+
+
+def disable():
+    """Turn off profiling for menus created from now on."""
+    global profiler
+    if profiler is not None and profiler.tracing and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    profiler = None
@@ -5,9 +5,254 @@ except ImportError:
 
 from pybricks.hubs import PrimeHub
 from pybricks.parameters import Button
-from pybricks.tools import wait
+from pybricks.tools import multitask, run_task, wait
 from pybricks.parameters import Color, Icon
 import pix_display
+import mem_profile
+from button_input import ButtonInput, PRESS, RELEASE, LONG_PRESS
+from run_log import RunLog, COMPLETED, STOPPED, TIMEOUT, ERROR
+from cancel import CancelToken, Cancelled
+from sequencer import RunPlan, SKIPPED
+
+# Shown by run(show_startup=True) while the menu already accepts input
+STARTUP_ANIMATION = pix_display.Animation(['M'], 500)
+
+# Shown by AsyncMenu while an item runs
+RUNNING_ANIMATION = pix_display.Animation(
+    [Icon.TRUE, Icon.TRUE * 0.5], 250, loop=True)
+
+
+class LazyFunction:
+    """
+    A menu item function that is imported the first time it runs.
+    
+    Only the module and function names are kept until then, so a menu with
+    many missions starts without executing every mission module.
+    
+    Note: pybricksdev only uploads modules it sees imported. Make sure each
+    lazily loaded module is imported somewhere, for example in a function
+    that is never called:
+    
+        def _upload():
+            import mission_a, mission_b
+    """
+    
+    def __init__(self, module: str, name: str = 'run'):
+        """
+        Initialize the reference.
+        
+        Args:
+            module: Name of the module, for example 'missions.crane'.
+            name: Name of the function in that module.
+        """
+        self.module = module
+        self.name = name
+        self._function = None
+    
+    @classmethod
+    def parse(cls, reference: str):
+        """Create a LazyFunction from a 'module:function' string."""
+        module, sep, name = reference.partition(':')
+        if not module or (sep and not name):
+            raise ValueError("Expected 'module:function', got " + reference)
+        return cls(module, name) if sep else cls(module)
+    
+    @property
+    def loaded(self) -> bool:
+        """True once the function has been imported."""
+        return self._function is not None
+    
+    def resolve(self):
+        """Import the module if needed and return the function."""
+        if self._function is None:
+            module = __import__(self.module)
+            # __import__ returns the top level package for dotted names
+            for part in self.module.split('.')[1:]:
+                module = getattr(module, part)
+            self._function = getattr(module, self.name)
+        return self._function
+    
+    def __call__(self, *args):
+        """Import the function if needed and call it."""
+        return self.resolve()(*args)
+    
+    def __repr__(self):
+        return "LazyFunction('" + self.module + ":" + self.name + "')"
+
+
+class MenuItems:
+    """
+    The entries of one menu level, stored as parallel lists.
+    
+    Entry i is displays[i], functions[i], frames[i], labels[i] and
+    options[i]. An entry costs one slot in each list and no object of its
+    own, which matters on MicroPython: it ignores __slots__, so a record
+    object per entry would carry its own attribute dict.
+    
+    Number and pattern displays are compiled to a Matrix in frames[i] when
+    the entry is added, so showing it needs no parsing or cache lookup.
+    Indexing returns a MenuItem view of an entry.
+    """
+    
+    def __init__(self):
+        self.displays = []
+        self.functions = []
+        self.frames = []
+        self.labels = []
+        self.options = []
+    
+    def append(self, display: Union[int, str, list[str], bytes], function,
+               label: Optional[str] = None, options: Optional[dict] = None):
+        """
+        Add an entry at the end.
+        
+        Args:
+            display: The number/char/pattern to display for this item.
+            function: The function to execute when this item is selected,
+                      or the Menu it opens.
+            label: Optional name of the item, used when printing the menu.
+            options: Optional dict of per-item settings, or None.
+        """
+        if isinstance(display, int):
+            frame = pix_display.number_frame(display)
+        elif isinstance(display, (list, bytes)):
+            frame = pix_display.compile_pattern(display)
+        else:
+            frame = None
+        self.displays.append(display)
+        self.functions.append(function)
+        self.frames.append(frame)
+        self.labels.append(label)
+        self.options.append(options)
+    
+    def clear(self):
+        """Remove all entries."""
+        self.displays.clear()
+        self.functions.clear()
+        self.frames.clear()
+        self.labels.clear()
+        self.options.clear()
+    
+    def __len__(self):
+        """Return the number of entries."""
+        return len(self.displays)
+    
+    def __getitem__(self, index: int):
+        """Return a MenuItem view of an entry."""
+        if index < 0:
+            index += len(self.displays)
+        if index < 0 or index >= len(self.displays):
+            raise IndexError("menu item index out of range")
+        return MenuItem(self, index)
+    
+    def __iter__(self):
+        for index in range(len(self.displays)):
+            yield MenuItem(self, index)
+
+
+class MenuItem:
+    """
+    A view of one entry of a MenuItems table.
+    
+    The entry's values are read from the table, so the view is only a
+    reference and stays valid while the entry exists. For compatibility with
+    older code, item['display'] and item['function'] also work.
+    """
+    
+    def __init__(self, items: MenuItems, index: int):
+        self.items = items
+        self.index = index
+    
+    @property
+    def display(self):
+        """The number/char/pattern displayed for the item."""
+        return self.items.displays[self.index]
+    
+    @property
+    def function(self):
+        """The function run by the item, or the Menu it opens."""
+        return self.items.functions[self.index]
+    
+    @property
+    def frame(self):
+        """The compiled Matrix of a number or pattern display, or None."""
+        return self.items.frames[self.index]
+    
+    @property
+    def label(self):
+        """The name of the item, or None."""
+        return self.items.labels[self.index]
+    
+    @property
+    def options(self):
+        """The dict of per-item settings, or None."""
+        return self.items.options[self.index]
+    
+    def option(self, name: str, default=None):
+        """Get a per-item setting, or the default if it is not set."""
+        options = self.options
+        if options is None:
+            return default
+        return options.get(name, default)
+    
+    def name(self) -> str:
+        """Return a short name for reports: the label, or the display value."""
+        label = self.label
+        if label is not None:
+            return label.replace(',', ' ')
+        display = self.display
+        if isinstance(display, (list, bytes)):
+            return 'pattern'
+        return str(display)
+    
+    def __getitem__(self, key: str):
+        """Read 'display' or 'function' like the old dict items."""
+        if key == 'display' or key == 'function':
+            return getattr(self, key)
+        raise KeyError(key)
+    
+    def __str__(self):
+        """Return the display value, followed by the label if set."""
+        display = self.display
+        if isinstance(display, bytes):
+            # Show packed patterns in the string syntax they came from
+            display = pix_display.pattern_rows(display)
+        label = self.label
+        if label is None:
+            return str(display)
+        return f"{display} {label}"
+
+
+class Submenu:
+    """
+    The items of a submenu, created with Menu.add_submenu().
+    
+    A submenu is navigated by the menu that opens it, which swaps in its
+    `menu_items` table. So a submenu keeps only that table and a reference
+    to the menu for add_item(), and no button input, display or run log of
+    its own. It always opens at its first item.
+    """
+    
+    def __init__(self, menu):
+        self.menu = menu
+        self.menu_items = MenuItems()
+    
+    def add_item(self, display: Union[int, str, list[str], bytes], function,
+                 label: Optional[str] = None, **options):
+        """Add an item to the submenu. See Menu.add_item()."""
+        return self.menu._add_item(self.menu_items, display, function, label,
+                                   options)
+    
+    def add_submenu(self, display: Union[int, str, list[str], bytes],
+                    label: Optional[str] = None):
+        """Add an item that opens a submenu of this one."""
+        submenu = Submenu(self.menu)
+        self.add_item(display, submenu, label)
+        return submenu
+    
+    def __len__(self):
+        """Return the number of items."""
+        return len(self.menu_items)
 
 
 class Menu:
@@ -18,9 +263,48 @@ class Menu:
     Press CENTER button to execute the selected function.
     Press BLUETOOTH button to exit the menu.
     
+    An item can open a Submenu, added with add_submenu(). CENTER enters
+    it and holding LEFT goes back up a level. The cursor of every level is
+    kept on a stack, so entering and leaving a submenu only swaps the items
+    being navigated and the cursor of the level above is restored.
+    
+    Button presses are read through a ButtonInput engine, available as the
+    `input` attribute. The display is written through a FrameDisplay, the
+    `display` attribute, which skips frames that are already shown.
+    
+    The button loops run at a fixed period through input.loop, a
+    LoopTimer. When run() or run_sequence() ends, also through the stop
+    button, input.loop.report('menu') prints their mean and worst interval
+    as an '@loop' line.
+    
+    Every item run is recorded in `run_log`, a RunLog with the duration,
+    exit reason and free memory of recent runs. Call menu.run_log.dump() to
+    print it. Set run_log to None to turn this off.
+    
+    Heap use of navigation, rendering and item runs is measured when
+    `profiler` is a MemProfiler. Menus created after mem_profile.enable()
+    get one; call menu.profiler.dump() to print the numbers.
+    
+    Every run gets a CancelToken, available as the `token` attribute while
+    the item runs. Items added with token=True receive it as a second
+    argument and can check it to stop cleanly. A deadline (in ms) needs
+    token=True here: a blocking item can only be cancelled at its next
+    token.check() or token.wait(), which raises Cancelled once the deadline
+    has passed. Functions registered with add_cleanup() run after every
+    item, however it ended, to stop motors and lights.
+    
+    The run_log records the stop latency of cancelled runs: the time from
+    the CENTER press or the deadline to the end of cleanup. The press time
+    is known when the item saw it in token.check() or token.wait(). For
+    other items it is taken when the stop reaches the menu, so put motor
+    stops in cleanup callbacks rather than in the item's own finally.
+    
     Note: The stop button is set to BLUETOOTH to allow CENTER button to be used for menu selection.
     """
     
+    # Blocking items only stop for a deadline at token.check()
+    _deadline_needs_token = True
+    
     def __init__(self, hub: Optional[PrimeHub]=None):
         """
         Initialize the menu system.
@@ -29,28 +313,135 @@ class Menu:
             hub: PrimeHub instance. If None, creates a new instance.
         """
         self.hub = hub if hub is not None else PrimeHub()
-        self.menu_items = []
+        self.input = ButtonInput(self.hub)
+        self.display = pix_display.FrameDisplay(self.hub.display)
+        self.animator = pix_display.Animator(self.display, max_fps=25)
+        self.run_log = RunLog()
+        self.profiler = mem_profile.profiler
+        self.cleanup_callbacks = []
+        self.token = None
+        # True from _run_started() to _run_finished()
+        self._running = False
+        self.menu_items = MenuItems()
         self.current_index = 0
+        # (items, cursor) of every level above the one being navigated
+        self._levels = []
+        # True while LEFT is held in a submenu and has not acted yet
+        self._left_held = False
     
-    def add_item(self, display: Union[int, str, list[str]], function):
+    def add_item(self, display: Union[int, str, list[str], bytes], function,
+                 label: Optional[str] = None, **options):
         """
         Add a menu item to the menu.
         
         Args:
             display: The number/char/pattern to display for this menu item.
             function: The function to execute when this item is selected.
+                      A 'module:function' string or a LazyFunction is
+                      imported the first time the item runs. A Submenu is
+                      opened as a submenu.
+            label: Optional name of the item, used when printing the menu.
+            options: Per-item settings, stored with the item. The menu
+                     uses token=True to pass the item its CancelToken, and
+                     deadline=ms to cancel the item after that time. In a
+                     blocking Menu a deadline needs token=True.
+        
+        Returns:
+            MenuItem: The new item.
         """
+        return self._add_item(self.menu_items, display, function, label,
+                              options)
+    
+    def _add_item(self, items: MenuItems, display, function, label, options):
+        """Check an item and add it to a table of this menu or a submenu."""
         if isinstance(display, int):
             if display < 0 or display > 99:
                 raise ValueError("Menu item number must be between 0 and 99")
         
-        self.menu_items.append({
-            'display': display,
-            'function': function
-        })
+        if (options.get('deadline') is not None and not options.get('token')
+                and self._deadline_needs_token):
+            raise ValueError("A deadline needs token=True: blocking items "
+                             "are only cancelled at token.check()")
+        
+        if isinstance(function, str):
+            function = LazyFunction.parse(function)
+        
+        items.append(display, function, label, options or None)
+        return MenuItem(items, len(items) - 1)
+    
+    def add_submenu(self, display: Union[int, str, list[str], bytes],
+                    label: Optional[str] = None):
+        """
+        Add an item that opens a submenu.
+        
+        Args:
+            display: The number/char/pattern to display for this menu item.
+            label: Optional name of the item, used when printing the menu.
+        
+        Returns:
+            Submenu: The submenu, to add items to.
+        """
+        submenu = Submenu(self)
+        self.add_item(display, submenu, label)
+        return submenu
+    
+    @property
+    def depth(self) -> int:
+        """Number of submenus entered, 0 at the top level."""
+        return len(self._levels)
+    
+    def enter(self) -> bool:
+        """
+        Open the submenu of the current item.
+        
+        Returns:
+            bool: True if the item has a submenu, which is now shown.
+        """
+        if not self.menu_items:
+            return False
+        submenu = self.menu_items.functions[self.current_index]
+        if not isinstance(submenu, Submenu):
+            return False
+        self._left_held = False
+        self._levels.append((self.menu_items, self.current_index))
+        self.menu_items = submenu.menu_items
+        self.current_index = 0
+        self._display_current_item()
+        return True
+    
+    def leave(self) -> bool:
+        """
+        Go back to the level above, with its cursor where it was.
+        
+        Returns:
+            bool: False if already at the top level.
+        """
+        if not self._levels:
+            return False
+        self.menu_items, self.current_index = self._levels.pop()
+        self._display_current_item()
+        return True
+    
+    def _leave_all(self):
+        """Go back to the top level without redrawing."""
+        if self._levels:
+            self.menu_items, self.current_index = self._levels[0]
+            self._levels.clear()
+        
+    def add_cleanup(self, callback):
+        """
+        Register a function to call after every item run, for example one
+        that stops all motors.
         
+        Returns:
+            The callback, so this can be used as a decorator.
+        """
+        self.cleanup_callbacks.append(callback)
+        return callback
+    
     def clear_items(self):
         """Remove all menu items."""
+        self._leave_all()
         self.menu_items.clear()
         self.current_index = 0
     
@@ -59,7 +450,7 @@ class Menu:
         Get the currently selected menu item.
         
         Returns:
-            dict: The current menu item, or None if no items exist.
+            MenuItem: The current menu item, or None if no items exist.
         """
         if not self.menu_items:
             return None
@@ -67,39 +458,170 @@ class Menu:
     
     def _display_current_item(self):
         """Display the number for the currently selected menu item."""
-        if not self.menu_items:
-            self.hub.display.char('?')
-            return
-        
-        current_item = self.get_current_item()
-        if current_item is None:
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.start(mem_profile.RENDER)
+        self.animator.stop()
+        # Read the tables directly: no MenuItem view on this hot path
+        items = self.menu_items
+        if not items:
+            self.display.char('?')
+        else:
+            frame = items.frames[self.current_index]
+            if frame is not None:
+                self.display.icon(frame)
+            else:
+                self.display.show(items.displays[self.current_index])
+        if profiler is not None:
+            profiler.stop()
+    
+    def _run_started(self, item: MenuItem):
+        """Instrumentation hook called right before an item runs."""
+        self._running = True
+        if self.run_log is not None:
+            self.run_log.start(self.current_index, item.name())
+        if self.profiler is not None:
+            self.profiler.start(mem_profile.RUN + '/' + item.name())
+    
+    def _run_finished(self, reason: str, stop_ms: Optional[int] = None):
+        """
+        Instrumentation hook called when an item stops running. Does nothing
+        if the run was stopped before _run_started().
+        """
+        if not self._running:
             return
-        pix_display.display_content(self.hub, current_item['display'])
+        self._running = False
+        if self.profiler is not None:
+            self.profiler.stop()
+        if self.run_log is not None:
+            self.run_log.finish(reason, stop_ms)
+    
+    def _new_token(self, item: MenuItem, poll=None) -> CancelToken:
+        """Create the token for a run, with the menu's cleanup registered."""
+        token = CancelToken(item.option('deadline'), poll, self.input.clock)
+        for callback in self.cleanup_callbacks:
+            token.on_cleanup(callback)
+        self.token = token
+        return token
+    
+    def _item_args(self, item: MenuItem, token: CancelToken) -> tuple:
+        """Get the arguments an item function is called with."""
+        return (self.hub, token) if item.option('token') else (self.hub,)
+    
+    def _center_pressed(self) -> bool:
+        return Button.CENTER in self.hub.buttons.pressed()
+    
+    def _cleanup(self, token: CancelToken, error: bool = False):
+        """Run the cleanup of a run. Errors are dropped if one is pending."""
+        try:
+            token.cleanup()
+        except Exception:
+            if not error:
+                raise
+        finally:
+            self.token = None
+    
+    def _update_animation(self):
+        """Advance a playing animation and show the menu when it ends."""
+        if self.animator.running and not self.animator.update():
+            self._display_current_item()
     
     def _wait_for_release(self, button):
         """Wait until the given button is released."""
-        while button in self.hub.buttons.pressed():
-            wait(10)
+        self.input.wait_release(button)
+    
+    def _warm(self, item: MenuItem):
+        """Prefetch an item: import a lazy function."""
+        if isinstance(item.function, LazyFunction):
+            item.function.resolve()
+    
+    def select_value(self, selector: pix_display.ValueSelector,
+                     value: Optional[int] = None) -> int:
+        """
+        Let the operator pick a value from inside a running item.
+        
+        While an item runs, CENTER is the stop button. It is moved to
+        BLUETOOTH while the selector is shown, so CENTER confirms the value
+        instead of stopping the item.
+        
+        Args:
+            selector: The ValueSelector to show. Create it once, so its
+                      frames are only looked up once.
+            value: Value to start at. If None, the last value is kept.
+        
+        Returns:
+            int: The chosen value.
+        """
+        self.hub.system.set_stop_button(Button.BLUETOOTH)
+        try:
+            return selector.select(value)
+        finally:
+            if self.token is not None:
+                self.hub.system.set_stop_button(Button.CENTER)
+    
+    def _wait_for_launch(self, delay: Optional[int]):
+        """
+        Wait for a button that controls the sequence.
+        
+        Args:
+            delay: Time in ms after which to give up, or None to wait forever.
+        
+        Returns:
+            The button pressed (CENTER, LEFT, RIGHT or BLUETOOTH), or None if
+            the delay ran out.
+        """
+        self.input.sync()
+        clock = self.input.clock
+        end = None if delay is None else clock() + delay
+        while True:
+            self._update_animation()
+            timeout = self.animator.time_to_next()
+            if end is not None:
+                left = end - clock()
+                if left <= 0:
+                    return None
+                if timeout is None or left < timeout:
+                    timeout = left
+            event = self.input.wait_event(timeout)
+            if event is not None and event[0] == PRESS:
+                return event[1]
 
     def _navigate_left(self):
         """Navigate to the previous menu item."""
         if self.menu_items:
+            profiler = self.profiler
+            if profiler is not None:
+                profiler.start(mem_profile.NAVIGATE)
             self.current_index = (self.current_index - 1) % len(self.menu_items)
             self._display_current_item()
+            if profiler is not None:
+                profiler.stop()
     
     def _navigate_right(self):
         """Navigate to the next menu item."""
         if self.menu_items:
+            profiler = self.profiler
+            if profiler is not None:
+                profiler.start(mem_profile.NAVIGATE)
             self.current_index = (self.current_index + 1) % len(self.menu_items)
             self._display_current_item()
+            if profiler is not None:
+                profiler.stop()
     
     def _execute_current_function(self, auto_increment):
-        """Execute the function associated with the current menu item."""
+        """
+        Execute the function associated with the current menu item.
+        
+        Returns:
+            str: How the run ended (COMPLETED, STOPPED or TIMEOUT), or None
+                 if there was nothing to run. Errors are raised.
+        """
         current_item = self.get_current_item()
-        if current_item and current_item['function']:
+        if current_item and current_item.function:
+            token = self._new_token(current_item, self._center_pressed)
             try:
                 # Show a brief confirmation that function is executing
-                self.hub.display.icon(Icon.TRUE)
+                self.display.icon(Icon.TRUE)
                 
                 # Wait for CENTER release before making it the stop button
                 self._wait_for_release(Button.CENTER)
@@ -107,22 +629,40 @@ class Menu:
                 # Set stop button to CENTER so it can interrupt the running function
                 self.hub.system.set_stop_button(Button.CENTER)
                 
-                # Execute the function, passing the hub
-                current_item['function'](self.hub)
+                # Execute the function, passing the hub. It may draw on the
+                # display itself, so the last frame shown is unknown after.
+                self.display.invalidate()
+                self._run_started(current_item)
+                # Count the deadline from here, not from the CENTER press
+                token.set_deadline(current_item.option('deadline'))
+                current_item.function(*self._item_args(current_item, token))
+                self._cleanup(token)
+                self._run_finished(COMPLETED)
                             
                 # Return to displaying the current number
                 if auto_increment:
                     self._navigate_right()
                 self._display_current_item()
+                return COMPLETED
                 
-            except SystemExit:
-                # CENTER was pressed to stop the running function
+            except (SystemExit, Cancelled):
+                # CENTER was pressed (SystemExit from the stop button, or
+                # seen by token.check()) or the deadline passed
+                token.cancel(STOPPED)
+                self.hub.system.set_stop_button(Button.BLUETOOTH)
+                self._cleanup(token)
+                self._run_finished(token.reason, token.stop_latency)
                 # Silence the speaker in case it was mid-beep
                 self.hub.speaker.beep(1, 1)
-                self._wait_for_release(Button.CENTER)
+                if token.reason == STOPPED:
+                    self._wait_for_release(Button.CENTER)
                 self._display_current_item()
+                return token.reason
                 
             except Exception as e:
+                self.hub.system.set_stop_button(Button.BLUETOOTH)
+                self._cleanup(token, error=True)
+                self._run_finished(ERROR)
                 # Show error indicator
                 self.hub.light.blink(Color.RED, [500, 500])
                 wait(1000)
@@ -134,6 +674,28 @@ class Menu:
                 # Restore stop button to BLUETOOTH for the menu
                 self.hub.system.set_stop_button(Button.BLUETOOTH)
     
+    def _left_event(self, kind: int):
+        """
+        Handle a LEFT event: a press moves to the previous item, holding
+        leaves a submenu.
+        
+        In a submenu the move waits for a release that comes before the long
+        press, so holding LEFT to go back does not also move the cursor of
+        the submenu. At the top level, where holding does nothing, the
+        press moves straight away.
+        """
+        if kind == PRESS:
+            if self._levels:
+                self._left_held = True
+            else:
+                self._navigate_left()
+        elif self._left_held:
+            self._left_held = False
+            if kind == LONG_PRESS:
+                self.leave()
+            elif kind == RELEASE:
+                self._navigate_left()
+    
     def run(self, show_startup=False, auto_increment=False):
         """
         Run the menu system. This is the main loop that handles user input.
@@ -146,54 +708,166 @@ class Menu:
             bool: True if menu exited normally, False if no menu items exist.
         
         Controls:
-            - LEFT: Navigate to previous menu item
+            - LEFT: Navigate to previous menu item (in a submenu, on release)
             - RIGHT: Navigate to next menu item  
-            - CENTER: Execute the selected function
+            - CENTER: Execute the selected function, or open its submenu
+            - LEFT (hold): Go back from a submenu
             - BLUETOOTH: Exit menu (also stops the program)
         """
         # Set the stop button to BLUETOOTH so CENTER can be used for selection
         self.hub.system.set_stop_button(Button.BLUETOOTH)
         
         if not self.menu_items:
-            self.hub.display.char('?')
+            self.display.char('?')
             wait(1000)
             return False
         
         if show_startup:
-            # Show startup indicator
-            self.hub.display.char('M')
-            wait(500)
+            # Show startup indicator, then the initial menu item
+            self.animator.play(STARTUP_ANIMATION)
+        else:
+            # Display the initial menu item
+            self._display_current_item()
         
-        # Display the initial menu item
-        self._display_current_item()
+        # Ignore buttons that were already held when the menu started
+        self.input.sync()
         
-        while True:
-            pressed_buttons = self.hub.buttons.pressed()
-            
-            if pressed_buttons:
-                if Button.LEFT in pressed_buttons:
-                    self._navigate_left()
-                    self._wait_for_release(Button.LEFT)
+        try:
+            while True:
+                self._update_animation()
+                event = self.input.wait_event(self.animator.time_to_next())
+                if event is None:
+                    continue
+                kind, button = event
+                if button == Button.LEFT:
+                    self._left_event(kind)
+                    continue
+                if kind != PRESS:
+                    continue
                 
-                elif Button.RIGHT in pressed_buttons:
+                if button == Button.RIGHT:
                     self._navigate_right()
-                    self._wait_for_release(Button.RIGHT)
                 
-                elif Button.CENTER in pressed_buttons:
+                elif button == Button.CENTER:
+                    if self.enter():
+                        continue
                     print("Running with auto_increment =", auto_increment)
                     self._execute_current_function(auto_increment)
-                    self._wait_for_release(Button.CENTER)
+                    # Buttons still held after the run must not count as presses
+                    self.input.sync()
                     print("moving on")
                 
-                elif Button.BLUETOOTH in pressed_buttons:
+                elif button == Button.BLUETOOTH:
                     # Exit the menu
-                    self.hub.display.char('X')
-                    wait(300)
-                    self.hub.display.off()
-                    self._wait_for_release(Button.BLUETOOTH)
+                    self._leave_all()
+                    self._exit()
                     return True
-            
-            wait(10)
+        finally:
+            # Also runs when the stop button ends the program
+            self.input.loop.report('menu')
+    
+    def _exit(self):
+        """Show that the menu is closing and wait for BLUETOOTH release."""
+        self.display.char('X')
+        wait(300)
+        self.display.off()
+        self._wait_for_release(Button.BLUETOOTH)
+    
+    def _check_plan(self, plan: Optional[RunPlan]) -> RunPlan:
+        """Get the plan to run, checked against the top level items."""
+        if plan is None:
+            plan = RunPlan()
+            for index, function in enumerate(self.menu_items.functions):
+                if not isinstance(function, Submenu):
+                    plan.add(index)
+            return plan
+        plan.compile(len(self.menu_items))
+        for step in plan.steps:
+            if isinstance(self.menu_items.functions[step.index], Submenu):
+                raise ValueError("Step " + str(step) + " opens a submenu")
+        return plan
+    
+    def run_sequence(self, plan: Optional[RunPlan] = None,
+                     show_startup: bool = False) -> list:
+        """
+        Run the menu items in the order of a RunPlan.
+        
+        Before each step, its item is shown and prefetched (a lazy function
+        is imported) while the robot is being repositioned, so the mission
+        starts as soon as it is launched. Item indexes are those of the top
+        level of the menu.
+        
+        Args:
+            plan: The plan to follow. If None, every item runs once in
+                  order, except items that open a submenu.
+            show_startup: If True, shows a startup indicator before beginning.
+        
+        Returns:
+            list: An (item index, result) pair for every step that ran or
+                  was skipped, in order.
+        
+        Raises:
+            ValueError: A step refers to an item that does not exist or
+                        that opens a submenu. This is checked before the
+                        first step runs.
+        
+        Controls between missions:
+            - CENTER: Start the mission shown
+            - RIGHT: Skip it
+            - LEFT: Go back to the step before
+            - BLUETOOTH: End the sequence (also stops the program)
+        """
+        self.hub.system.set_stop_button(Button.BLUETOOTH)
+        self._leave_all()
+        plan = self._check_plan(plan)
+        if show_startup:
+            self.animator.play(STARTUP_ANIMATION)
+        
+        try:
+            results = []
+            history = []
+            position = plan.start()
+            runs = 0
+            while position is not None:
+                step = plan.steps[position]
+                result = SKIPPED
+                if not step.skip:
+                    self.current_index = step.index
+                    self._warm(self.get_current_item())
+                    if not self.animator.running:
+                        self._display_current_item()
+                    
+                    button = self._wait_for_launch(step.delay)
+                    if button == Button.BLUETOOTH:
+                        self._exit()
+                        break
+                    if button == Button.LEFT:
+                        if history:
+                            position = history.pop()
+                            runs = 0
+                        continue
+                    if button == Button.CENTER or button is None:
+                        try:
+                            result = self._execute_current_function(False)
+                        except Exception as e:
+                            # Keep going with the rest of the run
+                            print("Error in", self.get_current_item().name(), e)
+                            result = ERROR
+                        runs += 1
+                        if result == COMPLETED and runs < step.repeat:
+                            results.append((step.index, result))
+                            continue
+                    elif button != Button.RIGHT:
+                        continue
+                
+                results.append((step.index, result))
+                history.append(position)
+                position = plan.next(position, result)
+                runs = 0
+            return results
+        finally:
+            # Also runs when the stop button ends the program
+            self.input.loop.report('menu')
     
     def __len__(self):
         """Return the number of menu items."""
@@ -207,46 +881,348 @@ class Menu:
         items_str = []
         for i, item in enumerate(self.menu_items):
             marker = ">" if i == self.current_index else " "
-            items_str.append(f"{marker} {item['display']}")
+            items_str.append(f"{marker} {item}")
         
         return f"Menu ({len(self.menu_items)} items):\n" + "\n".join(items_str)
 
 
-# Example usage and demo functions
-def demo_function_1(hub):
-    """Demo function 1 - could be anything you want to execute."""
-    print("Executing function 1!")
-    hub.speaker.beep(440, 500)  # Beep at 440Hz for 500ms
-
-def demo_function_2(hub):
-    """Demo function 2 - could be anything you want to execute."""
-    print("Executing function 2!")
-    hub.speaker.beep(880, 300)  # Higher pitch beep
-
-def demo_function_3(hub):
-    """Demo function 3 - could be anything you want to execute."""
-    print("Executing function 3! Press center button to stop.")
-    offset = 0
-    while True:
-        offset ^= 1
-        hub.speaker.beep(220 + (offset * 20), 700)
+class AsyncMenu(Menu):
+    """
+    A Menu whose items are coroutines, run with the Pybricks task scheduler.
+    
+    Items are added with add_item() as usual, but the function must be an
+    `async def` function taking the hub. While an item runs, the menu keeps
+    reading the buttons and animating the display as concurrent tasks.
+    Pressing CENTER, or reaching the item's deadline, cancels the item
+    cooperatively at its next `await`, so the stop button stays on BLUETOOTH
+    the whole time. Cleanup runs right after.
+    
+    Plain functions must not be used as items: inside run_task, Pybricks
+    methods such as wait() return awaitables instead of blocking.
+    
+    Example:
+        async def drive_square(hub):
+            for _ in range(4):
+                await drive_base.straight(200)
+                await drive_base.turn(90)
+        
+        menu = AsyncMenu(hub)
+        menu.add_item(1, drive_square)
+        menu.run()
+    """
+    
+    async def _wait_event(self):
+        """Sample the buttons until an event is available."""
+        loop = self.input.loop
+        loop.start()
+        while True:
+            self._update_animation()
+            self.input.sample()
+            event = self.input.get()
+            if event is not None:
+                return event
+            await loop.wait_async()
+    
+    async def _wait_for_release_async(self, button):
+        """Wait until the given button is released."""
+        loop = self.input.loop
+        loop.start()
+        self.input.sample()
+        while self.input.is_pressed(button):
+            await loop.wait_async()
+            self.input.sample()
+    
+    # Every item is cancelled at its deadline by a concurrent task
+    _deadline_needs_token = False
+    
+    # True while select_value_async() shows a selector
+    _selecting = False
+    
+    async def _watch_for_stop(self, token: CancelToken):
+        """Cancel the token and return as soon as CENTER is pressed."""
+        while True:
+            kind, button = await self._wait_event()
+            if (kind == PRESS and button == Button.CENTER
+                    and not self._selecting):
+                token.cancel(STOPPED, self.input.changed_at(Button.CENTER))
+                return
+    
+    async def select_value_async(self, selector: pix_display.ValueSelector,
+                                 value: Optional[int] = None) -> int:
+        """
+        Coroutine version of select_value(). CENTER does not cancel the
+        running item while the selector is shown, and the running animation
+        is paused so it does not draw over the value.
+        """
+        self._selecting = True
+        self.animator.stop()
+        try:
+            return await selector.select_async(value)
+        finally:
+            self._selecting = False
+            # The selector drew on the display behind our FrameDisplay
+            self.display.invalidate()
+            self.animator.play(RUNNING_ANIMATION)
+    
+    async def _watch_deadline(self, token: CancelToken):
+        """Cancel the token and return when its deadline passes."""
+        await wait(token.remaining())
+        token.cancel(TIMEOUT)
+    
+    async def _show_running(self):
+        """
+        Pulse the confirmation icon while an item runs. This task never
+        ends on its own; while select_value_async() has the animation
+        stopped it only waits.
+        """
+        self.animator.play(RUNNING_ANIMATION)
+        while True:
+            if self.animator.update():
+                await wait(self.animator.time_to_next())
+            else:
+                await wait(self.input.period)
+    
+    async def _run_item(self, coroutine, state):
+        """Run an item and record that it finished on its own."""
+        await coroutine
+        state[0] = True
+    
+    async def _execute_current_function_async(self, auto_increment):
+        """
+        Run the current item until it finishes or is cancelled.
+        
+        Returns:
+            str: How the run ended, as _execute_current_function() does.
+        """
+        current_item = self.get_current_item()
+        if not current_item or not current_item.function:
+            return None
+        
+        self.display.icon(Icon.TRUE)
+        await self._wait_for_release_async(Button.CENTER)
+        self.input.sync()
+        
+        completed = [False]
+        token = self._new_token(current_item)
+        tasks = [
+            self._run_item(
+                current_item.function(*self._item_args(current_item, token)),
+                completed),
+            self._watch_for_stop(token),
+            self._show_running(),
+        ]
+        if token.deadline is not None:
+            tasks.append(self._watch_deadline(token))
+        
+        self._run_started(current_item)
+        try:
+            await multitask(*tasks, race=True)
+        except Cancelled:
+            # The item saw the token cancelled and stopped itself
+            pass
+        except Exception:
+            self._cleanup(token, error=True)
+            self._run_finished(ERROR)
+            self.display.invalidate()
+            # Show error indicator
+            self.hub.light.blink(Color.RED, [500, 500])
+            await wait(1000)
+            self._display_current_item()
+            raise
+        
+        self._cleanup(token)
+        if completed[0]:
+            self._run_finished(COMPLETED)
+        else:
+            self._run_finished(token.reason or STOPPED, token.stop_latency)
+        
+        # The item may have drawn on the display itself
+        self.display.invalidate()
+        if completed[0]:
+            if auto_increment:
+                self._navigate_right()
+        elif token.reason == STOPPED:
+            # CENTER was pressed to cancel the item
+            await self._wait_for_release_async(Button.CENTER)
+        self._display_current_item()
+        return COMPLETED if completed[0] else token.reason or STOPPED
+    
+    async def run_async(self, show_startup=False, auto_increment=False):
+        """
+        Coroutine version of run(), for use inside an existing run_task().
+        
+        Takes the same arguments and returns the same values as run().
+        """
+        self.hub.system.set_stop_button(Button.BLUETOOTH)
+        
+        if not self.menu_items:
+            self.display.char('?')
+            await wait(1000)
+            return False
+        
+        if show_startup:
+            self.animator.play(STARTUP_ANIMATION)
+        else:
+            self._display_current_item()
+        self.input.sync()
+        
+        try:
+            while True:
+                kind, button = await self._wait_event()
+                if button == Button.LEFT:
+                    self._left_event(kind)
+                    continue
+                if kind != PRESS:
+                    continue
+                
+                if button == Button.RIGHT:
+                    self._navigate_right()
+                
+                elif button == Button.CENTER:
+                    if self.enter():
+                        continue
+                    await self._execute_current_function_async(auto_increment)
+                    self.input.sync()
+                
+                elif button == Button.BLUETOOTH:
+                    self._leave_all()
+                    self.display.char('X')
+                    await wait(300)
+                    self.display.off()
+                    await self._wait_for_release_async(Button.BLUETOOTH)
+                    return True
+        finally:
+            # Also runs when the stop button ends the program
+            self.input.loop.report('menu')
+    
+    def run(self, show_startup=False, auto_increment=False):
+        """
+        Run the menu with run_task(). See Menu.run() for the controls.
+        
+        Returns:
+            bool: True if menu exited normally, False if no menu items exist.
+        """
+        result = [False]
+        
+        async def main():
+            result[0] = await self.run_async(show_startup, auto_increment)
+        
+        run_task(main())
+        return result[0]
+    
+    async def _wait_for_launch_async(self, delay: Optional[int]):
+        """Coroutine version of Menu._wait_for_launch()."""
+        self.input.sync()
+        clock = self.input.clock
+        end = None if delay is None else clock() + delay
+        loop = self.input.loop
+        loop.start()
+        while True:
+            self._update_animation()
+            self.input.sample()
+            event = self.input.get()
+            if event is not None and event[0] == PRESS:
+                return event[1]
+            if end is not None and clock() >= end:
+                return None
+            await loop.wait_async()
+    
+    async def run_sequence_async(self, plan: Optional[RunPlan] = None,
+                                 show_startup: bool = False) -> list:
+        """
+        Coroutine version of run_sequence(), for use inside an existing
+        run_task().
+        
+        Takes the same arguments and returns the same values as
+        Menu.run_sequence().
+        """
+        self.hub.system.set_stop_button(Button.BLUETOOTH)
+        self._leave_all()
+        plan = self._check_plan(plan)
+        if show_startup:
+            self.animator.play(STARTUP_ANIMATION)
+        
+        try:
+            results = []
+            history = []
+            position = plan.start()
+            runs = 0
+            while position is not None:
+                step = plan.steps[position]
+                result = SKIPPED
+                if not step.skip:
+                    self.current_index = step.index
+                    self._warm(self.get_current_item())
+                    if not self.animator.running:
+                        self._display_current_item()
+                    
+                    button = await self._wait_for_launch_async(step.delay)
+                    if button == Button.BLUETOOTH:
+                        self.display.char('X')
+                        await wait(300)
+                        self.display.off()
+                        await self._wait_for_release_async(Button.BLUETOOTH)
+                        break
+                    if button == Button.LEFT:
+                        if history:
+                            position = history.pop()
+                            runs = 0
+                        continue
+                    if button == Button.CENTER or button is None:
+                        try:
+                            result = await self._execute_current_function_async(
+                                False)
+                        except Exception as e:
+                            # Keep going with the rest of the run
+                            print("Error in", self.get_current_item().name(), e)
+                            result = ERROR
+                        runs += 1
+                        if result == COMPLETED and runs < step.repeat:
+                            results.append((step.index, result))
+                            continue
+                    elif button != Button.RIGHT:
+                        continue
+                
+                results.append((step.index, result))
+                history.append(position)
+                position = plan.next(position, result)
+                runs = 0
+            return results
+        finally:
+            # Also runs when the stop button ends the program
+            self.input.loop.report('menu')
+    
+    def run_sequence(self, plan: Optional[RunPlan] = None,
+                     show_startup: bool = False) -> list:
+        """Run run_sequence_async() with run_task(). See Menu.run_sequence()."""
+        result = [None]
+        
+        async def main():
+            result[0] = await self.run_sequence_async(plan, show_startup)
+        
+        run_task(main())
+        return result[0]
 
 
 if __name__ == "__main__":
-    # Demo of how to use the Menu class
+    # Demo of how to use the Menu class, with the missions of
+    # menu_manager.py
+    from missions import demo_1, demo_2, demo_3
+    
     hub = PrimeHub()
     menu = Menu(hub)
     
     # Add some demo menu items
-    menu.add_item(1, demo_function_1)
-    menu.add_item('A', demo_function_2) 
-    menu.add_item([
+    menu.add_item(1, demo_1.run)
+    menu.add_item('A', demo_2.run)
+    # Packed once at load time, so the item keeps 13 bytes instead of a list
+    menu.add_item(pix_display.pack_pattern([
             "  8  ",
             " 898 ",
             "86#68",
             "6 # 6",
             "  #  "
-        ], demo_function_3)
+        ]), demo_3.run)
     
     print("Starting menu demo...")
     print(menu)
@@ -11,15 +11,13 @@ from pybricks.tools import wait
 from menu import Menu
 
 
-def beep_function():
+def beep_function(hub):
     """Function that makes the hub beep."""
-    hub = PrimeHub()
     hub.speaker.beep(440, 200)  # Beep at 440Hz for 200ms
 
 
-def light_show():
+def light_show(hub):
     """Function that creates a light pattern on the hub."""
-    hub = PrimeHub()
     # Create a simple light animation
     for i in range(3):
         for color in [Color.RED, Color.GREEN, Color.BLUE, Color.YELLOW]:
@@ -28,7 +26,7 @@ def light_show():
     hub.light.off()
 
 
-def motor_demo():
+def motor_demo(hub):
     """Function that runs a motor if one is connected to Port A."""
     try:
         motor = Motor(Port.A)
@@ -36,14 +34,12 @@ def motor_demo():
         motor.stop()
     except:
         # If no motor is connected, just beep instead
-        hub = PrimeHub()
         hub.speaker.beep(200, 100)  # Lower pitch beep to indicate no motor
 
 
-def countdown_demo():
+def countdown_demo(hub):
     """Function that shows a countdown on the display."""
     from pix_display import display_number
-    hub = PrimeHub()
     
     for i in range(5, 0, -1):
         display_number(hub, i)
@@ -65,6 +61,9 @@ def main():
     menu.add_item(3, motor_demo, "Motor Demo")
     menu.add_item(5, countdown_demo, "Countdown")
     
+    # Runs after every item, also when one is stopped halfway
+    menu.add_cleanup(hub.light.off)
+    
     # Print menu info for debugging (won't show on hub, but useful in IDE)
     print("Menu created with the following items:")
     print(menu)
@@ -1,10 +1,17 @@
-from menu import Menu, demo_function_1, demo_function_2, demo_function_3
+from menu import Menu
+
+
+def _upload():
+    # Never called: pybricksdev only uploads modules it sees imported
+    import missions.demo_1, missions.demo_2, missions.demo_3
+
 
 if __name__ == "__main__":
     menu = Menu()
     
-    menu.add_item(1, demo_function_1)
-    menu.add_item(5, demo_function_2) 
-    menu.add_item(10, demo_function_3)
+    # Missions are imported the first time they run
+    menu.add_item(1, "missions.demo_1")
+    menu.add_item(5, "missions.demo_2")
+    menu.add_item(10, "missions.demo_3")
     
     menu.run(auto_increment=True)
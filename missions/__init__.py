@@ -0,0 +1,6 @@
+"""
+Missions run from menu_manager.py.
+
+Each module has a run(hub) function. The menu imports a mission the first
+time it runs, so keep module level code in these files cheap.
+"""
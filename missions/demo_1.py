@@ -0,0 +1,6 @@
+"""Demo mission 1 - could be anything you want to execute."""
+
+
+def run(hub):
+    print("Executing mission 1!")
+    hub.speaker.beep(440, 500)  # Beep at 440Hz for 500ms
@@ -0,0 +1,6 @@
+"""Demo mission 2 - could be anything you want to execute."""
+
+
+def run(hub):
+    print("Executing mission 2!")
+    hub.speaker.beep(880, 300)  # Higher pitch beep
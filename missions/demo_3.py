@@ -0,0 +1,9 @@
+"""Demo mission 3 - could be anything you want to execute."""
+
+
+def run(hub):
+    print("Executing mission 3! Press center button to stop.")
+    offset = 0
+    while True:
+        offset ^= 1
+        hub.speaker.beep(220 + (offset * 20), 700)
@@ -0,0 +1,297 @@
+from pybricks.parameters import Stop
+from pybricks.tools import StopWatch, wait
+
+# Move kinds
+STRAIGHT = 'straight'
+TURN = 'turn'
+CURVE = 'curve'
+RUN_ANGLE = 'run_angle'
+PAUSE = 'pause'
+
+# Time in ms between checks of the running moves
+POLL_INTERVAL = 5
+
+
+def _sign(value) -> int:
+    return -1 if value < 0 else 1
+
+
+class MotionPlan:
+    """
+    A list of drive base and motor moves, run as one task.
+
+    Every device has its own queue of moves. The queues run at the same
+    time, so an attachment moves while the robot drives, and sync() makes
+    all of them finish before the moves after it start.
+
+    The plan is compiled once before it first runs. Adjacent moves of a
+    device that go the same way are merged into one (two turns of 90
+    become one turn of 180), and drive moves that continue in the same
+    direction of travel end with Stop.NONE so the robot does not stop in
+    between. A turn in place also ends at speed when a curve that turns
+    the same way follows. Only the last move of a queue holds.
+
+    A running move is started without waiting and the plan checks every
+    POLL_INTERVAL ms which devices are done, so there is no gap between
+    moves of one device beyond that.
+
+    Example:
+        plan = MotionPlan(drive_base)
+        plan.straight(200).turn(90).straight(150)
+        plan.run_angle(arm, 500, 180)
+        plan.sync()
+        plan.straight(-350)
+        plan.run()
+    """
+
+    def __init__(self, drive_base=None):
+        """
+        Initialize the plan.
+
+        Args:
+            drive_base: DriveBase that straight(), turn() and curve() use.
+        """
+        self.drive_base = drive_base
+        self._moves = []
+        self._segments = None
+
+    @classmethod
+    def from_moves(cls, drive_base, moves: list):
+        """
+        Create a plan from a list of tuples, one per move:
+        ('straight', distance), ('turn', angle), ('curve', radius, angle),
+        ('run_angle', motor, speed, angle), ('pause', time[, device]) and
+        ('sync',).
+        """
+        plan = cls(drive_base)
+        for move in moves:
+            getattr(plan, move[0])(*move[1:])
+        return plan
+
+    def _add(self, kind: str, device, a, b=None):
+        if device is None:
+            raise ValueError('The plan has no drive base')
+        self._moves.append((kind, device, a, b))
+        self._segments = None
+        return self
+
+    def straight(self, distance: int):
+        """Drive straight for distance in mm."""
+        return self._add(STRAIGHT, self.drive_base, distance)
+
+    def turn(self, angle: int):
+        """Turn in place by angle in degrees."""
+        return self._add(TURN, self.drive_base, angle)
+
+    def curve(self, radius: int, angle: int):
+        """Drive an arc of the given radius in mm until angle is turned."""
+        return self._add(CURVE, self.drive_base, radius, angle)
+
+    def run_angle(self, motor, speed: int, angle: int):
+        """Run a motor by angle in degrees at speed in deg/s."""
+        return self._add(RUN_ANGLE, motor, speed, angle)
+
+    def pause(self, time: int, device=None):
+        """Keep a device (the drive base if None) still for time in ms."""
+        return self._add(PAUSE, device if device is not None
+                         else self.drive_base, time)
+
+    def sync(self):
+        """Wait for every device to finish before the next moves start."""
+        self._moves.append(None)
+        self._segments = None
+        return self
+
+    @staticmethod
+    def _moves_device(kind: str, a, b) -> bool:
+        """False for moves that do nothing, such as turning by 0."""
+        if kind == PAUSE:
+            return a > 0
+        if kind == RUN_ANGLE or kind == CURVE:
+            return b != 0
+        return a != 0
+
+    @staticmethod
+    def _merge(last: list, kind: str, a, b) -> bool:
+        """Merge a move into the last one of its queue if it can be."""
+        if last[0] != kind:
+            return False
+        if kind == STRAIGHT or kind == TURN or kind == PAUSE:
+            if kind != PAUSE and _sign(last[1]) != _sign(a):
+                return False
+            last[1] += a
+            return True
+        if kind == RUN_ANGLE and last[1] == a and _sign(last[2]) == _sign(b):
+            last[2] += b
+            return True
+        return False
+
+    @staticmethod
+    def _travel(move: list) -> int:
+        """Direction of travel of a drive move, or 0 if it does not move."""
+        if move[0] == STRAIGHT:
+            return _sign(move[1])
+        if move[0] == CURVE:
+            return _sign(move[1]) * _sign(move[2])
+        return 0
+
+    @staticmethod
+    def _rotation(move: list) -> int:
+        """Direction a drive move turns the robot, or 0 if it does not."""
+        if move[0] == TURN:
+            return _sign(move[1])
+        if move[0] == CURVE:
+            return _sign(move[2])
+        return 0
+
+    def _blends(self, move: list, following: list) -> bool:
+        """True if a move can end at speed because the next one continues."""
+        if move[0] == RUN_ANGLE:
+            return (following[0] == RUN_ANGLE
+                    and _sign(move[1]) * _sign(move[2])
+                    == _sign(following[1]) * _sign(following[2]))
+        if move[0] == TURN:
+            # A turn in place keeps turning into a curve the same way
+            return self._rotation(move) == self._rotation(following)
+        travel = self._travel(move)
+        return travel != 0 and travel == self._travel(following)
+
+    def compile(self) -> list:
+        """
+        Merge and blend the moves. Called by run() when the plan changed.
+
+        Returns:
+            list: One list per sync() segment of (device, moves) queues,
+                  where every move is [kind, a, b, then].
+        """
+        segments = []
+        queues = None
+        for move in self._moves + [None]:
+            if move is None:
+                if queues:
+                    segments.append(queues)
+                queues = None
+                continue
+            kind, device, a, b = move
+            if not self._moves_device(kind, a, b):
+                continue
+            if queues is None:
+                queues = []
+            for queue in queues:
+                if queue[0] is device:
+                    break
+            else:
+                queue = (device, [])
+                queues.append(queue)
+            moves = queue[1]
+            if not moves or not self._merge(moves[-1], kind, a, b):
+                moves.append([kind, a, b, Stop.HOLD])
+
+        for queues in segments:
+            for device, moves in queues:
+                for i in range(len(moves) - 1):
+                    if self._blends(moves[i], moves[i + 1]):
+                        moves[i][3] = Stop.NONE
+        self._segments = segments
+        return segments
+
+    @staticmethod
+    def _start(device, move: list, now: int):
+        """
+        Start a move without waiting for it.
+
+        Returns:
+            int: The time a pause ends, or None for device moves.
+        """
+        kind, a, b, then = move
+        if kind == PAUSE:
+            return now + a
+        if kind == STRAIGHT:
+            device.straight(a, then, wait=False)
+        elif kind == TURN:
+            device.turn(a, then, wait=False)
+        elif kind == CURVE:
+            device.curve(a, b, then, wait=False)
+        else:
+            device.run_angle(a, b, then, wait=False)
+        return None
+
+    def _begin(self, segment: list) -> list:
+        """Get the run state of a segment: [device, moves, next, pause end]."""
+        return [[device, moves, 0, None] for device, moves in segment]
+
+    def _poll(self, tracks: list, now: int) -> bool:
+        """
+        Start the next move of every device that is done.
+
+        Returns:
+            bool: True while any device still has moves or is moving.
+        """
+        busy = False
+        for track in tracks:
+            device, moves, index, pause_end = track
+            if pause_end is not None:
+                if now < pause_end:
+                    busy = True
+                    continue
+                track[3] = None
+            elif index and moves[index - 1][0] != PAUSE and not device.done():
+                busy = True
+                continue
+            if index < len(moves):
+                track[3] = self._start(device, moves[index], now)
+                track[2] = index + 1
+                busy = True
+        return busy
+
+    def _stop(self):
+        """Stop every device of the plan."""
+        for segment in self._segments or ():
+            for device, moves in segment:
+                if any(move[0] != PAUSE for move in moves):
+                    device.stop()
+
+    def run(self, token=None):
+        """
+        Run the plan and return when every move is done.
+
+        Args:
+            token: Optional CancelToken, checked between moves. When it is
+                   cancelled every device is stopped and Cancelled raised.
+        """
+        if self._segments is None:
+            self.compile()
+        clock = StopWatch()
+        try:
+            for segment in self._segments:
+                tracks = self._begin(segment)
+                while self._poll(tracks, clock.time()):
+                    if token is not None:
+                        token.check()
+                    wait(POLL_INTERVAL)
+        except BaseException:
+            self._stop()
+            raise
+
+    async def run_async(self, token=None):
+        """Coroutine version of run(), for use inside run_task()."""
+        if self._segments is None:
+            self.compile()
+        clock = StopWatch()
+        try:
+            for segment in self._segments:
+                tracks = self._begin(segment)
+                while self._poll(tracks, clock.time()):
+                    if token is not None:
+                        token.check()
+                    await wait(POLL_INTERVAL)
+        except BaseException:
+            self._stop()
+            raise
+
+    def __len__(self):
+        """Return the number of moves after merging."""
+        if self._segments is None:
+            self.compile()
+        return sum(len(moves) for segment in self._segments
+                   for device, moves in segment)
@@ -1,135 +1,14 @@
 try:
-    from typing import Union
+    from typing import Callable, Optional, Union
 except ImportError:
     pass
 
 from pybricks.hubs import PrimeHub
 from pybricks.parameters import Button, Icon
-from pybricks.tools import Matrix, wait
+from pybricks.tools import Matrix, StopWatch
+from button_input import ButtonInput, PRESS, REPEAT
 
 class Patterns():
-    numbers = [[
-            " ### ",
-            " # # ",
-            " # # ",
-            " # # ",
-            " ### "
-        ], [
-            "  #  ",
-            " ##  ",
-            "  #  ",
-            "  #  ",
-            " ### "
-        ], [
-            " ### ",
-            "   # ",
-            " ### ",
-            " #   ",
-            " ### "
-        ], [
-            " ### ",
-            "   # ",
-            " ### ",
-            "   # ",
-            " ### "
-        ], [
-            " # # ",
-            " # # ",
-            " ### ",
-            "   # ",
-            "   # "
-        ], [
-            " ### ",
-            " #   ",
-            " ### ",
-            "   # ",
-            " ### "
-        ], [
-            " ### ",
-            " #   ",
-            " ### ",
-            " # # ",
-            " ### "
-        ], [
-            " ### ",
-            "   # ",
-            "   # ",
-            "   # ",
-            "   # "
-        ], [
-            " ### ",
-            " # # ",
-            " ### ",
-            " # # ",
-            " ### "
-        ], [
-            " ### ",
-            " # # ",
-            " ### ",
-            "   # ",
-            " ### "
-        ], [
-            "# ###",
-            "# # #",
-            "# # #",
-            "# # #",
-            "# ###"
-        ], [
-            " #  #",
-            "## ##",
-            " #  #",
-            " #  #",
-            " #  #"
-        ], [
-            "# ###",
-            "#   #",
-            "# ###",
-            "# #  ",
-            "# ###"
-        ], [
-            "# ###",
-            "#   #",
-            "# ###",
-            "#   #",
-            "# ###"
-        ], [
-            "# # #",
-            "# # #",
-            "# ###",
-            "#   #",
-            "#   #"
-        ], [
-            "# ###",
-            "# #  ",
-            "# ###",
-            "#   #",
-            "# ###"
-        ], [
-            "# ###",
-            "# #  ",
-            "# ###",
-            "# # #",
-            "# ###"
-        ], [
-            "# ###",
-            "#   #",
-            "#   #",
-            "#   #",
-            "#   #"
-        ], [
-            "# ###",
-            "# # #",
-            "# ###",
-            "# # #",
-            "# ###"
-        ], [
-            "# ###",
-            "# # #",
-            "# ###",
-            "#   #",
-            "# ###"
-        ]]
-
     @staticmethod
     def is_valid_pattern(pattern: list[str]):
         if len(pattern) != 5:
@@ -139,7 +18,296 @@ class Patterns():
                 return False
         return True
 
-def display_pattern(hub: PrimeHub, pattern: list[str]):
+def compile_pattern(pattern: Union[list[str], bytes]) -> Matrix:
+    """
+    Convert a pattern into a Matrix ready for hub.display.icon().
+
+    Args:
+        pattern: List of strings where each string represents a row, or a
+                 packed pattern made by pack_pattern().
+                 See display_pattern() for the syntax.
+
+    Returns:
+        Matrix: The compiled frame.
+    """
+    if isinstance(pattern, bytes):
+        return unpack_pattern(pattern)
+    rows = []
+    for row in pattern:
+        pixels = []
+        for char in row:
+            if char == ' ':
+                pixels.append(0)
+            elif '0' <= char <= '9':
+                pixels.append((ord(char) - 48) * 10)
+            else:
+                pixels.append(100)
+        rows.append(pixels)
+    return Matrix(rows)
+
+# Packed patterns. A pattern is 25 pixels of 4 bits each, row by row, two
+# pixels per byte with the first in the high nibble. A nibble is the
+# brightness in tens of percent (0-10), the same as a digit in the string
+# syntax, with '#' stored as 10. Several packed patterns put one after the
+# other form a blob that PatternPack reads without splitting it up.
+
+# Bytes in one packed pattern
+PATTERN_SIZE = 13
+
+# Brightness of each nibble value
+_LEVELS = (0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100, 100, 100, 100, 100, 100)
+
+def pack_pattern(pattern: list[str]) -> bytes:
+    """
+    Convert a string pattern into the packed format.
+
+    Args:
+        pattern: List of strings where each string represents a row.
+                 See display_pattern() for the syntax.
+
+    Returns:
+        bytes: The PATTERN_SIZE bytes of the packed pattern.
+    """
+    if not Patterns.is_valid_pattern(pattern):
+        raise ValueError("A pattern must be 5 rows of 5 characters")
+    data = bytearray(PATTERN_SIZE)
+    pixel = 0
+    for row in pattern:
+        for char in row:
+            if char == ' ':
+                level = 0
+            elif '0' <= char <= '9':
+                level = ord(char) - 48
+            else:
+                level = 10
+            if pixel & 1:
+                data[pixel >> 1] |= level
+            else:
+                data[pixel >> 1] = level << 4
+            pixel += 1
+    return bytes(data)
+
+def pack_patterns(patterns: list) -> bytes:
+    """Pack several string patterns into one blob for PatternPack."""
+    return b''.join([pack_pattern(pattern) for pattern in patterns])
+
+def unpack_pattern(data: bytes, index: int = 0) -> Matrix:
+    """
+    Decode a packed pattern into a Matrix.
+
+    Args:
+        data: A packed pattern, or a blob of several.
+        index: Which pattern of the blob to decode.
+
+    Returns:
+        Matrix: The frame for hub.display.icon().
+    """
+    offset = index * PATTERN_SIZE
+    levels = _LEVELS
+    pixels = []
+    for i in range(offset, offset + PATTERN_SIZE):
+        byte = data[i]
+        pixels.append(levels[byte >> 4])
+        pixels.append(levels[byte & 15])
+    return Matrix([pixels[0:5], pixels[5:10], pixels[10:15], pixels[15:20],
+                   pixels[20:25]])
+
+def pattern_rows(data: bytes, index: int = 0) -> list[str]:
+    """
+    Convert a packed pattern back into the string syntax, for printing.
+
+    Args:
+        data: A packed pattern, or a blob of several.
+        index: Which pattern of the blob to convert.
+
+    Returns:
+        list[str]: Five rows of five characters.
+    """
+    chars = []
+    for i in range(index * PATTERN_SIZE, (index + 1) * PATTERN_SIZE):
+        for level in (data[i] >> 4, data[i] & 15):
+            chars.append(' ' if level == 0 else '#' if level >= 10
+                         else chr(48 + level))
+    return [''.join(chars[row * 5:row * 5 + 5]) for row in range(5)]
+
+class PatternPack():
+    """
+    A blob of packed patterns, used like a read-only list of frames.
+
+    The blob is kept as it is, so loading any number of patterns costs one
+    bytes object and a list slot per pattern. A frame is decoded the first
+    time it is asked for and kept, so only patterns that are shown get a
+    Matrix and showing one again allocates nothing.
+
+    Example:
+        ARROWS = PatternPack(b'...')   # made with pack_patterns()
+        hub.display.icon(ARROWS[2])
+    """
+
+    def __init__(self, blob: bytes):
+        """
+        Initialize the pack.
+
+        Args:
+            blob: Packed patterns, PATTERN_SIZE bytes each.
+        """
+        if len(blob) % PATTERN_SIZE:
+            raise ValueError("Blob size must be a multiple of PATTERN_SIZE")
+        self.blob = blob
+        # Decoded frames, filled in as they are asked for
+        self._frames = [None] * (len(blob) // PATTERN_SIZE)
+
+    def __len__(self):
+        """Return the number of patterns."""
+        return len(self._frames)
+
+    def __getitem__(self, index: int) -> Matrix:
+        """Get one pattern, decoding it the first time."""
+        frame = self._frames[index]
+        if frame is None:
+            if index < 0:
+                index += len(self._frames)
+            frame = unpack_pattern(self.blob, index)
+            self._frames[index] = frame
+        return frame
+
+class PatternCache():
+    """
+    A bounded cache of compiled pattern frames.
+
+    Patterns are looked up by identity, so a pattern list that is kept
+    around (like a menu item's display) is only parsed once. Do not modify
+    a pattern list after it has been displayed; build a new list instead.
+
+    The least recently used pattern is evicted when the cache is full.
+    """
+
+    def __init__(self, size: int = 16):
+        """
+        Initialize the cache.
+
+        Args:
+            size: Maximum number of patterns to keep.
+        """
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._frames = {}
+        self._order = []
+
+    def get(self, pattern: list[str]) -> Matrix:
+        """
+        Get the compiled frame for a pattern, compiling it on a miss.
+
+        Args:
+            pattern: The pattern to look up.
+
+        Returns:
+            Matrix: The compiled frame.
+        """
+        # Every entry keeps its pattern alive, so an id is never reused
+        # while it is in the cache
+        key = id(pattern)
+        entry = self._frames.get(key)
+        if entry is not None:
+            self.hits += 1
+            if self._order[-1] != key:
+                self._order.remove(key)
+                self._order.append(key)
+            return entry[1]
+
+        self.misses += 1
+        if len(self._order) >= self.size:
+            del self._frames[self._order.pop(0)]
+        entry = (pattern, compile_pattern(pattern))
+        self._frames[key] = entry
+        self._order.append(key)
+        return entry[1]
+
+    def clear(self):
+        """Remove all patterns."""
+        self._frames.clear()
+        self._order.clear()
+
+    def __len__(self):
+        """Return the number of cached patterns."""
+        return len(self._frames)
+
+pattern_cache = PatternCache()
+
+# Number glyphs. Every number from -99 to 99 is one 25-bit integer, one bit
+# per pixel, row by row with the top left pixel in bit 24. The table is
+# generated at import from two small digit fonts in which each octal digit
+# is one row: DIGITS_3 are 3 pixels wide, DIGITS_2 are 2 pixels wide for
+# when two digits share the display.
+#
+#   0..9     3-wide digit in the middle
+#   10..19   a bar for the 1, then a 3-wide digit
+#   20..99   two 2-wide digits with a blank column between them
+#   -9..-1   faint dash on the left, then a 3-wide digit
+#   -99..-10 two 2-wide digits with a faint dash between them
+
+DIGITS_3 = (0o75557, 0o26227, 0o71747, 0o71717, 0o55711,
+            0o74717, 0o74757, 0o71111, 0o75757, 0o75717)
+DIGITS_2 = (0o33333, 0o13111, 0o31323, 0o31313, 0o22311,
+            0o32313, 0o22333, 0o31111, 0o33033, 0o33313)
+
+# Brightness of the minus sign
+MINUS_BRIGHTNESS = 40
+
+def _glyph_row(number: int, shift: int) -> int:
+    magnitude = -number if number < 0 else number
+    if magnitude < 10:
+        row = (DIGITS_3[magnitude] >> shift) & 7
+        return row if number < 0 else row << 1
+    if number >= 10 and number < 20:
+        return 0b10000 | (DIGITS_3[number - 10] >> shift) & 7
+    return (((DIGITS_2[magnitude // 10] >> shift) & 3) << 3
+            | (DIGITS_2[magnitude % 10] >> shift) & 3)
+
+def _glyph(number: int) -> int:
+    bits = 0
+    for shift in (12, 9, 6, 3, 0):
+        bits = bits << 5 | _glyph_row(number, shift)
+    return bits
+
+NUMBER_GLYPHS = tuple(_glyph(n) for n in range(-99, 100))
+
+# Frames decoded from NUMBER_GLYPHS so far, indexed like it
+_number_frames = [None] * len(NUMBER_GLYPHS)
+
+def number_frame(number: int) -> Matrix:
+    """
+    Get the frame that shows a number.
+
+    The frame is decoded from NUMBER_GLYPHS the first time the number is
+    shown and the same Matrix is returned after that, so the cost is the
+    same for every number.
+
+    Args:
+        number: An integer from -99 to 99.
+
+    Returns:
+        Matrix: The frame for hub.display.icon().
+    """
+    if number < -99 or number > 99:
+        raise ValueError("Number must be between -99 and 99")
+    frame = _number_frames[number + 99]
+    if frame is None:
+        bits = NUMBER_GLYPHS[number + 99]
+        rows = []
+        for row in range(5):
+            pixels = []
+            for col in range(5):
+                pixels.append(100 if bits >> (24 - row * 5 - col) & 1 else 0)
+            rows.append(pixels)
+        if number < 0:
+            rows[2][0 if number > -10 else 2] = MINUS_BRIGHTNESS
+        frame = Matrix(rows)
+        _number_frames[number + 99] = frame
+    return frame
+
+def display_pattern(hub: PrimeHub, pattern: Union[list[str], bytes]):
     """
     Display a pattern on the hub using a visual representation.
     
@@ -149,6 +317,7 @@ def display_pattern(hub: PrimeHub, pattern: list[str]):
                  Use '#' or anything other than space or zero to turn pixel on,
                  Use space or 0 to turn pixel off,
                  Use a number 1-9 to change the brightness.
+                 A pattern packed with pack_pattern() works too.
     
     Example:
         display_pattern(hub, [
@@ -159,19 +328,22 @@ def display_pattern(hub: PrimeHub, pattern: list[str]):
             " ### "
         ])
     """
-    rows = []
-    for row in pattern:
-        pixels = []
-        for char in row:
-            if char == ' ':
-                pixels.append(0)
-            else:
-                try:
-                    pixels.append(int(char) * 10)
-                except ValueError:
-                    pixels.append(100)
-        rows.append(pixels)
-    hub.display.icon(Matrix(rows))
+    hub.display.icon(pattern_cache.get(pattern))
+
+def _show_number(display, number: int):
+    """Show a number (0-99) on a hub.display or FrameDisplay."""
+    if number < 0 or number > 99:
+        raise ValueError("Number must be between 0 and 99")
+    display.icon(number_frame(number))
+
+def _show_content(display, content: Union[str, int, list[str], bytes]):
+    """Show any menu content on a hub.display or FrameDisplay."""
+    if isinstance(content, int):
+        display.icon(number_frame(content))
+    elif isinstance(content, str):
+        display.char(content[0])
+    else:
+        display.icon(pattern_cache.get(content))
 
 def display_number(hub: PrimeHub, number: int):
     """
@@ -181,54 +353,460 @@ def display_number(hub: PrimeHub, number: int):
         hub: PrimeHub instance to display on.
         number: An integer from 0 to 99.
     """
-    if number < 0 or number > 99:
-        raise ValueError("Number must be between 0 and 99")
+    _show_number(hub.display, number)
+
+def display_content(hub: PrimeHub, content: Union[str, int, list[str], bytes]):
+    _show_content(hub.display, content)
+
+class FrameDisplay():
+    """
+    A drop-in wrapper for hub.display that remembers the last frame sent.
     
-    if number < 10:
-        hub.display.char(str(number))
-    elif number < 20:
-        display_pattern(hub, Patterns.numbers[number])
-    else:
-        hub.display.number(number)
+    Writing the frame that is already shown does nothing. When a new icon
+    differs from the previous icon in only a few pixels, just those pixels
+    are written with display.pixel().
+    
+    Anything that writes to hub.display directly makes the remembered frame
+    stale; call invalidate() afterwards so the next write is always sent.
+    """
+    
+    # Kinds of frame
+    NONE = 0
+    CHAR = 1
+    NUMBER = 2
+    ICON = 3
+    OFF = 4
+    
+    def __init__(self, display, max_pixel_writes: int = 6):
+        """
+        Initialize the wrapper.
+        
+        Args:
+            display: The hub.display to write to.
+            max_pixel_writes: Largest number of changed pixels that is sent
+                              pixel by pixel instead of as a whole icon.
+                              Use 0 to always send whole icons.
+        """
+        self.display = display
+        self.max_pixel_writes = max_pixel_writes
+        self.writes = 0
+        self.pixel_writes = 0
+        self.skipped = 0
+        self._kind = FrameDisplay.NONE
+        self._value = None
+    
+    def invalidate(self):
+        """Forget the last frame so the next write is always sent."""
+        self._kind = FrameDisplay.NONE
+        self._value = None
+    
+    def _unchanged(self, kind, value):
+        if self._kind == kind and self._value == value:
+            self.skipped += 1
+            return True
+        self._kind = kind
+        self._value = value
+        self.writes += 1
+        return False
+    
+    def char(self, char: str):
+        """Show a character, unless it is already shown."""
+        if not self._unchanged(FrameDisplay.CHAR, char):
+            self.display.char(char)
+    
+    def number(self, number: int):
+        """Show a number with the built-in font, unless it is already shown."""
+        if not self._unchanged(FrameDisplay.NUMBER, number):
+            self.display.number(number)
+    
+    def icon(self, icon: Matrix):
+        """Show an icon, sending only what changed since the last icon."""
+        previous = self._value if self._kind == FrameDisplay.ICON else None
+        if previous is icon:
+            self.skipped += 1
+            return
+        self._kind = FrameDisplay.ICON
+        self._value = icon
+        
+        if previous is not None and self.max_pixel_writes:
+            changed = 0
+            for row in range(5):
+                for col in range(5):
+                    if previous[row, col] != icon[row, col]:
+                        changed += 1
+            if changed == 0:
+                self.skipped += 1
+                return
+            if changed <= self.max_pixel_writes:
+                for row in range(5):
+                    for col in range(5):
+                        if previous[row, col] != icon[row, col]:
+                            self.display.pixel(row, col, icon[row, col])
+                self.pixel_writes += changed
+                return
+        
+        self.writes += 1
+        self.display.icon(icon)
+    
+    def pixel(self, row: int, column: int, brightness: int = 100):
+        """Set one pixel. The remembered frame is forgotten."""
+        self.invalidate()
+        self.display.pixel(row, column, brightness)
+    
+    def off(self):
+        """Turn the display off, unless it is already off."""
+        if not self._unchanged(FrameDisplay.OFF, None):
+            self.display.off()
+    
+    def show(self, content: Union[str, int, list[str], bytes]):
+        """Show menu content, as display_content() does."""
+        _show_content(self, content)
+    
+    def show_number(self, number: int):
+        """Show a number (0-99), as display_number() does."""
+        _show_number(self, number)
+    
+    def show_pattern(self, pattern: list[str]):
+        """Show a pattern, as display_pattern() does."""
+        self.icon(pattern_cache.get(pattern))
 
-def display_content(hub: PrimeHub, content: Union[str, int, list[str]]):
-    if isinstance(content, int):
-        if content > -100 and content < 100:
-            if content < 0:
-                hub.display.number(content)
-            else:
-                display_number(hub, content)
+class Animation():
+    """
+    A sequence of frames with a duration for each, compiled once.
+    
+    Frames can be anything display_content() accepts (numbers, characters
+    and patterns) or Matrix objects. Patterns are compiled to Matrix objects
+    when the animation is created, so playing it allocates nothing.
+    
+    Example:
+        blink = Animation([Icon.HEART, Icon.HEART * 0.3], 300, loop=True)
+    """
+    
+    def __init__(self, frames: list, durations: Union[int, list[int]] = 100,
+                 loop: bool = False):
+        """
+        Initialize the animation.
+        
+        Args:
+            frames: The frames to show, in order.
+            durations: Time in ms to show each frame, as one value for all
+                       frames or a list with one value per frame.
+            loop: If True, the animation starts over after the last frame.
+        """
+        if not frames:
+            raise ValueError("An animation needs at least one frame")
+        if isinstance(durations, int):
+            durations = [durations] * len(frames)
+        elif len(durations) != len(frames):
+            raise ValueError("Need one duration per frame")
+        
+        compiled = []
+        for frame in frames:
+            if isinstance(frame, (list, bytes)):
+                frame = compile_pattern(frame)
+            compiled.append(frame)
+        self.frames = tuple(compiled)
+        
+        # End time of each frame, counted from the start of the animation
+        ends = []
+        total = 0
+        for duration in durations:
+            if duration <= 0:
+                raise ValueError("Frame durations must be positive")
+            total += duration
+            ends.append(total)
+        self.ends = tuple(ends)
+        self.total = total
+        self.loop = loop
+    
+    def __len__(self):
+        """Return the number of frames."""
+        return len(self.frames)
+
+class Animator():
+    """
+    Plays an Animation without blocking.
+    
+    Call update() from an event loop as often as convenient; it shows the
+    frame that is due and returns straight away. time_to_next() tells the
+    loop how long it may wait before the next update is needed.
+    """
+    
+    def __init__(self, display, max_fps: Optional[int] = None,
+                 clock: Optional[Callable[[], int]] = None):
+        """
+        Initialize the player.
+        
+        Args:
+            display: hub.display or a FrameDisplay to draw on.
+            max_fps: Highest number of frames per second to draw. Frames
+                     that are due sooner are skipped, keeping the timing.
+                     If None, every frame is drawn.
+            clock: Function returning the time in ms. If None, a StopWatch
+                   is used.
+        """
+        self.display = display
+        self.min_interval = 1000 // max_fps if max_fps else 0
+        self.clock = clock if clock is not None else StopWatch().time
+        self._animation = None
+        self._start = 0
+        self._index = 0
+        self._last_draw = 0
+    
+    @property
+    def running(self) -> bool:
+        """True while an animation is playing."""
+        return self._animation is not None
+    
+    def _draw(self, index: int, now: int):
+        frame = self._animation.frames[index]
+        self._index = index
+        self._last_draw = now
+        if isinstance(frame, Matrix):
+            self.display.icon(frame)
         else:
-            raise ValueError("Number must be between -99 and 99")
-    elif isinstance(content, str):
-        hub.display.char(content[0])
-    else:
-        display_pattern(hub, content)
+            _show_content(self.display, frame)
+    
+    def play(self, animation: Animation, now: Optional[int] = None):
+        """Start playing an animation, replacing the current one."""
+        if now is None:
+            now = self.clock()
+        self._animation = animation
+        self._start = now
+        self._draw(0, now)
+    
+    def stop(self):
+        """Stop playing. The frame that is shown stays on the display."""
+        self._animation = None
+    
+    def _elapsed(self, now: int) -> int:
+        elapsed = now - self._start
+        if elapsed >= self._animation.total and self._animation.loop:
+            elapsed %= self._animation.total
+        return elapsed
+    
+    def update(self, now: Optional[int] = None) -> bool:
+        """
+        Draw the frame that is due, if it is not shown yet.
+        
+        Args:
+            now: The current time in ms. If None, the clock is read.
+        
+        Returns:
+            bool: True if the animation is still playing.
+        """
+        animation = self._animation
+        if animation is None:
+            return False
+        if now is None:
+            now = self.clock()
+        
+        elapsed = self._elapsed(now)
+        if elapsed >= animation.total:
+            # Finished: always end on the last frame, even if capped
+            last = len(animation.frames) - 1
+            if self._index != last:
+                self._draw(last, now)
+            self._animation = None
+            return False
+        
+        ends = animation.ends
+        index = self._index
+        if index > 0 and elapsed < ends[index - 1]:
+            # Looped around
+            index = 0
+        while elapsed >= ends[index]:
+            index += 1
+        if index != self._index and now - self._last_draw >= self.min_interval:
+            self._draw(index, now)
+        return True
+    
+    def time_to_next(self, now: Optional[int] = None) -> int:
+        """
+        Get the time until update() next needs to be called.
+        
+        Returns:
+            int: Time in ms, or None if nothing is playing.
+        """
+        animation = self._animation
+        if animation is None:
+            return None
+        if now is None:
+            now = self.clock()
+        elapsed = self._elapsed(now)
+        if elapsed >= animation.total:
+            return 0
+        remaining = animation.ends[self._index] - elapsed
+        if remaining < 0:
+            remaining = 0
+        capped = self.min_interval - (now - self._last_draw)
+        return capped if capped > remaining else remaining
+
+class ValueSelector():
+    """
+    Lets the operator pick a number on the hub, for example a speed or a
+    distance offset.
+    
+    LEFT and RIGHT change the value by `step`. Holding them repeats, and
+    the longer they are held the bigger the steps get, as set by
+    `acceleration`. CENTER confirms and select() returns the value.
+    
+    The shown number is value // scale, which must fit -99..99, so a speed
+    of 0..990 can be picked with scale=10. The frame of every value in
+    the range is looked up once when the selector is created, and the
+    buttons are read once per tick through a ButtonInput, so scrolling
+    allocates nothing.
+    
+    Example:
+        speed = ValueSelector(hub, 100, 900, step=50, scale=10).select(500)
+    """
+    
+    def __init__(self, hub: PrimeHub, minimum: int = 0, maximum: int = 99,
+                 step: int = 1, scale: int = 1, wrap: bool = False,
+                 acceleration: tuple = ((1500, 5), (3000, 10)),
+                 display=None):
+        """
+        Initialize the selector.
+        
+        Args:
+            hub: PrimeHub whose buttons and display are used.
+            minimum: Smallest value.
+            maximum: Largest value. Values are minimum + n * step.
+            step: Change per press.
+            scale: The display shows value // scale.
+            wrap: If True, going past one end continues at the other.
+            acceleration: (held ms, steps per repeat) pairs, in increasing
+                          order of held time.
+            display: hub.display or FrameDisplay to draw on. If None, a
+                     FrameDisplay on hub.display is used.
+        """
+        if step <= 0 or maximum < minimum:
+            raise ValueError("Need step > 0 and maximum >= minimum")
+        if minimum // scale < -99 or maximum // scale > 99:
+            raise ValueError("value // scale must be between -99 and 99")
+        self.hub = hub
+        self.minimum = minimum
+        self.step = step
+        self.wrap = wrap
+        self.acceleration = acceleration
+        self.display = (display if display is not None
+                        else FrameDisplay(hub.display))
+        self.input = ButtonInput(hub, repeat_buttons=(Button.LEFT, Button.RIGHT),
+                                 repeat_delay=400, repeat_interval=80)
+        self.frames = [number_frame((minimum + i * step) // scale)
+                       for i in range((maximum - minimum) // step + 1)]
+        self.index = 0
+        self._pressed_at = 0
+    
+    @property
+    def value(self) -> int:
+        """The value that is shown."""
+        return self.minimum + self.index * self.step
+    
+    @value.setter
+    def value(self, value: int):
+        index = (value - self.minimum) // self.step
+        last = len(self.frames) - 1
+        self.index = 0 if index < 0 else last if index > last else index
+    
+    def _steps(self, now: int) -> int:
+        """Return the steps per repeat after the button was held until now."""
+        steps = 1
+        held = now - self._pressed_at
+        for after, count in self.acceleration:
+            if held < after:
+                break
+            steps = count
+        return steps
+    
+    def _move(self, steps: int):
+        index = self.index + steps
+        last = len(self.frames) - 1
+        if self.wrap:
+            index %= last + 1
+        elif index < 0:
+            index = 0
+        elif index > last:
+            index = last
+        self.index = index
+        self.display.icon(self.frames[index])
+    
+    def _handle(self, event) -> bool:
+        """Handle a button event. Returns True when the value is confirmed."""
+        kind, button = event
+        if kind == PRESS:
+            if button == Button.CENTER:
+                return True
+            self._pressed_at = self.input.clock()
+            steps = 1
+        elif kind == REPEAT:
+            steps = self._steps(self.input.clock())
+        else:
+            return False
+        if button == Button.RIGHT:
+            self._move(steps)
+        elif button == Button.LEFT:
+            self._move(-steps)
+        return False
+    
+    def _begin(self, value: Optional[int]):
+        if value is not None:
+            self.value = value
+        if isinstance(self.display, FrameDisplay):
+            # Something else may have drawn since the last select
+            self.display.invalidate()
+        self.display.icon(self.frames[self.index])
+        # Buttons held from before, like the CENTER press that started
+        # the mission, must not count
+        self.input.sync()
+    
+    def select(self, value: Optional[int] = None) -> int:
+        """
+        Let the operator pick a value and wait until CENTER confirms it.
+        
+        Args:
+            value: Value to start at. If None, the last value is kept.
+        
+        Returns:
+            int: The chosen value.
+        """
+        self._begin(value)
+        while not self._handle(self.input.wait_event()):
+            pass
+        self.input.wait_release(Button.CENTER)
+        return self.value
+    
+    async def select_async(self, value: Optional[int] = None) -> int:
+        """Coroutine version of select(), for use inside run_task()."""
+        self._begin(value)
+        loop = self.input.loop
+        loop.start()
+        while True:
+            self.input.sample()
+            event = self.input.get()
+            if event is not None and self._handle(event):
+                break
+            await loop.wait_async()
+        loop.start()
+        while self.input.is_pressed(Button.CENTER):
+            await loop.wait_async()
+            self.input.sample()
+        return self.value
 
 def run_number_selector():
     """
     Run an interactive number selector on the hub.
     Use LEFT/RIGHT buttons to cycle through numbers 0-25.
-    Press CENTER button to exit.
+    Press CENTER button to print the number shown.
     """
     hub = PrimeHub()
-    selector = 0
     hub.display.char('?')
     hub.display.icon(Matrix([[0,20,40,20,0],[20,40,60,40,20],[40,60,80,60,40],[20,40,60,40,20],[0,20,40,20,0]]))
     print(Icon.ARROW_DOWN)
-    selector_increment = 0
+    selector = ValueSelector(hub, 0, 25, wrap=True)
     
     while True:
-        if hub.buttons.pressed() & {Button.RIGHT, Button.LEFT}:
-            if Button.RIGHT in hub.buttons.pressed():
-                selector_increment = 1
-            elif Button.LEFT in hub.buttons.pressed():
-                selector_increment = -1
-            while any(hub.buttons.pressed()):
-                wait(10)
-            selector = (selector + selector_increment) % 26
-            display_number(hub, selector)
-        wait(10)
+        print(selector.select())
 
 
 if __name__ == "__main__":
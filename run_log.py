@@ -0,0 +1,127 @@
+try:
+    from typing import Callable, Optional
+except ImportError:
+    pass
+
+from pybricks.tools import StopWatch
+
+try:
+    import gc
+except ImportError:
+    gc = None
+
+# Exit reasons
+COMPLETED = 'completed'
+STOPPED = 'stopped'
+TIMEOUT = 'timeout'
+ERROR = 'error'
+
+# Prefix of every line written by RunLog.dump()
+PREFIX = '@run'
+
+
+def mem_free():
+    """Return the free heap in bytes, or None where it cannot be read."""
+    if gc is None or not hasattr(gc, 'mem_free'):
+        return None
+    return gc.mem_free()
+
+
+class RunLog:
+    """
+    A bounded log of menu item runs.
+
+    Each run is kept as a tuple
+    (seq, index, name, duration_ms, reason, mem_before, mem_after, stop_ms),
+    where reason is COMPLETED, STOPPED, TIMEOUT or ERROR, the memory values
+    are free heap bytes (None if the platform cannot report them) and
+    stop_ms is the time from the stop request to the end of cleanup (None
+    if the run was not stopped). When the log is full the oldest run is
+    overwritten.
+    """
+
+    def __init__(self, size: int = 32,
+                 clock: Optional[Callable[[], int]] = None):
+        """
+        Initialize the log.
+
+        Args:
+            size: Number of runs to keep.
+            clock: Function returning the time in ms. If None, a StopWatch
+                   is used.
+        """
+        self.clock = clock if clock is not None else StopWatch().time
+        self._records = [None] * size
+        self._count = 0
+        self._seq = 0
+        self._current = None
+
+    def start(self, index: int, name: str):
+        """
+        Record the start of a run.
+
+        Args:
+            index: Index of the item in the menu.
+            name: Short name of the item.
+        """
+        if gc is not None:
+            # Start every run from a clean heap so the numbers compare
+            gc.collect()
+        self._current = (index, name, mem_free(), self.clock())
+
+    def finish(self, reason: str, stop_ms: Optional[int] = None):
+        """
+        Record the end of the run started last.
+
+        Args:
+            reason: COMPLETED, STOPPED, TIMEOUT or ERROR.
+            stop_ms: Time from the stop request to the end of cleanup.
+
+        Returns:
+            tuple: The new record, or None if no run was started.
+        """
+        if self._current is None:
+            return None
+        index, name, mem_before, started = self._current
+        self._current = None
+        record = (self._seq, index, name, self.clock() - started, reason,
+                  mem_before, mem_free(), stop_ms)
+        self._records[self._seq % len(self._records)] = record
+        self._seq += 1
+        if self._count < len(self._records):
+            self._count += 1
+        return record
+
+    def records(self) -> list:
+        """Return the kept runs, oldest first."""
+        size = len(self._records)
+        first = self._seq - self._count
+        return [self._records[i % size] for i in range(first, self._seq)]
+
+    def clear(self):
+        """Forget all runs."""
+        for i in range(len(self._records)):
+            self._records[i] = None
+        self._count = 0
+
+    @staticmethod
+    def format(record: tuple) -> str:
+        """
+        Format a record as one line of comma separated values.
+
+        The line is PREFIX,seq,index,name,duration_ms,reason,mem_before,
+        mem_after,stop_ms with empty fields for unknown values.
+        """
+        fields = [PREFIX]
+        for value in record:
+            fields.append('' if value is None else str(value))
+        return ','.join(fields)
+
+    def dump(self):
+        """Print all kept runs, oldest first, one line each."""
+        for record in self.records():
+            print(self.format(record))
+
+    def __len__(self):
+        """Return the number of kept runs."""
+        return self._count
@@ -0,0 +1,158 @@
+try:
+    from typing import Optional
+except ImportError:
+    pass
+
+# Result of a step that was skipped, by the plan or by the operator
+SKIPPED = 'skipped'
+
+# Branch target that ends the plan
+END = None
+
+
+class Step:
+    """One mission of a RunPlan."""
+
+    __slots__ = ('index', 'repeat', 'skip', 'delay', 'label', 'branches',
+                 'targets')
+
+    def __init__(self, index: int, repeat: int = 1, skip: bool = False,
+                 delay: Optional[int] = None, label: Optional[str] = None,
+                 branches: Optional[dict] = None):
+        self.index = index
+        self.repeat = repeat
+        self.skip = skip
+        self.delay = delay
+        self.label = label
+        self.branches = branches
+        # Branches resolved to plan positions by RunPlan.compile()
+        self.targets = None
+
+    def __str__(self):
+        text = str(self.index)
+        if self.label is not None:
+            text = self.label + ': ' + text
+        if self.repeat != 1:
+            text += ' x' + str(self.repeat)
+        if self.skip:
+            text += ' (skip)'
+        return text
+
+
+class RunPlan:
+    """
+    The order in which a competition run goes through the menu items.
+
+    Steps run one after the other. A step can be repeated, skipped, or
+    branch to another step depending on how it ended: COMPLETED, STOPPED,
+    TIMEOUT, ERROR or SKIPPED. Branch targets are step labels, or END to
+    finish the plan. Labels are resolved once, when the plan is compiled,
+    so moving between steps during the run is a lookup.
+
+    Example:
+        plan = RunPlan()
+        plan.add(0, label='crane')
+        plan.add(1, repeat=2)
+        plan.add(2, branches={STOPPED: 'crane', ERROR: END})
+        plan.add(3, delay=2000)   # starts by itself after 2 s
+        menu.run_sequence(plan)
+    """
+
+    def __init__(self):
+        """Initialize an empty plan."""
+        self.steps = []
+        self._compiled = False
+
+    @classmethod
+    def from_items(cls, count: int):
+        """Create a plan that runs items 0 to count - 1 once each, in order."""
+        plan = cls()
+        for index in range(count):
+            plan.add(index)
+        return plan
+
+    def add(self, index: int, repeat: int = 1, skip: bool = False,
+            delay: Optional[int] = None, label: Optional[str] = None,
+            branches: Optional[dict] = None) -> Step:
+        """
+        Add a step at the end of the plan.
+
+        Args:
+            index: Index of the menu item to run.
+            repeat: Number of times to run the item while it completes.
+            skip: If True, the step is passed over (result SKIPPED).
+            delay: Time in ms after which the item starts by itself. If
+                   None, it waits for CENTER.
+            label: Name other steps can branch to.
+            branches: Dict from a result to the label of the step to go to
+                      next, or END. Results not in it go to the next step.
+
+        Returns:
+            Step: The new step.
+        """
+        if index < 0:
+            raise ValueError("Item index must not be negative")
+        if repeat < 1:
+            raise ValueError("A step must run at least once")
+        step = Step(index, repeat, skip, delay, label, branches)
+        self.steps.append(step)
+        self._compiled = False
+        return step
+
+    def compile(self, items: Optional[int] = None):
+        """
+        Resolve branch labels to positions. Done by start() if needed.
+
+        Args:
+            items: Number of menu items. If given, every step must refer to
+                   one of them.
+        """
+        positions = {}
+        for position, step in enumerate(self.steps):
+            if items is not None and step.index >= items:
+                raise ValueError("Step " + str(step) + " has no menu item")
+            if step.label is not None:
+                if step.label in positions:
+                    raise ValueError("Duplicate step label " + step.label)
+                positions[step.label] = position
+        for step in self.steps:
+            step.targets = None
+            if step.branches:
+                targets = {}
+                for result, label in step.branches.items():
+                    if label is not END and label not in positions:
+                        raise ValueError("Unknown step label " + str(label))
+                    targets[result] = positions.get(label)
+                step.targets = targets
+        self._compiled = True
+
+    def start(self) -> Optional[int]:
+        """Get the position of the first step, or None if there are none."""
+        if not self._compiled:
+            self.compile()
+        return 0 if self.steps else None
+
+    def next(self, position: int, result: str) -> Optional[int]:
+        """
+        Get the position of the step that follows a finished step.
+
+        Args:
+            position: Position of the step that finished.
+            result: How its last run ended.
+
+        Returns:
+            int: The next position, or None when the plan is done.
+        """
+        targets = self.steps[position].targets
+        if targets is not None and result in targets:
+            return targets[result]
+        position += 1
+        return position if position < len(self.steps) else None
+
+    def __len__(self):
+        """Return the number of steps."""
+        return len(self.steps)
+
+    def __str__(self):
+        """Return the steps, one per line."""
+        return '\n'.join(str(step) for step in self.steps)
@@ -0,0 +1,9 @@
+"""
+Host-side stand-ins for the Pybricks firmware modules.
+
+Only the parts of the API used by the programs in this repository are
+implemented. All devices share the virtual clock and event log in
+pybricks_sim.sim.
+"""
+
+version = ("sim", "3.6.0", "host")
@@ -0,0 +1,160 @@
+"""Stand-in for pybricks.hubs."""
+
+from pybricks_sim import sim
+from pybricks.parameters import Axis
+from pybricks.tools import Matrix
+
+
+class _Display:
+    """The 5x5 light matrix. Every call is logged under 'display'."""
+
+    def __init__(self):
+        self.pixels = [[0] * 5 for _ in range(5)]
+
+    def _set(self, frame):
+        for r in range(5):
+            for c in range(5):
+                self.pixels[r][c] = frame[r, c]
+
+    def char(self, char):
+        sim.record("display", "char", char)
+
+    def number(self, number):
+        sim.record("display", "number", number)
+
+    def icon(self, icon):
+        self._set(icon)
+        sim.record("display", "icon", icon)
+
+    def pixel(self, row, column, brightness=100):
+        self.pixels[row][column] = brightness
+        sim.record("display", "pixel", row, column, brightness)
+
+    def off(self):
+        self.pixels = [[0] * 5 for _ in range(5)]
+        sim.record("display", "off")
+
+    def orientation(self, up):
+        sim.record("display", "orientation", up)
+
+    def text(self, text, on=500, off=50):
+        sim.record("display", "text", text)
+        return sim.delay(len(text) * (on + off))
+
+    def animate(self, matrices, interval):
+        sim.record("display", "animate", len(matrices), interval)
+
+
+class _Buttons:
+    def pressed(self):
+        return sim.pressed()
+
+
+class _Light:
+    def on(self, color):
+        sim.record("light", "on", color)
+
+    def off(self):
+        sim.record("light", "off")
+
+    def blink(self, color, durations):
+        sim.record("light", "blink", color, list(durations))
+
+    def animate(self, colors, interval):
+        sim.record("light", "animate", list(colors), interval)
+
+
+class _Speaker:
+    def __init__(self):
+        self._volume = 100
+
+    def volume(self, volume=None):
+        if volume is None:
+            return self._volume
+        self._volume = volume
+
+    def beep(self, frequency=500, duration=100):
+        sim.record("speaker", "beep", frequency, duration)
+        if duration < 0:
+            return None
+        return sim.delay(duration)
+
+    def play_notes(self, notes, tempo=120):
+        notes = list(notes)
+        sim.record("speaker", "play_notes", notes, tempo)
+        # A quarter note lasts one beat
+        return sim.delay(len(notes) * 60000 // tempo)
+
+
+class _System:
+    def set_stop_button(self, button):
+        sim.set_stop_buttons(button)
+        sim.record("system", "set_stop_button", button)
+
+    def name(self):
+        return "simhub"
+
+    def shutdown(self):
+        sim.record("system", "shutdown")
+        raise SystemExit
+
+    def reset_reason(self):
+        return 0
+
+
+class _IMU:
+    def __init__(self):
+        self._heading_offset = 0
+
+    def heading(self):
+        angle = sim.drive_bases[0].angle() if sim.drive_bases else 0
+        return angle - self._heading_offset
+
+    def reset_heading(self, angle):
+        self._heading_offset = self.heading() + self._heading_offset - angle
+
+    def ready(self):
+        return True
+
+    def stationary(self):
+        return True
+
+    def tilt(self):
+        return (0, 0)
+
+    def acceleration(self, axis=None):
+        return 0 if axis is not None else Matrix([[0], [0], [9806.65]])
+
+    def angular_velocity(self, axis=None):
+        return 0 if axis is not None else Matrix([[0], [0], [0]])
+
+    def up(self):
+        return "TOP"
+
+
+class _Battery:
+    def voltage(self):
+        return 8000
+
+    def current(self):
+        return 100
+
+
+class PrimeHub:
+    """
+    The SPIKE Prime hub. All instances share the simulation state, just
+    like creating PrimeHub() twice on the robot talks to the same hub.
+    """
+
+    def __init__(self, top_side=Axis.Z, front_side=Axis.X,
+                 broadcast_channel=None, observe_channels=[]):
+        self.display = _Display()
+        self.buttons = _Buttons()
+        self.light = _Light()
+        self.speaker = _Speaker()
+        self.system = _System()
+        self.imu = _IMU()
+        self.battery = _Battery()
+
+
+InventorHub = PrimeHub
@@ -0,0 +1,115 @@
+"""Stand-in for pybricks.parameters."""
+
+from pybricks.tools import Matrix
+
+
+class _Constant:
+    """A named constant that prints like the firmware ones."""
+
+    def __init__(self, group, name):
+        self._group = group
+        self.name = name
+
+    def __repr__(self):
+        return self._group + "." + self.name
+
+    __str__ = __repr__
+
+
+def _constants(cls, names):
+    for name in names:
+        setattr(cls, name, _Constant(cls.__name__, name))
+    return cls
+
+
+class Button:
+    pass
+
+
+class Port:
+    pass
+
+
+class Direction:
+    pass
+
+
+class Stop:
+    pass
+
+
+class Axis:
+    pass
+
+
+class Side:
+    pass
+
+
+_constants(Button, ("LEFT", "RIGHT", "CENTER", "BLUETOOTH", "UP", "DOWN",
+                    "LEFT_UP", "LEFT_DOWN", "RIGHT_UP", "RIGHT_DOWN",
+                    "BEACON"))
+_constants(Port, ("A", "B", "C", "D", "E", "F"))
+_constants(Direction, ("CLOCKWISE", "COUNTERCLOCKWISE"))
+_constants(Stop, ("COAST", "COAST_SMART", "BRAKE", "HOLD", "NONE"))
+_constants(Axis, ("X", "Y", "Z"))
+_constants(Side, ("TOP", "BOTTOM", "FRONT", "BACK", "LEFT", "RIGHT"))
+
+
+class Color:
+    """A color given by hue, saturation and value."""
+
+    def __init__(self, h, s=100, v=100):
+        self.h = h
+        self.s = s
+        self.v = v
+
+    def __eq__(self, other):
+        return (isinstance(other, Color)
+                and (self.h, self.s, self.v) == (other.h, other.s, other.v))
+
+    def __hash__(self):
+        return hash((self.h, self.s, self.v))
+
+    def __repr__(self):
+        return "Color(h={}, s={}, v={})".format(self.h, self.s, self.v)
+
+
+Color.NONE = Color(0, 0, 0)
+Color.BLACK = Color(0, 0, 10)
+Color.GRAY = Color(0, 0, 50)
+Color.WHITE = Color(0, 0, 100)
+Color.RED = Color(0, 100, 100)
+Color.ORANGE = Color(30, 100, 100)
+Color.BROWN = Color(30, 100, 50)
+Color.YELLOW = Color(60, 100, 100)
+Color.GREEN = Color(120, 100, 100)
+Color.CYAN = Color(180, 100, 100)
+Color.BLUE = Color(240, 100, 100)
+Color.VIOLET = Color(270, 100, 100)
+Color.MAGENTA = Color(300, 100, 100)
+
+
+def _icon(*rows):
+    return Matrix([[100 if c == "#" else 0 for c in row] for row in rows])
+
+
+class Icon:
+    EMPTY = _icon("     ", "     ", "     ", "     ", "     ")
+    FULL = _icon("#####", "#####", "#####", "#####", "#####")
+    UP = _icon("  #  ", " ### ", "## ##", "#   #", "     ")
+    DOWN = _icon("     ", "#   #", "## ##", " ### ", "  #  ")
+    LEFT = _icon("  ## ", " ##  ", "##   ", " ##  ", "  ## ")
+    RIGHT = _icon(" ##  ", "  ## ", "   ##", "  ## ", " ##  ")
+    ARROW_UP = _icon("  #  ", " ### ", "# # #", "  #  ", "  #  ")
+    ARROW_DOWN = _icon("  #  ", "  #  ", "# # #", " ### ", "  #  ")
+    ARROW_LEFT = _icon("  #  ", " #   ", "#####", " #   ", "  #  ")
+    ARROW_RIGHT = _icon("  #  ", "   # ", "#####", "   # ", "  #  ")
+    TRUE = _icon("     ", "    #", "   # ", "# #  ", " #   ")
+    FALSE = _icon("#   #", " # # ", "  #  ", " # # ", "#   #")
+    SQUARE = _icon("#####", "#   #", "#   #", "#   #", "#####")
+    CIRCLE = _icon(" ### ", "#   #", "#   #", "#   #", " ### ")
+    PAUSE = _icon("## ##", "## ##", "## ##", "## ##", "## ##")
+    HEART = _icon(" # # ", "#####", "#####", " ### ", "  #  ")
+    HAPPY = _icon("     ", " # # ", "     ", "#   #", " ### ")
+    SAD = _icon("     ", " # # ", "     ", " ### ", "#   #")
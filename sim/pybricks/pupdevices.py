@@ -0,0 +1,150 @@
+"""Stand-in for pybricks.pupdevices."""
+
+from pybricks_sim import sim, trapezoid_time
+from pybricks.parameters import Direction, Stop
+
+
+class _Control:
+    """Motor controller settings."""
+
+    def __init__(self, speed, acceleration):
+        self._speed = speed
+        self._acceleration = acceleration
+
+    def limits(self, speed=None, acceleration=None, torque=None):
+        if speed is None and acceleration is None and torque is None:
+            return (self._speed, self._acceleration, 560)
+        if speed is not None:
+            self._speed = speed
+        if acceleration is not None:
+            self._acceleration = acceleration
+
+
+class Motor:
+    """
+    A motor that moves with an ideal trapezoidal speed profile. The angle is
+    interpolated from the virtual clock while a move is in progress.
+    """
+
+    def __init__(self, port, positive_direction=Direction.CLOCKWISE,
+                 gears=None, reset_angle=True, profile=None):
+        self.port = port
+        self.control = _Control(1000, 2000)
+        # Move in progress as (start time, end time, start angle, end angle)
+        self._move = None
+        # Unbounded run as (start time, start angle, speed)
+        self._run = None
+        self._angle = 0
+        self._end_speed = 0
+
+    def _log(self, action, *args):
+        sim.record("motor " + str(self.port), action, *args)
+
+    def angle(self):
+        now = sim.now
+        if self._run is not None:
+            start, angle, speed = self._run
+            return round(angle + speed * (now - start) / 1000)
+        if self._move is not None:
+            start, end, a0, a1 = self._move
+            if now >= end:
+                self._angle = a1
+                self._move = None
+            else:
+                return round(a0 + (a1 - a0) * (now - start) / (end - start))
+        return round(self._angle)
+
+    def speed(self):
+        if self._run is not None:
+            return self._run[2]
+        if self._move is not None and sim.now < self._move[1]:
+            start, end, a0, a1 = self._move
+            return round(1000 * (a1 - a0) / (end - start))
+        return 0
+
+    def reset_angle(self, angle=0):
+        self._freeze()
+        self._angle = angle
+
+    def _freeze(self):
+        """Stop any motion and keep the current angle."""
+        self._angle = self.angle()
+        self._move = None
+        self._run = None
+        self._end_speed = 0
+
+    def stop(self):
+        self._freeze()
+        self._log("stop")
+
+    def brake(self):
+        self._freeze()
+        self._log("brake")
+
+    def hold(self):
+        self._freeze()
+        self._log("hold")
+
+    def done(self):
+        return self._run is None and (self._move is None
+                                      or sim.now >= self._move[1])
+
+    def stalled(self):
+        return False
+
+    def load(self):
+        return 0
+
+    def dc(self, duty):
+        self._freeze()
+        self._run = (sim.now, self._angle, duty * 10)
+        self._log("dc", duty)
+
+    def run(self, speed):
+        self._freeze()
+        self._run = (sim.now, self._angle, speed)
+        self._log("run", speed)
+
+    def _move_to(self, target, speed, then, wait):
+        start = self.angle()
+        start_speed = self._end_speed if self.done() else self.speed()
+        self._freeze()
+        speed, acceleration = abs(speed), self.control.limits()[1]
+        end_speed = speed if then == Stop.NONE else 0
+        duration = trapezoid_time(target - start, speed, acceleration,
+                                  start_speed, end_speed)
+        self._move = (sim.now, sim.now + duration, start, target)
+        self._end_speed = end_speed
+        if not wait:
+            return None
+        return sim.delay(duration, on_cancel=self.stop)
+
+    def run_angle(self, speed, rotation_angle, then=Stop.HOLD, wait=True):
+        self._log("run_angle", speed, rotation_angle, then)
+        direction = -1 if speed < 0 else 1
+        return self._move_to(self.angle() + direction * rotation_angle,
+                             speed, then, wait)
+
+    def run_target(self, speed, target_angle, then=Stop.HOLD, wait=True):
+        self._log("run_target", speed, target_angle, then)
+        return self._move_to(target_angle, speed, then, wait)
+
+    def run_time(self, speed, time, then=Stop.HOLD, wait=True):
+        self._log("run_time", speed, time, then)
+        self._freeze()
+        self._move = (sim.now, sim.now + time, self._angle,
+                      self._angle + speed * time / 1000)
+        if not wait:
+            return None
+        return sim.delay(time, on_cancel=self.stop)
+
+    def run_until_stalled(self, speed, then=Stop.COAST, duty_limit=None):
+        self._log("run_until_stalled", speed, then)
+        # Nothing to stall against: pretend it stalls after one turn
+        return self._move_to(self.angle() + (360 if speed >= 0 else -360),
+                             speed, then, True)
+
+    def track_target(self, target_angle):
+        self._freeze()
+        self._angle = target_angle
+        self._log("track_target", target_angle)
@@ -0,0 +1,160 @@
+"""Stand-in for pybricks.robotics."""
+
+from pybricks_sim import sim, trapezoid_time
+from pybricks.parameters import Stop
+
+
+class DriveBase:
+    """
+    A drive base with ideal trapezoidal motion profiles. Distance and angle
+    are interpolated from the virtual clock while a move is in progress.
+    """
+
+    def __init__(self, left_motor, right_motor, wheel_diameter, axle_track):
+        self.left = left_motor
+        self.right = right_motor
+        self.wheel_diameter = wheel_diameter
+        self.axle_track = axle_track
+        self._settings = [300, 700, 180, 720]
+        self._gyro = False
+        # Move in progress as (start, end, start distance, end distance,
+        # start angle, end angle)
+        self._move = None
+        # Unbounded drive as (start, distance, angle, speed, turn_rate)
+        self._drive = None
+        self._distance = 0
+        self._angle = 0
+        # Speed left over from a move that ended with Stop.NONE, as
+        # (kind of move, speed)
+        self._carry = None
+        sim.drive_bases.append(self)
+
+    def _log(self, action, *args):
+        sim.record("drivebase", action, *args)
+
+    def _state(self):
+        now = sim.now
+        if self._drive is not None:
+            start, d, a, speed, rate = self._drive
+            t = (now - start) / 1000
+            return d + speed * t, a + rate * t
+        if self._move is not None:
+            start, end, d0, d1, a0, a1 = self._move
+            if now >= end:
+                self._distance, self._angle = d1, a1
+                self._move = None
+            else:
+                f = (now - start) / (end - start)
+                return d0 + (d1 - d0) * f, a0 + (a1 - a0) * f
+        return self._distance, self._angle
+
+    def distance(self):
+        return round(self._state()[0])
+
+    def angle(self):
+        return round(self._state()[1])
+
+    def state(self):
+        distance, angle = self._state()
+        return (round(distance), 0, round(angle), 0)
+
+    def reset(self, distance=0, angle=0):
+        self._freeze()
+        self._distance = distance
+        self._angle = angle
+
+    def settings(self, straight_speed=None, straight_acceleration=None,
+                 turn_rate=None, turn_acceleration=None):
+        values = (straight_speed, straight_acceleration, turn_rate,
+                  turn_acceleration)
+        if all(v is None for v in values):
+            return tuple(self._settings)
+        for i, v in enumerate(values):
+            if v is not None:
+                self._settings[i] = v
+
+    def use_gyro(self, use_gyro):
+        self._gyro = use_gyro
+        self._log("use_gyro", use_gyro)
+
+    def done(self):
+        return self._drive is None and (self._move is None
+                                        or sim.now >= self._move[1])
+
+    def stalled(self):
+        return False
+
+    def _freeze(self):
+        self._distance, self._angle = self._state()
+        self._move = None
+        self._drive = None
+        self._carry = None
+
+    def stop(self):
+        self._freeze()
+        self._log("stop")
+
+    def brake(self):
+        self._freeze()
+        self._log("brake")
+
+    def drive(self, speed, turn_rate):
+        self._freeze()
+        self._drive = (sim.now, self._distance, self._angle, speed, turn_rate)
+        self._log("drive", speed, turn_rate)
+
+    def _start_speed(self, kind):
+        """Speed carried over from the previous move if it blends in."""
+        if self._carry is not None and self._carry[0] == kind:
+            return self._carry[1]
+        return 0
+
+    def _start(self, kind, distance, angle, duration, end_speed, wait):
+        start_distance, start_angle = self._state()
+        self._freeze()
+        self._move = (sim.now, sim.now + duration,
+                      start_distance, start_distance + distance,
+                      start_angle, start_angle + angle)
+        self._carry = (kind, end_speed) if end_speed else None
+        if not wait:
+            return None
+        return sim.delay(duration, on_cancel=self.stop)
+
+    def straight(self, distance, then=Stop.HOLD, wait=True):
+        self._log("straight", distance, then)
+        speed, acceleration = self._settings[0], self._settings[1]
+        end_speed = speed if then == Stop.NONE else 0
+        start_speed = self._start_speed("straight")
+        duration = trapezoid_time(distance, speed, acceleration,
+                                  start_speed, end_speed)
+        return self._start("straight", distance, 0, duration, end_speed, wait)
+
+    def turn(self, angle, then=Stop.HOLD, wait=True):
+        self._log("turn", angle, then)
+        rate, acceleration = self._settings[2], self._settings[3]
+        end_speed = rate if then == Stop.NONE else 0
+        start_speed = self._start_speed("turn")
+        duration = trapezoid_time(angle, rate, acceleration,
+                                  start_speed, end_speed)
+        return self._start("turn", 0, angle, duration, end_speed, wait)
+
+    def curve(self, radius, angle, then=Stop.HOLD, wait=True):
+        self._log("curve", radius, angle, then)
+        distance = 3.141592653589793 * radius * angle / 180
+        speed, acceleration = self._settings[0], self._settings[1]
+        end_speed = speed if then == Stop.NONE else 0
+        start_speed = self._start_speed("straight")
+        duration = trapezoid_time(distance, speed, acceleration,
+                                  start_speed, end_speed)
+        return self._start("straight", abs(distance), angle, duration,
+                           end_speed, wait)
+
+    def arc(self, radius, angle=None, distance=None, then=Stop.HOLD,
+            wait=True):
+        if angle is None:
+            angle = distance * 180 / (3.141592653589793 * radius)
+        return self.curve(radius, angle, then, wait)
+
+
+class GyroDriveBase(DriveBase):
+    pass
@@ -0,0 +1,108 @@
+"""Stand-in for pybricks.tools."""
+
+from pybricks_sim import sim
+
+
+def wait(time):
+    """Pause for `time` ms of virtual time. Awaitable inside run_task()."""
+    return sim.wait(time)
+
+
+def multitask(*tasks, race=False):
+    """Run tasks at the same time. Only valid inside run_task()."""
+    return sim.multitask(*tasks, race=race)
+
+
+def run_task(task, loop_time=None):
+    """Run a coroutine to completion against the virtual clock."""
+    return sim.run_task(task, loop_time)
+
+
+class StopWatch:
+    """A stopwatch that reads the virtual clock."""
+
+    def __init__(self):
+        self._start = sim.now
+        self._paused_at = None
+
+    def time(self):
+        if self._paused_at is not None:
+            return self._paused_at - self._start
+        return sim.now - self._start
+
+    def pause(self):
+        if self._paused_at is None:
+            self._paused_at = sim.now
+
+    def resume(self):
+        if self._paused_at is not None:
+            self._start += sim.now - self._paused_at
+            self._paused_at = None
+
+    def reset(self):
+        self._start = sim.now
+        if self._paused_at is not None:
+            self._paused_at = sim.now
+
+
+class Matrix:
+    """A 2D matrix of floats, as used for display frames."""
+
+    def __init__(self, rows):
+        self._rows = tuple(tuple(float(v) for v in row) for row in rows)
+        self.shape = (len(self._rows), len(self._rows[0]) if self._rows else 0)
+
+    def __getitem__(self, index):
+        row, col = index
+        return self._rows[row][col]
+
+    def __len__(self):
+        return self.shape[0] * self.shape[1]
+
+    def __iter__(self):
+        for row in self._rows:
+            yield from row
+
+    def __mul__(self, other):
+        if isinstance(other, Matrix):
+            cols = list(zip(*other._rows))
+            return Matrix([[sum(a * b for a, b in zip(row, col))
+                            for col in cols] for row in self._rows])
+        return Matrix([[v * other for v in row] for row in self._rows])
+
+    __rmul__ = __mul__
+
+    def __add__(self, other):
+        return Matrix([[a + b for a, b in zip(r1, r2)]
+                       for r1, r2 in zip(self._rows, other._rows)])
+
+    def __sub__(self, other):
+        return Matrix([[a - b for a, b in zip(r1, r2)]
+                       for r1, r2 in zip(self._rows, other._rows)])
+
+    def __neg__(self):
+        return self * -1
+
+    def __eq__(self, other):
+        return isinstance(other, Matrix) and self._rows == other._rows
+
+    def __hash__(self):
+        return hash(self._rows)
+
+    @property
+    def T(self):
+        return Matrix(list(zip(*self._rows)))
+
+    def rows(self):
+        """Return the values as a list of lists. Not in the firmware API."""
+        return [list(row) for row in self._rows]
+
+    def __repr__(self):
+        return "Matrix([\n" + ",\n".join(
+            "    [" + ", ".join("{:6.2f}".format(v) for v in row) + "]"
+            for row in self._rows) + ",\n])"
+
+
+def vector(*values):
+    """Make a column Matrix from the given values."""
+    return Matrix([[v] for v in values])
@@ -0,0 +1,277 @@
+"""
+Simulation core behind the pybricks stand-in modules in sim/pybricks.
+
+Put the sim directory first on sys.path (run_sim.py does this) and robot
+programs import these modules instead of the firmware ones. Time is
+virtual: wait(1000) moves the clock forward 1000 ms and returns straight
+away. Everything the program does to the hub is recorded in `sim.log` as
+(time, source, action, args) tuples.
+
+Example:
+    from pybricks_sim import sim
+    from pybricks.parameters import Button
+
+    sim.reset(limit=10000)
+    sim.press(Button.RIGHT, at=200)
+    sim.press(Button.CENTER, at=500)
+"""
+
+
+class SimulationEnd(BaseException):
+    """Raised when the virtual clock passes the time limit of the run."""
+
+
+class Timer:
+    """An awaitable that completes when the virtual clock reaches `end`."""
+
+    def __init__(self, sim, end, on_cancel=None):
+        self.sim = sim
+        self.end = end
+        self.on_cancel = on_cancel
+
+    def __await__(self):
+        try:
+            while self.sim.now < self.end:
+                yield self.end
+        except GeneratorExit:
+            if self.on_cancel is not None:
+                self.on_cancel()
+            raise
+
+    __iter__ = __await__
+
+
+class MultiTask:
+    """Awaitable returned by multitask(), see Simulation.multitask()."""
+
+    def __init__(self, tasks, race):
+        self.tasks = [t if hasattr(t, "send") else t.__await__() for t in tasks]
+        self.race = race
+
+    def __await__(self):
+        tasks = self.tasks
+        results = [None] * len(tasks)
+        pending = list(range(len(tasks)))
+        try:
+            while True:
+                earliest = None
+                poll_again = False
+                for i in list(pending):
+                    try:
+                        deadline = tasks[i].send(None)
+                    except StopIteration as e:
+                        results[i] = e.value
+                        pending.remove(i)
+                        if self.race:
+                            return results
+                        continue
+                    if deadline is None:
+                        poll_again = True
+                    elif earliest is None or deadline < earliest:
+                        earliest = deadline
+                if not pending:
+                    return results
+                yield None if poll_again else earliest
+        finally:
+            for i in pending:
+                tasks[i].close()
+
+    __iter__ = __await__
+
+
+class Simulation:
+    """
+    Virtual clock, scripted buttons and event log shared by all simulated
+    devices. There is a single instance, `sim`, because a program only ever
+    runs on one hub.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self, limit=None, loop_time=10):
+        """
+        Start a new run.
+
+        Args:
+            limit: Virtual time in ms after which SimulationEnd is raised.
+                   If None, the run never times out.
+            loop_time: Scheduler period of run_task() in ms.
+        """
+        self.now = 0
+        self.limit = limit
+        self.loop_time = loop_time
+        self.log = []
+        self.presses = []
+        # None means the firmware default, CENTER
+        self.stop_buttons = None
+        self.async_depth = 0
+        self.drive_bases = []
+        self._stopped = set()
+
+    # Recording
+
+    def record(self, source, action, *args):
+        """Append an entry to the event log."""
+        self.log.append((self.now, source, action, args))
+
+    def events(self, source=None, action=None):
+        """Return the log entries matching the given source and action."""
+        return [
+            e for e in self.log
+            if (source is None or e[1] == source)
+            and (action is None or e[2] == action)
+        ]
+
+    # Buttons
+
+    def press(self, button, at, duration=100):
+        """
+        Script a button press.
+
+        Args:
+            button: The Button to press.
+            at: Virtual time in ms at which the button goes down.
+            duration: How long the button is held in ms.
+        """
+        self.presses.append((at, at + duration, button))
+
+    def pressed(self):
+        """Return the set of buttons held at the current virtual time."""
+        now = self.now
+        return {b for (start, end, b) in self.presses if start <= now < end}
+
+    def set_stop_buttons(self, buttons):
+        """Set the buttons that stop the program, as in set_stop_button()."""
+        if buttons is None:
+            self.stop_buttons = ()
+        elif isinstance(buttons, (tuple, list, set, frozenset)):
+            self.stop_buttons = tuple(buttons)
+        else:
+            self.stop_buttons = (buttons,)
+
+    # Time
+
+    def advance(self, ms):
+        """Move the clock forward by `ms`. See advance_to()."""
+        self.advance_to(self.now + ms)
+
+    def advance_to(self, t):
+        """
+        Move the clock forward to `t`.
+
+        Raises:
+            SystemExit: A stop button was pressed on the way. The clock is
+                        left at the time of the press.
+            SimulationEnd: The time limit was passed.
+        """
+        if t <= self.now:
+            return
+        stop_buttons = self.stop_buttons
+        if stop_buttons is None:
+            from pybricks.parameters import Button
+            stop_buttons = (Button.CENTER,)
+        stop_at = None
+        for i, (start, end, button) in enumerate(self.presses):
+            if (button in stop_buttons and self.now < start <= t
+                    and i not in self._stopped
+                    and (stop_at is None or start < stop_at[0])):
+                stop_at = (start, i)
+        if stop_at is not None and (self.limit is None
+                                    or stop_at[0] <= self.limit):
+            self.now = stop_at[0]
+            self._stopped.add(stop_at[1])
+            self.record("system", "stop")
+            raise SystemExit
+        if self.limit is not None and t > self.limit:
+            self.now = self.limit
+            raise SimulationEnd
+        self.now = t
+
+    def delay(self, ms, on_cancel=None):
+        """
+        Spend `ms` of virtual time the way a Pybricks method does.
+
+        Outside run_task() the clock moves forward and None is returned.
+        Inside run_task() an awaitable is returned instead, and `on_cancel`
+        is called if the awaiting task is cancelled before it completes.
+        """
+        if self.async_depth:
+            return Timer(self, self.now + ms, on_cancel)
+        self.advance(ms)
+        return None
+
+    def wait(self, time):
+        """pybricks.tools.wait()"""
+        return self.delay(max(0, time))
+
+    def multitask(self, *tasks, race=False):
+        """
+        pybricks.tools.multitask(): run tasks together and return their
+        results. With race=True, the remaining tasks are cancelled as soon
+        as one finishes.
+        """
+        return MultiTask(tasks, race)
+
+    def run_task(self, task, loop_time=None):
+        """
+        pybricks.tools.run_task(): run a coroutine to completion.
+
+        The tasks are polled every loop_time ms like on the hub. When every
+        task is sleeping, the clock jumps straight to the earliest wake up.
+        """
+        if loop_time is None:
+            loop_time = self.loop_time
+        self.async_depth += 1
+        try:
+            while True:
+                try:
+                    deadline = task.send(None)
+                except StopIteration as e:
+                    return e.value
+                step = self.now + loop_time
+                if deadline is not None and deadline > step:
+                    step = deadline
+                try:
+                    self.advance_to(step)
+                except BaseException:
+                    task.close()
+                    raise
+        finally:
+            self.async_depth -= 1
+
+
+def trapezoid_time(distance, speed, acceleration, start_speed=0, end_speed=0):
+    """
+    Time in whole ms to cover `distance` with a trapezoidal speed profile.
+
+    Args:
+        distance: Distance to travel (any unit, sign is ignored).
+        speed: Cruise speed in units per second.
+        acceleration: Acceleration and deceleration in units per second².
+        start_speed: Speed at the start of the move.
+        end_speed: Speed at the end of the move.
+    """
+    distance = abs(distance)
+    speed = abs(speed)
+    if distance == 0 or speed == 0:
+        return 0
+    start_speed = min(abs(start_speed), speed)
+    end_speed = min(abs(end_speed), speed)
+    if not acceleration:
+        return round(1000 * distance / speed)
+    ramp_up = (speed * speed - start_speed * start_speed) / (2 * acceleration)
+    ramp_down = (speed * speed - end_speed * end_speed) / (2 * acceleration)
+    if ramp_up + ramp_down <= distance:
+        cruise = distance - ramp_up - ramp_down
+        t = ((speed - start_speed) + (speed - end_speed)) / acceleration
+        return round(1000 * (t + cruise / speed))
+    # Never reaches cruise speed: solve for the peak speed
+    peak_squared = (2 * acceleration * distance
+                    + start_speed * start_speed + end_speed * end_speed) / 2
+    peak = max(peak_squared, 0) ** 0.5
+    t = ((peak - start_speed) + (peak - end_speed)) / acceleration
+    return round(1000 * t)
+
+
+sim = Simulation()
@@ -0,0 +1,161 @@
+"""
+Run a robot program on the host against the simulated pybricks modules.
+
+Usage:
+    python sim/run_sim.py menu_manager.py --press 500:right --press 900:center
+    python sim/run_sim.py blocks.py --until 60000 --log
+    python sim/run_sim.py menu_example.py --press 500:center --mem
+
+Button presses are given as TIME:BUTTON[:DURATION] in ms of virtual time.
+The program runs until it finishes, is stopped by a stop button, or the
+virtual clock passes --until. A summary of the run is printed at the end and
+can also be saved as JSON. With --mem, menus report the heap use of
+navigation, rendering and item runs, measured with tracemalloc.
+"""
+import argparse
+import json
+import os
+import runpy
+import sys
+import time
+
+SIM_DIR = os.path.dirname(os.path.abspath(__file__))
+if SIM_DIR not in sys.path:
+    sys.path.insert(0, SIM_DIR)
+
+from pybricks_sim import SimulationEnd, sim  # noqa: E402
+from pybricks.parameters import Button  # noqa: E402
+
+
+def parse_press(text):
+    """Parse a TIME:BUTTON[:DURATION] press into (button, at, duration)."""
+    parts = text.split(":")
+    if len(parts) not in (2, 3):
+        raise argparse.ArgumentTypeError(
+            "expected TIME:BUTTON[:DURATION], got " + repr(text))
+    try:
+        button = getattr(Button, parts[1].upper())
+    except AttributeError:
+        raise argparse.ArgumentTypeError("unknown button " + repr(parts[1]))
+    duration = int(parts[2]) if len(parts) == 3 else 100
+    return button, int(parts[0]), duration
+
+
+def run_program(path, presses=(), until=None, profile=False):
+    """
+    Run a program file as __main__ on a fresh simulation.
+
+    Args:
+        path: Path of the program to run.
+        presses: Iterable of (button, at, duration) button presses.
+        until: Virtual time limit in ms, or None for no limit.
+        profile: If True, profile the heap use of every Menu the program
+                 creates.
+
+    Returns:
+        dict: Summary with the exit reason, virtual and wall time and the
+              number of logged events per source. With profile, "mem" has
+              the MemProfiler stats by section.
+    """
+    path = os.path.abspath(path)
+    program_dir = os.path.dirname(path)
+    if program_dir not in sys.path:
+        sys.path.insert(1, program_dir)
+    profiler = None
+    if profile:
+        import mem_profile
+        profiler = mem_profile.enable(tracing=True)
+
+    sim.reset(limit=until)
+    for button, at, duration in presses:
+        sim.press(button, at, duration)
+
+    start = time.perf_counter()
+    try:
+        runpy.run_path(path, run_name="__main__")
+        reason = "completed"
+    except SystemExit:
+        reason = "stopped"
+    except SimulationEnd:
+        reason = "time limit"
+    finally:
+        if profiler is not None:
+            mem_profile.disable()
+    wall = time.perf_counter() - start
+
+    counts = {}
+    for entry in sim.log:
+        counts[entry[1]] = counts.get(entry[1], 0) + 1
+    summary = {
+        "program": os.path.relpath(path),
+        "exit": reason,
+        "virtual_ms": sim.now,
+        "wall_ms": round(wall * 1000, 3),
+        "events": counts,
+    }
+    if profiler is not None:
+        summary["mem"] = profiler.stats()
+    return summary
+
+
+def to_json(value):
+    """Convert a logged value to JSON types. Matrices become nested lists."""
+    if isinstance(value, (int, float, str, bool)) or value is None:
+        return value
+    if isinstance(value, (list, tuple)):
+        return [to_json(v) for v in value]
+    if hasattr(value, "rows"):
+        return [[round(v) for v in row] for row in value.rows()]
+    return str(value)
+
+
+def log_as_json():
+    """Return the event log with every value converted to JSON types."""
+    return [[t, source, action, to_json(args)]
+            for t, source, action, args in sim.log]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("program", help="program file to run")
+    parser.add_argument("--press", action="append", type=parse_press,
+                        default=[], metavar="TIME:BUTTON[:DURATION]",
+                        help="script a button press (repeatable)")
+    parser.add_argument("--until", type=int, default=60000,
+                        help="virtual time limit in ms (default 60000)")
+    parser.add_argument("--log", action="store_true",
+                        help="print the event log")
+    parser.add_argument("--mem", action="store_true",
+                        help="profile the heap use of the menu")
+    parser.add_argument("--json", metavar="FILE",
+                        help="save the summary and event log as JSON")
+    args = parser.parse_args()
+
+    summary = run_program(args.program, args.press, args.until, args.mem)
+
+    if args.log:
+        for t, source, action, values in sim.log:
+            print("{:>8} {:<16} {} {}".format(
+                t, source, action, json.dumps(to_json(values))[1:-1]))
+    print("[sim] {program}: {exit} after {virtual_ms} ms virtual, "
+          "{wall_ms} ms wall".format(**summary))
+    print("[sim] events: " + ", ".join(
+        "{} {}".format(count, source)
+        for source, count in sorted(summary["events"].items())))
+    if args.mem:
+        print("[sim] heap per call in bytes (tracemalloc):")
+        print("{:<24} {:>6} {:>10} {:>10} {:>10}".format(
+            "section", "calls", "mean", "max", "peak"))
+        for section, (count, total, most, peak, _) in sorted(
+                summary["mem"].items()):
+            print("{:<24} {:>6} {:>10} {:>10} {:>10}".format(
+                section, count, total // count, most, peak))
+
+    if args.json:
+        summary["log"] = log_as_json()
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+try:
+    from typing import Callable, Optional
+except ImportError:
+    pass
+
+try:
+    import ustruct as struct
+except ImportError:
+    import struct
+
+try:
+    from ubinascii import b2a_base64
+except ImportError:
+    try:
+        from binascii import b2a_base64
+    except ImportError:
+        b2a_base64 = None
+
+from pybricks.tools import StopWatch, wait
+
+# Prefix of the line describing the signals, printed by start()
+SCHEMA_PREFIX = '@tlmdef'
+
+# Prefix of every frame line
+PREFIX = '@tlm'
+
+# Frame header: sequence number, number of rows, time of the first row
+HEADER = '<HBI'
+
+# Each row starts with its time in ms after the first row of the frame
+ROW_TIME = '<H'
+
+HEADER_SIZE = struct.calcsize(HEADER)
+
+# Smallest and largest value of each signal format
+LIMITS = {
+    'b': (-0x80, 0x7F),
+    'h': (-0x8000, 0x7FFF),
+    'i': (-0x80000000, 0x7FFFFFFF),
+}
+
+_ALPHABET = b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+
+
+def _base64(data) -> str:
+    """Encode bytes as base64 where binascii is not available."""
+    out = bytearray()
+    for i in range(0, len(data) - 2, 3):
+        n = data[i] << 16 | data[i + 1] << 8 | data[i + 2]
+        out.append(_ALPHABET[n >> 18])
+        out.append(_ALPHABET[n >> 12 & 63])
+        out.append(_ALPHABET[n >> 6 & 63])
+        out.append(_ALPHABET[n & 63])
+    rest = len(data) % 3
+    if rest:
+        n = data[len(data) - rest] << 16
+        if rest == 2:
+            n |= data[len(data) - 1] << 8
+        out.append(_ALPHABET[n >> 18])
+        out.append(_ALPHABET[n >> 12 & 63])
+        out.append(_ALPHABET[n >> 6 & 63] if rest == 2 else 61)
+        out.append(61)
+    return out.decode()
+
+
+def encode(data) -> str:
+    """Encode a frame as base64 text for print()."""
+    if b2a_base64 is None:
+        return _base64(data)
+    return b2a_base64(data).decode().rstrip()
+
+
+class Telemetry:
+    """
+    Samples signals into a fixed buffer and prints them as compact frames.
+
+    Signals are functions returning a number, such as drive_base.angle.
+    Every sample is one row of the buffer: the time and one packed integer
+    per signal. The buffer is printed as one base64 line, starting with
+    PREFIX, every `flush_interval` ms or when it is full. start() prints a
+    SCHEMA_PREFIX line first, naming the signals and their formats, so the
+    host can decode the frames (see .vscode/telemetry_decode.py).
+
+    Rows are packed into a bytearray allocated by start(), so sampling
+    creates no objects. Only a flush does, once per frame. A value outside
+    the range of its format is stored as the nearest value that fits, and
+    counted in `clamped`, so a large reading cannot stop the mission.
+
+    Example:
+        telemetry = Telemetry(period=20)
+        telemetry.add_drive_base(drive_base)
+        telemetry.add('arm', arm.angle)
+        telemetry.start()
+        while not drive_base.done():
+            telemetry.sample()
+            wait(5)
+        telemetry.stop()
+    """
+
+    def __init__(self, period: int = 20, flush_interval: int = 250,
+                 rows: int = 16,
+                 clock: Optional[Callable[[], int]] = None):
+        """
+        Initialize the stream.
+
+        Args:
+            period: Time in ms between samples.
+            flush_interval: Time in ms between frames.
+            rows: Number of samples a frame holds. A full frame is printed
+                  straight away.
+            clock: Function returning the time in ms. If None, a StopWatch
+                   is used.
+        """
+        if not 0 < rows < 256:
+            raise ValueError('A frame holds 1 to 255 rows')
+        self.period = period
+        self.flush_interval = flush_interval
+        self.rows = rows
+        self.clock = clock if clock is not None else StopWatch().time
+        self.sequence = 0
+        self.clamped = 0
+        self._signals = []
+        self._buffer = None
+        self._layout = None
+        self._row_size = 0
+        self._count = 0
+        self._first = 0
+        self._next_sample = 0
+        self._next_flush = 0
+
+    def add(self, name: str, read: Callable[[], float], fmt: str = 'i',
+            scale: int = 1):
+        """
+        Add a signal. Signals cannot be added after start().
+
+        Args:
+            name: Name of the signal, used as the column name on the host.
+            read: Function returning the current value.
+            fmt: struct format of the packed value: 'b', 'h' or 'i'.
+            scale: The value is stored as round(value * scale), so a scale
+                   of 10 keeps one decimal. It is clamped to the range of
+                   fmt, so pick a format wide enough for value * scale.
+        """
+        if self._buffer is not None:
+            raise RuntimeError('Telemetry already started')
+        if fmt not in ('b', 'h', 'i'):
+            raise ValueError("fmt must be 'b', 'h' or 'i'")
+        if ',' in name or ':' in name:
+            raise ValueError("Signal names cannot contain ',' or ':'")
+        self._signals.append((name, read, '<' + fmt, scale))
+
+    def add_drive_base(self, drive_base, name: str = 'drive'):
+        """Add the distance (mm) and heading (deg) of a drive base."""
+        self.add(name + '_distance', drive_base.distance)
+        self.add(name + '_heading', drive_base.angle)
+
+    def add_motor(self, motor, name: str):
+        """Add the angle (deg) of a motor."""
+        self.add(name, motor.angle)
+
+    def row_size(self) -> int:
+        """Return the size of one row in bytes."""
+        size = struct.calcsize(ROW_TIME)
+        for signal in self._signals:
+            size += struct.calcsize(signal[2])
+        return size
+
+    def start(self):
+        """Allocate the buffer and print the schema line."""
+        self._buffer = bytearray(HEADER_SIZE
+                                 + self.rows * self.row_size())
+        # (read, format, scale, offset in the row, lowest, highest) of
+        # every signal
+        offset = struct.calcsize(ROW_TIME)
+        layout = []
+        for name, read, fmt, scale in self._signals:
+            low, high = LIMITS[fmt[1]]
+            layout.append((read, fmt, scale, offset, low, high))
+            offset += struct.calcsize(fmt)
+        self._layout = layout
+        self._row_size = offset
+        self._count = 0
+        now = self.clock()
+        self._next_sample = now
+        self._next_flush = now + self.flush_interval
+        print(','.join([SCHEMA_PREFIX, str(self.period)] + [
+            name + ':' + fmt[1] + ':' + str(scale)
+            for name, read, fmt, scale in self._signals]))
+
+    def sample(self, now: Optional[int] = None):
+        """
+        Take a sample if one is due, and print a frame if one is due.
+
+        Call this at least every `period` ms.
+        """
+        if now is None:
+            now = self.clock()
+        if now >= self._next_sample:
+            self._next_sample += self.period
+            if self._next_sample <= now:
+                # Fell behind: skip the missed samples instead of bursting
+                self._next_sample = now + self.period
+            self._record(now)
+        if now >= self._next_flush:
+            self.flush(now)
+
+    def _record(self, now: int):
+        buffer = self._buffer
+        if self._count == 0:
+            self._first = now
+        delta = now - self._first
+        if delta > 0xFFFF:
+            # The row time would overflow: start a new frame
+            self.flush(now)
+            self._first = now
+            delta = 0
+        offset = HEADER_SIZE + self._count * self._row_size
+        struct.pack_into(ROW_TIME, buffer, offset, delta)
+        for read, fmt, scale, position, low, high in self._layout:
+            value = read()
+            value = round(value * scale) if scale != 1 else int(value)
+            if value < low:
+                value = low
+                self.clamped += 1
+            elif value > high:
+                value = high
+                self.clamped += 1
+            struct.pack_into(fmt, buffer, offset + position, value)
+        self._count += 1
+        if self._count == self.rows:
+            self.flush(now)
+
+    def flush(self, now: Optional[int] = None):
+        """Print the samples taken since the last frame, if any."""
+        if now is None:
+            now = self.clock()
+        self._next_flush = now + self.flush_interval
+        if self._count == 0:
+            return
+        struct.pack_into(HEADER, self._buffer, 0, self.sequence & 0xFFFF,
+                         self._count, self._first & 0xFFFFFFFF)
+        size = HEADER_SIZE + self._count * self._row_size
+        print(PREFIX + ',' + encode(memoryview(self._buffer)[:size]))
+        self.sequence += 1
+        self._count = 0
+
+    def stop(self):
+        """Print the remaining samples."""
+        self.flush()
+
+    async def run(self, token=None):
+        """
+        Sample until cancelled, for use as a task in multitask().
+
+        Args:
+            token: Optional CancelToken. Sampling ends when it is cancelled.
+        """
+        try:
+            while token is None or not token.cancelled:
+                self.sample()
+                await wait(self.period)
+        finally:
+            self.stop()
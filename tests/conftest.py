@@ -0,0 +1,23 @@
+"""
+Test setup: the on-hub modules run against the simulated pybricks modules
+in sim/, and the host tools in .vscode/ are importable by name.
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (os.path.join(ROOT, ".vscode"), ROOT, os.path.join(ROOT, "sim")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from pybricks_sim import sim  # noqa: E402
+
+
+@pytest.fixture
+def simulation():
+    """A fresh simulation, with a 60 s virtual time limit."""
+    sim.reset(limit=60000)
+    yield sim
+    sim.reset()
@@ -0,0 +1,60 @@
+"""
+Stand-in for `pybricksdev run`, used to test the tools in .vscode/ without
+a robot.
+
+    python tests/stub_robot.py NAME FILE [--transcript PATH] [--pause S]
+                               [--hold S] [--exit CODE] [--fail NAME]
+
+Prints a transcript line by line: the given one, or a short upload of FILE
+to robot NAME. After the line that ends the program it waits --pause
+seconds before printing the rest, as pybricksdev does while it still
+forwards output. Then it sleeps --hold seconds and exits with --exit.
+
+With --fail NAME, robot NAME instead prints a traceback and exits with 1,
+so one command line can make a single robot of a fleet fail.
+"""
+import argparse
+import sys
+import time
+
+STOP_MARKERS = ("was stopped", "SystemExit", "Error:")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("name")
+    parser.add_argument("file")
+    parser.add_argument("--transcript")
+    parser.add_argument("--pause", type=float, default=0)
+    parser.add_argument("--hold", type=float, default=0)
+    parser.add_argument("--exit", type=int, default=0)
+    parser.add_argument("--fail", action="append", default=[])
+    args = parser.parse_args()
+
+    if args.transcript:
+        with open(args.transcript, encoding="utf-8", newline="") as f:
+            text = f.read()
+    else:
+        text = ("Connected to {0}\n"
+                "100%|##########| 1.00k/1.00k\n"
+                "Running {1} on {0}\n").format(args.name, args.file)
+    if args.name in args.fail:
+        text += ("Traceback (most recent call last):\n"
+                 "  File \"{}\", line 1, in <module>\n"
+                 "OSError: [Errno 19] ENODEV\n").format(args.file)
+        args.exit = 1
+
+    out = sys.stdout.buffer
+    paused = False
+    for line in text.splitlines(keepends=True):
+        out.write(line.encode("utf-8"))
+        out.flush()
+        if not paused and any(m in line for m in STOP_MARKERS):
+            paused = True
+            time.sleep(args.pause)
+    time.sleep(args.hold)
+    sys.exit(args.exit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Tests for the blocks file parser and code generator."""
+import os
+import re
+
+import blocks_file
+
+
+def block(type, id, fields=None, inputs=None, next=None):
+    data = {"type": type, "id": id, "fields": fields or {}}
+    if inputs:
+        data["inputs"] = {name: {"block": child}
+                          for name, child in inputs.items()}
+    if next is not None:
+        data["next"] = {"block": next}
+    return data
+
+
+def number(id, value):
+    return block("blockMathNumber", id, {"NUM": value})
+
+
+def wait(id):
+    return block("blockWaitTime", id, inputs={"VALUE0": number(id + "n", 10)})
+
+
+def multitask(id, *tasks):
+    return block("blockMultiTask", id, {"METHOD": "MULTITASK_ALL"},
+                 {"TASK{}".format(i): task for i, task in enumerate(tasks)})
+
+
+def program(*statements):
+    first = None
+    for data in reversed(statements):
+        if first is not None:
+            data["next"] = {"block": first}
+        first = data
+    start = block("blockGlobalStart", "start", next=first)
+    return blocks_file.BlockGraph({"blocks": {"blocks": [start]}})
+
+
+def test_repository_blocks_files_match():
+    graph, code = blocks_file.read(os.path.join(blocks_file.ROOT, "blocks.py"))
+    assert blocks_file.check(graph, code) == ("ok", code.strip("\n"))
+
+
+def test_blocks_files_are_found_in_subfolders(tmp_path):
+    header = blocks_file.HEADER + "{}\n"
+    for path in ("top.py", "robot/arm/lift.py", "robot/drive.py",
+                 ".hidden/skipped.py", "__pycache__/skipped.py"):
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text(header)
+    (tmp_path / "robot" / "plain.py").write_text("print('not blocks')\n")
+    found = [os.path.relpath(path, tmp_path).replace(os.sep, "/")
+             for path in blocks_file.blocks_files(str(tmp_path))]
+    assert found == ["top.py", "robot/drive.py", "robot/arm/lift.py"]
+
+
+def test_nested_multitask_defines_each_task_once():
+    repeat = block("blockFlowRepeat", "repeat",
+                   inputs={"TIMES": number("times", 3), "DO": wait("w1")})
+    graph = program(multitask("outer", multitask("inner", repeat), wait("w2")))
+    code = blocks_file.generate(graph)
+    defined = re.findall(r"async def (\w+)\(\):", code)
+    assert defined == ["subtask", "subtask3", "subtask4", "main"]
+    # Names are still taken as if every task were generated twice
+    assert "for count in range(3):" in code
+    assert sorted(re.findall(r"(\w+)\(\),", code)) == [
+        "subtask", "subtask3", "subtask4"]
@@ -0,0 +1,117 @@
+import pytest
+
+from pybricks.hubs import PrimeHub
+from pybricks.parameters import Button
+
+from button_input import ButtonInput, KIND_NAMES, PRESS, RELEASE
+
+
+def collect(simulation, buttons, until):
+    """Return (time, kind name, button) for every event until `until` ms."""
+    events = []
+    while True:
+        event = buttons.wait_event(until - simulation.now)
+        if event is None:
+            return events
+        events.append((simulation.now, KIND_NAMES[event[0]], event[1]))
+
+
+def test_press_and_release(simulation):
+    buttons = ButtonInput(PrimeHub())
+    simulation.press(Button.RIGHT, at=100, duration=200)
+    simulation.press(Button.LEFT, at=400, duration=50)
+    assert collect(simulation, buttons, 1000) == [
+        (100, "press", Button.RIGHT),
+        (300, "release", Button.RIGHT),
+        (400, "press", Button.LEFT),
+        (450, "release", Button.LEFT),
+    ]
+
+
+def test_debounce_ignores_bounces(simulation):
+    buttons = ButtonInput(PrimeHub(), debounce=20)
+    # Contact bounce: down, up after 5 ms, down again 3 ms later
+    simulation.press(Button.RIGHT, at=100, duration=5)
+    simulation.press(Button.RIGHT, at=108, duration=52)
+    assert collect(simulation, buttons, 500) == [
+        (100, "press", Button.RIGHT),
+        (160, "release", Button.RIGHT),
+    ]
+
+
+def test_long_press(simulation):
+    buttons = ButtonInput(PrimeHub(), long_press=700)
+    simulation.press(Button.LEFT, at=100, duration=900)
+    simulation.press(Button.RIGHT, at=1100, duration=300)
+    assert collect(simulation, buttons, 2000) == [
+        (100, "press", Button.LEFT),
+        (800, "long_press", Button.LEFT),
+        (1000, "release", Button.LEFT),
+        (1100, "press", Button.RIGHT),
+        (1400, "release", Button.RIGHT),
+    ]
+
+
+def test_repeat(simulation):
+    buttons = ButtonInput(PrimeHub(), long_press=0, repeat_delay=500,
+                          repeat_interval=150,
+                          repeat_buttons=(Button.RIGHT,))
+    simulation.press(Button.RIGHT, at=100, duration=900)
+    simulation.press(Button.LEFT, at=1100, duration=900)
+    assert collect(simulation, buttons, 2500) == [
+        (100, "press", Button.RIGHT),
+        (600, "repeat", Button.RIGHT),
+        (750, "repeat", Button.RIGHT),
+        (900, "repeat", Button.RIGHT),
+        (1000, "release", Button.RIGHT),
+        # LEFT is not a repeat button
+        (1100, "press", Button.LEFT),
+        (2000, "release", Button.LEFT),
+    ]
+
+
+def test_buttons_held_at_sync_are_not_pressed(simulation):
+    simulation.press(Button.RIGHT, at=0, duration=300)
+    buttons = ButtonInput(PrimeHub())
+    assert collect(simulation, buttons, 500) == [
+        (300, "release", Button.RIGHT),
+    ]
+
+
+def test_events_of_one_sample(simulation):
+    buttons = ButtonInput(PrimeHub())
+    simulation.press(Button.LEFT, at=100)
+    simulation.press(Button.RIGHT, at=100)
+    simulation.advance(100)
+    buttons.sample()
+    assert [buttons.get(), buttons.get(), buttons.get()] == [
+        (PRESS, Button.LEFT), (PRESS, Button.RIGHT), None]
+
+
+def test_full_queue_drops_oldest(simulation):
+    buttons = ButtonInput(PrimeHub(), debounce=0, queue_size=2)
+    simulation.press(Button.LEFT, at=10, duration=10)
+    simulation.press(Button.RIGHT, at=30, duration=10)
+    for now in (10, 20, 30, 40):
+        simulation.advance_to(now)
+        buttons.sample()
+    assert buttons.dropped == 2
+    assert len(buttons) == 2
+    assert buttons.get() == (PRESS, Button.RIGHT)
+    assert buttons.get() == (RELEASE, Button.RIGHT)
+
+
+def test_wait_event_timeout(simulation):
+    buttons = ButtonInput(PrimeHub())
+    assert buttons.wait_event(200) is None
+    assert simulation.now == 200
+
+
+@pytest.mark.parametrize("period", [5, 10])
+def test_wait_release(simulation, period):
+    buttons = ButtonInput(PrimeHub(), period=period)
+    simulation.press(Button.LEFT, at=0, duration=240)
+    buttons.sync()
+    buttons.wait_release(Button.LEFT)
+    assert simulation.now == 240
+    assert not buttons.is_pressed(Button.LEFT)
@@ -0,0 +1,97 @@
+import pytest
+
+from pybricks.parameters import Button
+from pybricks.tools import StopWatch
+
+from cancel import CancelToken, Cancelled
+from run_log import STOPPED, TIMEOUT
+
+
+class Clock:
+    """A clock that only moves when told to."""
+    
+    def __init__(self):
+        self.now = 0
+    
+    def __call__(self):
+        return self.now
+
+
+def test_deadline_cancels_with_timeout_from_the_deadline():
+    clock = Clock()
+    token = CancelToken(1000, clock=clock)
+    clock.now = 999
+    token.check()
+    assert token.remaining() == 1
+    clock.now = 1040
+    with pytest.raises(Cancelled):
+        token.check()
+    assert token.reason == TIMEOUT
+    # Noticed 40 ms late, but counted from the deadline
+    assert token.cancelled_at == 1000
+    token.cleanup()
+    assert token.stop_latency == 40
+
+
+def test_poll_cancels_and_first_reason_is_kept():
+    clock = Clock()
+    pressed = [False]
+    token = CancelToken(None, lambda: pressed[0], clock)
+    token.check()
+    assert not token.cancelled and token.remaining() is None
+    pressed[0] = True
+    clock.now = 50
+    with pytest.raises(Cancelled):
+        token.check()
+    token.cancel(TIMEOUT, at=10)
+    assert (token.reason, token.cancelled_at) == (STOPPED, 50)
+
+
+def test_cancel_at_the_press_time():
+    clock = Clock()
+    token = CancelToken(clock=clock)
+    clock.now = 130
+    token.cancel(STOPPED, at=100)
+    assert token.stop_latency is None
+    clock.now = 175
+    token.cleanup()
+    assert token.stop_latency == 75
+
+
+def test_cleanup_runs_newest_first_and_raises_the_first_error():
+    token = CancelToken(clock=Clock())
+    order = []
+    
+    def fail(name):
+        def callback():
+            order.append(name)
+            raise ValueError(name)
+        return callback
+    
+    token.on_cleanup(lambda: order.append("motors"))
+    token.on_cleanup(fail("arm"))
+    token.on_cleanup(fail("light"))
+    with pytest.raises(ValueError, match="light"):
+        token.cleanup()
+    assert order == ["light", "arm", "motors"]
+    # Callbacks run once
+    token.cleanup()
+    assert order == ["light", "arm", "motors"]
+
+
+def test_wait_notes_the_stop_button_press(simulation):
+    token = CancelToken()
+    clock = StopWatch()
+    simulation.press(Button.CENTER, at=230)
+    with pytest.raises(SystemExit):
+        token.wait(1000)
+    assert token.reason == STOPPED
+    assert token.cancelled_at == clock.time() == 230
+
+
+def test_wait_raises_at_the_deadline(simulation):
+    token = CancelToken(250)
+    with pytest.raises(Cancelled):
+        token.wait(1000)
+    assert token.reason == TIMEOUT
+    assert simulation.now == 250
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from compile_cache import CompileCache, HostCompiler, MpyCompiler
+
+
+@pytest.fixture
+def project(tmp_path):
+    """A program importing a module next to it and one in a package."""
+    folder = tmp_path / "project"
+    (folder / "missions").mkdir(parents=True)
+    (folder / "main.py").write_text(
+        "import helper\nimport missions.crane\nhelper.go()\n")
+    (folder / "helper.py").write_text("def go():\n    print('go')\n")
+    (folder / "missions" / "__init__.py").write_text("")
+    (folder / "missions" / "crane.py").write_text(
+        "def run(hub):\n    raise ValueError('crane')\n")
+    return folder
+
+
+def split(blob):
+    """Split a multi-file blob into {module name: compiled code}."""
+    modules = {}
+    offset = 0
+    while offset < len(blob):
+        size = int.from_bytes(blob[offset:offset + 4], "little")
+        end = blob.index(b"\0", offset + 4)
+        name = blob[offset + 4:end].decode()
+        modules[name] = blob[end + 1:end + 1 + size]
+        offset = end + 1 + size
+    return modules
+
+
+def compile_program(cache, path):
+    return asyncio.run(cache.compile_program(str(path)))
+
+
+def test_unchanged_modules_are_cache_hits(project, tmp_path):
+    cache = CompileCache(HostCompiler(), str(tmp_path / "cache"))
+    first = compile_program(cache, project / "main.py")
+    assert (cache.hits, cache.misses) == (0, 4)
+    assert sorted(split(first)) == [
+        "__main__", "helper", "missions", "missions.crane"]
+    again = CompileCache(HostCompiler(), str(tmp_path / "cache"))
+    assert compile_program(again, project / "main.py") == first
+    assert (again.hits, again.misses) == (4, 0)
+
+
+def test_changed_source_is_compiled_again(project, tmp_path):
+    cache = CompileCache(HostCompiler(), str(tmp_path / "cache"))
+    compile_program(cache, project / "main.py")
+    (project / "helper.py").write_text("def go():\n    print('gone')\n")
+    blob = compile_program(cache, project / "main.py")
+    assert (cache.hits, cache.misses) == (3, 5)
+    assert b"gone" in split(blob)["helper"]
+
+
+def test_changed_abi_is_compiled_again(project, tmp_path):
+    directory = str(tmp_path / "cache")
+    v6 = CompileCache(MpyCompiler(6), directory)
+    compile_program(v6, project / "main.py")
+    v5 = CompileCache(MpyCompiler(5), directory)
+    blob = compile_program(v5, project / "main.py")
+    assert (v5.hits, v5.misses) == (0, 4)
+    # Byte 1 of an .mpy file is its ABI version
+    assert {code[1] for code in split(blob).values()} == {5}
+
+
+def test_package_modules_match_pybricksdev(project, tmp_path):
+    from pybricksdev.compile import compile_multi_file
+    
+    cache = CompileCache(MpyCompiler(6), str(tmp_path / "cache"))
+    ours = split(compile_program(cache, project / "main.py"))
+    theirs = split(asyncio.run(
+        compile_multi_file(str(project / "main.py"), 6)))
+    assert ours == theirs
+    # The source name in the .mpy keeps the package path, for tracebacks
+    assert b"missions/crane.py" in ours["missions.crane"]
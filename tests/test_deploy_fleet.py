@@ -0,0 +1,82 @@
+import os
+import subprocess
+import sys
+import time
+
+import deploy_fleet
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+SCRIPT = os.path.join(os.path.dirname(TESTS), ".vscode", "deploy_fleet.py")
+STUB = "{} {} {{name}} {{file}}".format(
+    sys.executable, os.path.join(TESTS, "stub_robot.py"))
+
+
+def deploy(*args, command=STUB):
+    return subprocess.run(
+        [sys.executable, SCRIPT, "--command", command] + list(args),
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+        timeout=60)
+
+
+def test_output_is_prefixed_with_the_robot_name():
+    result = deploy("--name", "DudeBot", "--name", "ChickenBot", "menu.py")
+    assert result.returncode == 0
+    lines = result.stdout.splitlines()
+    for name in ("DudeBot", "ChickenBot"):
+        assert "[{0}] Connected to {0}".format(name) in lines
+        assert "[{0}] Running menu.py on {0}".format(name) in lines
+
+
+def test_summary_table():
+    result = deploy("--name", "DudeBot", "--name", "ChickenBot", "menu.py")
+    summary = result.stdout.split("Deployment summary:\n", 1)[1].splitlines()
+    assert summary[0].split()[:2] == ["DudeBot", "ok"]
+    assert summary[1].split()[:2] == ["ChickenBot", "ok"]
+    assert summary[2].startswith("2 of 2 robots succeeded")
+
+
+def test_one_failed_robot_fails_the_deploy():
+    result = deploy("--name", "DudeBot", "--name", "ChickenBot",
+                    "--name", "LHHDemoBot", "menu.py",
+                    command=STUB + " --fail ChickenBot")
+    assert result.returncode == 1
+    summary = result.stdout.split("Deployment summary:\n", 1)[1].splitlines()
+    assert summary[0].split()[:2] == ["DudeBot", "ok"]
+    assert summary[1].split()[:2] == ["ChickenBot", "FAILED"]
+    assert "(OSError, exit code 1)" in summary[1]
+    assert summary[2].split()[:2] == ["LHHDemoBot", "ok"]
+    assert summary[3].startswith("2 of 3 robots succeeded")
+    assert "[ChickenBot] OSError: [Errno 19] ENODEV" in result.stdout
+
+
+def test_all_uses_launch_json():
+    result = deploy("--all", "menu.py")
+    assert result.returncode == 0
+    assert "3 of 3 robots succeeded" in result.stdout
+    for name in deploy_fleet.fleet_names():
+        assert "[{0}] Connected to {0}".format(name) in result.stdout
+
+
+def test_timeout_counts_as_failure():
+    lines = []
+    results = deploy_fleet.deploy(
+        ["DudeBot"], "menu.py",
+        build_command=deploy_fleet.template_command(STUB + " --hold 30"),
+        timeout=0.5, emit=lambda name, text: lines.append((name, text)))
+    assert not results[0].ok
+    assert results[0].error == "timed out"
+    assert ("DudeBot", "Connected to DudeBot") in lines
+
+
+def test_workers_run_robots_in_parallel():
+    names = ["Bot{}".format(i) for i in range(4)]
+    build = deploy_fleet.template_command(STUB + " --hold 0.5")
+    start = time.monotonic()
+    results = deploy_fleet.deploy(names, "menu.py", workers=4,
+                                  build_command=build,
+                                  emit=lambda name, text: None)
+    seconds = time.monotonic() - start
+    assert [r.name for r in results] == names
+    assert all(r.ok for r in results)
+    # One after the other they would take at least 2 s
+    assert seconds < 2
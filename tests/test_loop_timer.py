@@ -0,0 +1,95 @@
+import pytest
+
+from pybricks.tools import StopWatch, run_task, wait
+
+import loop_timer
+from loop_timer import LoopTimer, SampleBuffer
+
+
+def test_sample_buffer_keeps_the_newest_values():
+    buffer = SampleBuffer(3)
+    for value in range(5):
+        buffer.add(value)
+    assert len(buffer) == 3
+    assert [buffer[i] for i in range(3)] == [2, 3, 4]
+    assert buffer[-1] == 4 and buffer[-3] == 2
+    for index in (3, -4):
+        with pytest.raises(IndexError):
+            buffer[index]
+    buffer.clear()
+    assert len(buffer) == 0
+    with pytest.raises(IndexError):
+        buffer[0]
+
+
+def _run(timer, bodies):
+    """Run one pass per body time in ms, blocking."""
+    timer.start()
+    for body in bodies:
+        wait(body)
+        timer.wait()
+
+
+def test_wait_makes_up_for_the_body(simulation):
+    timer = LoopTimer(10, clock=StopWatch().time)
+    start = simulation.now
+    _run(timer, [3, 7, 0, 9])
+    assert simulation.now - start == 40
+    assert timer.stats() == (4, 10, 10, 0, 0)
+
+
+def test_overruns_and_late_passes_are_counted(simulation):
+    timer = LoopTimer(10, tolerance=4, history=8, clock=StopWatch().time)
+    _run(timer, [2, 14, 15, 2, 30, 2])
+    # A pass of 14 ms overran but was within the tolerance. The pass of
+    # 15 ms ended before the deadline after it, so the loop stays on its
+    # schedule and the next pass is short; the pass of 30 ms missed a
+    # deadline and the schedule starts again from its end.
+    assert [timer.intervals[i] for i in range(len(timer.intervals))] == [
+        10, 14, 15, 2, 30, 10]
+    assert (timer.count, timer.longest, timer.late, timer.overruns) == (
+        6, 30, 2, 4)
+    assert timer.mean() == 81 // 6
+
+
+def test_missed_passes_are_not_run_in_a_burst(simulation):
+    timer = LoopTimer(10, clock=StopWatch().time)
+    _run(timer, [45, 1, 1])
+    # After the long pass the next deadline is one period away
+    assert [timer.total, timer.overruns] == [65, 1]
+    assert timer.late == 1
+
+
+def test_wait_async_always_yields(simulation):
+    timer = LoopTimer(10, clock=StopWatch().time)
+    passes = []
+
+    async def other():
+        for _ in range(3):
+            passes.append(simulation.now)
+            await wait(0)
+
+    async def loop():
+        timer.start()
+        for _ in range(3):
+            # The body always overruns, so there is no time left to sleep
+            await wait(20)
+            await timer.wait_async()
+
+    async def main():
+        from pybricks.tools import multitask
+        await multitask(loop(), other())
+
+    run_task(main())
+    assert len(passes) == 3
+    assert timer.overruns == 3 and timer.count == 3
+
+
+def test_report_prints_one_line(simulation, capsys):
+    timer = LoopTimer(10, clock=StopWatch().time)
+    _run(timer, [2, 25])
+    timer.report("buttons")
+    assert capsys.readouterr().out == "{},buttons,10,2,17,25,1,1\n".format(
+        loop_timer.PREFIX)
+    timer.reset()
+    assert timer.stats() == (0, 0, 0, 0, 0)
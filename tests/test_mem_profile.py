@@ -0,0 +1,83 @@
+import tracemalloc
+
+import pytest
+
+import mem_profile
+from mem_profile import MemProfiler
+
+
+@pytest.fixture
+def tracing():
+    yield
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def test_nested_sections_are_measured_separately(tracing):
+    profiler = MemProfiler(tracing=True)
+    profiler.start("outer")
+    kept = [bytearray(10000)]
+    profiler.start("inner")
+    kept.append(bytearray(50000))
+    inner = profiler.stop()
+    outer = profiler.stop()
+    assert 50000 <= inner < 60000
+    assert inner + 10000 <= outer < inner + 20000
+    stats = profiler.stats()
+    assert stats["inner"][:3] == [1, inner, inner]
+    assert stats["outer"][:3] == [1, outer, outer]
+    # The peak of the inner section counts towards the outer one
+    assert stats["outer"][3] >= stats["inner"][3] >= inner
+
+
+def test_peak_includes_memory_freed_in_the_section(tracing):
+    profiler = MemProfiler(tracing=True)
+    profiler.start("run")
+    bytearray(100000)
+    alloc = profiler.stop()
+    assert alloc < 10000
+    assert profiler.stats()["run"][3] >= 100000
+
+
+def test_stop_without_start_does_nothing():
+    profiler = MemProfiler(tracing=False)
+    assert profiler.stop() is None
+    assert profiler.stats() == {}
+
+
+def test_sections_without_heap_info_are_counted():
+    # CPython's gc has no mem_alloc(), so only the count is known
+    profiler = MemProfiler(tracing=False)
+    for _ in range(3):
+        profiler.start("render")
+        assert profiler.stop() is None
+    assert profiler.stats()["render"] == [3, None, None, None, None]
+    assert MemProfiler.format("render", profiler.stats()["render"]) == (
+        "@mem,render,3,,,,")
+    profiler.clear()
+    assert profiler.stats() == {}
+
+
+def test_dump_prints_sections_in_order(capsys):
+    profiler = MemProfiler(tracing=False)
+    profiler._record("run", 300, 500, 1000)
+    profiler._record("run", 100, 200, 800)
+    profiler._record("navigate", 0, None, None)
+    profiler.dump()
+    assert capsys.readouterr().out.splitlines() == [
+        "@mem,navigate,1,0,0,,",
+        "@mem,run,2,200,300,500,800",
+    ]
+
+
+def test_enable_and_disable(tracing):
+    profiler = mem_profile.enable(tracing=True)
+    try:
+        assert mem_profile.profiler is profiler
+        profiler.start("run")
+        profiler.stop()
+        assert tracemalloc.is_tracing()
+    finally:
+        mem_profile.disable()
+    assert mem_profile.profiler is None
+    assert not tracemalloc.is_tracing()
@@ -0,0 +1,411 @@
+import os
+
+import pytest
+
+from pybricks.hubs import PrimeHub
+from pybricks.parameters import Button, Icon
+from pybricks.tools import wait
+from pybricks_sim import SimulationEnd
+
+import pix_display
+from menu import AsyncMenu
+
+
+def grid(frame):
+    """Return the pixels of a Matrix as a list of rows."""
+    return [[frame[r, c] for c in range(5)] for r in range(5)]
+
+
+def display_history(simulation):
+    """Replay the display log into a list of (time, pixels) after each write."""
+    pixels = [[0] * 5 for _ in range(5)]
+    history = []
+    for t, source, action, args in simulation.events("display"):
+        if action == "icon":
+            pixels = grid(args[0])
+        elif action == "pixel":
+            pixels = [row[:] for row in pixels]
+            pixels[args[0]][args[1]] = args[2]
+        elif action == "off":
+            pixels = [[0] * 5 for _ in range(5)]
+        else:
+            continue
+        history.append((t, pixels))
+    return history
+
+
+def shown_between(history, start, end):
+    """Return the distinct frames on the display from start to end."""
+    shown = []
+    current = None
+    for t, pixels in history:
+        if t <= start:
+            current = pixels
+        elif t < end:
+            if current is not None and current not in shown:
+                shown.append(current)
+            current = pixels
+    if current is not None and current not in shown:
+        shown.append(current)
+    return shown
+
+
+def test_async_select_value_is_not_drawn_over(simulation):
+    hub = PrimeHub()
+    menu = AsyncMenu(hub)
+    selector = pix_display.ValueSelector(hub, 0, 25)
+    chosen = []
+    
+    async def item(hub):
+        await wait(100)
+        chosen.append(await menu.select_value_async(selector, 5))
+        await wait(1000)
+    
+    menu.add_item(1, item)
+    simulation.limit = 4000
+    simulation.press(Button.CENTER, at=200)
+    simulation.press(Button.RIGHT, at=1500)
+    simulation.press(Button.CENTER, at=2500)
+    with pytest.raises(SimulationEnd):
+        menu.run()
+    
+    assert chosen == [6]
+    history = display_history(simulation)
+    five = grid(pix_display.number_frame(5))
+    six = grid(pix_display.number_frame(6))
+    # Only the value is shown while it is selected, although the running
+    # animation would have changed frame every 250 ms
+    assert shown_between(history, 500, 1500) == [five]
+    assert shown_between(history, 1550, 2500) == [six]
+    # The animation goes on after the value is confirmed
+    running = shown_between(history, 2700, 3500)
+    assert grid(Icon.TRUE) in running
+    assert grid(Icon.TRUE * 0.5) in running
+
+
+def test_stop_before_item_starts_keeps_menu_running(simulation):
+    import mem_profile
+    from menu import Menu
+    
+    hub = PrimeHub()
+    profiler = mem_profile.enable(tracing=True)
+    try:
+        menu = Menu(hub)
+        ran = []
+        menu.add_item(1, lambda hub: ran.append(1))
+        simulation.limit = 3000
+        # BLUETOOTH, the stop button of the menu, is pressed while CENTER
+        # is still held to launch the item
+        simulation.press(Button.CENTER, at=200, duration=1300)
+        simulation.press(Button.BLUETOOTH, at=800)
+        with pytest.raises(SimulationEnd):
+            menu.run()
+    finally:
+        mem_profile.disable()
+    
+    assert ran == []
+    assert profiler.stop() is None
+    assert menu.run_log.records() == []
+
+
+def make_sequence_menu(menu_class):
+    from menu import Menu
+    
+    hub = PrimeHub()
+    menu = menu_class(hub)
+    ran = []
+    if menu_class is AsyncMenu:
+        async def mission(hub):
+            ran.append(menu.current_index)
+            await wait(100)
+    else:
+        def mission(hub):
+            ran.append(menu.current_index)
+            wait(100)
+    menu.add_item(1, mission)
+    menu.add_submenu(2).add_item(1, mission)
+    menu.add_item(3, mission)
+    return menu, ran
+
+
+@pytest.mark.parametrize("menu_class", ["Menu", "AsyncMenu"])
+def test_run_sequence_rejects_bad_steps(simulation, menu_class):
+    import menu as menu_module
+    from sequencer import RunPlan
+    
+    menu, ran = make_sequence_menu(getattr(menu_module, menu_class))
+    submenu_plan = RunPlan()
+    submenu_plan.add(0)
+    submenu_plan.add(1)
+    with pytest.raises(ValueError, match="submenu"):
+        menu.run_sequence(submenu_plan)
+    missing_plan = RunPlan()
+    missing_plan.add(0)
+    missing_plan.add(3)
+    with pytest.raises(ValueError, match="no menu item"):
+        menu.run_sequence(missing_plan)
+    assert ran == []
+    assert simulation.now == 0
+
+
+@pytest.mark.parametrize("menu_class", ["Menu", "AsyncMenu"])
+def test_default_sequence_skips_submenus(simulation, menu_class):
+    import menu as menu_module
+    from run_log import COMPLETED
+    
+    menu, ran = make_sequence_menu(getattr(menu_module, menu_class))
+    simulation.press(Button.CENTER, at=200)
+    simulation.press(Button.CENTER, at=1000)
+    assert menu.run_sequence() == [(0, COMPLETED), (2, COMPLETED)]
+    assert ran == [0, 2]
+
+
+def test_menu_items_are_parallel_lists():
+    from menu import Menu, MenuItems
+    
+    menu = Menu(PrimeHub())
+    first = menu.add_item(7, print)
+    second = menu.add_item('A', None, "arm", deadline=500, token=True)
+    items = menu.menu_items
+    assert isinstance(items, MenuItems)
+    assert items.displays == [7, 'A']
+    assert items.functions == [print, None]
+    assert items.frames == [pix_display.number_frame(7), None]
+    assert items.labels == [None, "arm"]
+    assert items.options == [None, {"deadline": 500, "token": True}]
+    # Views read from the tables, with the old dict style access
+    assert (first.display, first['function'], first.name()) == (7, print, '7')
+    assert second.option('deadline') == 500
+    assert second.option('repeat', 1) == 1
+    assert menu.get_current_item()['display'] == 7
+    assert [str(item) for item in items] == ['7', 'A arm']
+    menu.clear_items()
+    assert len(menu) == 0 and menu.get_current_item() is None
+
+
+@pytest.mark.parametrize("menu_class", ["Menu", "AsyncMenu"])
+def test_loop_period_reported_when_stopped(simulation, capsys, menu_class):
+    import menu as menu_module
+    
+    menu = getattr(menu_module, menu_class)(PrimeHub())
+    menu.add_item(1, None)
+    simulation.press(Button.RIGHT, at=300)
+    # BLUETOOTH is the stop button of the menu
+    simulation.press(Button.BLUETOOTH, at=1000)
+    with pytest.raises(SystemExit):
+        menu.run()
+    
+    lines = [line for line in capsys.readouterr().out.splitlines()
+             if line.startswith("@loop,")]
+    assert len(lines) == 1
+    name, period, count, mean, longest, late, overruns = (
+        lines[0].split(",")[1:])
+    assert (name, period) == ("menu", "10")
+    assert int(count) > 50
+    assert int(mean) == 10
+    assert int(longest) >= int(mean)
+
+
+@pytest.mark.parametrize("menu_class", ["Menu", "AsyncMenu"])
+def test_submenu_enter_back_and_run(simulation, menu_class):
+    import menu as menu_module
+    
+    menu = getattr(menu_module, menu_class)(PrimeHub())
+    ran = []
+    
+    def mission(name):
+        if menu_class == "AsyncMenu":
+            async def run(hub):
+                ran.append(name)
+                await wait(100)
+        else:
+            def run(hub):
+                ran.append(name)
+                wait(100)
+        return run
+    
+    menu.add_item(1, mission("top"))
+    arm = menu.add_submenu(2, "arm")
+    for name in "ABC":
+        arm.add_item(name, mission(name))
+    
+    simulation.limit = 4500
+    simulation.press(Button.RIGHT, at=200)          # top: 2
+    simulation.press(Button.CENTER, at=500)         # enter arm: A
+    simulation.press(Button.RIGHT, at=800)          # B
+    simulation.press(Button.LEFT, at=1100, duration=1000)   # back to 2
+    simulation.press(Button.CENTER, at=2500)        # enter arm: A
+    simulation.press(Button.RIGHT, at=2800)         # B
+    simulation.press(Button.LEFT, at=3100)          # A, on release
+    simulation.press(Button.RIGHT, at=3500)         # B
+    simulation.press(Button.CENTER, at=3800)        # run B
+    with pytest.raises(SimulationEnd):
+        menu.run()
+    
+    assert ran == ["B"]
+    chars = [(t, args[0]) for t, _, _, args
+             in simulation.events("display", "char")]
+    # Holding LEFT to go back does not move the cursor to A first
+    assert [c for t, c in chars if 1100 <= t < 2500] == []
+    two = pix_display.number_frame(2)
+    assert [t for t, _, _, args in simulation.events("display", "icon")
+            if args[0] == two and 1100 <= t < 2500] == [1800]
+    # A tap moves when LEFT is released
+    assert [(t, c) for t, c in chars if 3100 <= t < 3500] == [(3200, "A")]
+    assert menu.depth == 1
+
+
+def test_menu_manager_imports_missions_when_run(simulation):
+    import runpy
+    import sys
+    
+    from conftest import ROOT
+    
+    names = ["missions.demo_1", "missions.demo_2", "missions.demo_3"]
+    for name in names:
+        sys.modules.pop(name, None)
+    simulation.limit = 3000
+    simulation.press(Button.CENTER, at=500)
+    with pytest.raises(SimulationEnd):
+        runpy.run_path(os.path.join(ROOT, "menu_manager.py"),
+                       run_name="__main__")
+    
+    assert [name in sys.modules for name in names] == [True, False, False]
+
+
+@pytest.mark.parametrize("reference", ["", ":run", "missions.demo_1:"])
+def test_lazy_function_rejects_bad_references(reference):
+    from menu import LazyFunction
+    
+    with pytest.raises(ValueError):
+        LazyFunction.parse(reference)
+
+
+def test_lazy_function_imports_once_when_resolved():
+    import sys
+    
+    from menu import LazyFunction
+    
+    sys.modules.pop("missions.demo_2", None)
+    function = LazyFunction.parse("missions.demo_2")
+    assert repr(function) == "LazyFunction('missions.demo_2:run')"
+    assert not function.loaded
+    assert "missions.demo_2" not in sys.modules
+    
+    resolved = function.resolve()
+    assert resolved is sys.modules["missions.demo_2"].run
+    assert function.loaded
+    assert function.resolve() is resolved
+
+
+def test_lazy_function_errors_surface_when_run():
+    from menu import LazyFunction
+    
+    missing_module = LazyFunction.parse("missions.no_such_mission:run")
+    with pytest.raises(ImportError):
+        missing_module(None)
+    assert not missing_module.loaded
+    
+    missing_function = LazyFunction.parse("missions.demo_3:no_such_function")
+    with pytest.raises(AttributeError):
+        missing_function(None)
+    assert not missing_function.loaded
+
+
+@pytest.mark.parametrize("menu_class", ["Menu", "AsyncMenu"])
+def test_deadline_cancels_item_and_cleans_up_newest_first(simulation,
+                                                           menu_class):
+    import menu as menu_module
+    from run_log import TIMEOUT
+    
+    menu = getattr(menu_module, menu_class)(PrimeHub())
+    order = []
+    menu.add_cleanup(lambda: order.append("menu"))
+    
+    if menu_class == "AsyncMenu":
+        # Cancelled by the menu although it never looks at the token
+        async def item(hub, token):
+            token.on_cleanup(lambda: order.append("item"))
+            await wait(10000)
+    else:
+        def item(hub, token):
+            token.on_cleanup(lambda: order.append("item"))
+            while True:
+                token.wait(100)
+    
+    menu.add_item(1, item, token=True, deadline=1000)
+    simulation.limit = 3000
+    simulation.press(Button.CENTER, at=200)
+    with pytest.raises(SimulationEnd):
+        menu.run()
+    
+    assert order == ["item", "menu"]
+    (record,) = menu.run_log.records()
+    duration, reason = record[3:5]
+    assert reason == TIMEOUT
+    assert 1000 <= duration < 1100
+
+
+def test_blocking_menu_needs_token_for_deadline():
+    from menu import Menu
+    
+    menu = Menu(PrimeHub())
+    with pytest.raises(ValueError, match="token=True"):
+        menu.add_item(1, print, deadline=1000)
+    assert len(menu) == 0
+    # Coroutines are cancelled by a concurrent task, with or without token
+    AsyncMenu(PrimeHub()).add_item(1, print, deadline=1000)
+
+
+@pytest.mark.parametrize("menu_class", ["Menu", "AsyncMenu"])
+def test_stop_latency_counts_from_the_press(simulation, menu_class):
+    import menu as menu_module
+    from run_log import STOPPED
+    
+    menu = getattr(menu_module, menu_class)(PrimeHub())
+    if menu_class == "AsyncMenu":
+        async def item(hub, token):
+            await wait(10000)
+    else:
+        def item(hub, token):
+            try:
+                token.wait(10000)
+            finally:
+                # The item's own unwinding is part of the stop latency
+                wait(30)
+    
+    # Cleanup that takes time, like a motor braking
+    menu.add_cleanup(lambda: wait(20))
+    menu.add_item(1, item, token=True)
+    simulation.limit = 3000
+    simulation.press(Button.CENTER, at=200)
+    simulation.press(Button.CENTER, at=1500)
+    with pytest.raises(SimulationEnd):
+        menu.run()
+    
+    (record,) = menu.run_log.records()
+    reason, stop_ms = record[4], record[7]
+    assert reason == STOPPED
+    if menu_class == "AsyncMenu":
+        # Seen at the next button sample; a cleanup wait() does not block
+        assert 0 <= stop_ms <= 10
+    else:
+        assert stop_ms == 50
+
+
+def test_submenu_keeps_only_its_items():
+    from menu import Menu, Submenu
+    
+    menu = Menu(PrimeHub())
+    arm = menu.add_submenu(1, "arm")
+    grip = arm.add_submenu('G')
+    grip.add_item(1, print)
+    assert isinstance(arm, Submenu)
+    assert sorted(vars(arm)) == ["menu", "menu_items"]
+    assert menu.menu_items.functions == [arm]
+    assert arm.menu_items.functions == [grip] and len(grip) == 1
+    # Items of a submenu are checked like the menu's own
+    with pytest.raises(ValueError, match="token=True"):
+        grip.add_item(2, print, deadline=1000)
+    assert menu.enter() and menu.enter()
+    assert menu.depth == 2 and menu.get_current_item().function is print
@@ -0,0 +1,88 @@
+import pytest
+
+from pybricks.parameters import Direction, Port, Stop
+from pybricks.pupdevices import Motor
+from pybricks.robotics import DriveBase
+from pybricks.tools import run_task
+
+from motion import CURVE, PAUSE, RUN_ANGLE, STRAIGHT, TURN, MotionPlan
+
+
+@pytest.fixture
+def robot(simulation):
+    """A drive base and an attachment motor."""
+    drive_base = DriveBase(Motor(Port.F, Direction.COUNTERCLOCKWISE),
+                           Motor(Port.B), 56, 114)
+    return drive_base, Motor(Port.D)
+
+
+def queues(plan):
+    """Return the compiled moves of every segment, without the devices."""
+    return [[moves for device, moves in segment]
+            for segment in plan.compile()]
+
+
+def test_compile_merges_moves_that_go_the_same_way(robot):
+    drive_base, arm = robot
+    plan = MotionPlan(drive_base)
+    plan.straight(100).straight(0).straight(50).straight(-30)
+    plan.turn(0).pause(0).pause(100).pause(50)
+    plan.run_angle(arm, 500, 90).run_angle(arm, 500, 0)
+    plan.run_angle(arm, 500, 90).run_angle(arm, 800, 90)
+    assert queues(plan) == [[
+        [[STRAIGHT, 150, None, Stop.HOLD],
+         [STRAIGHT, -30, None, Stop.HOLD],
+         [PAUSE, 150, None, Stop.HOLD]],
+        [[RUN_ANGLE, 500, 180, Stop.NONE],
+         [RUN_ANGLE, 800, 90, Stop.HOLD]],
+    ]]
+    assert len(plan) == 5
+
+
+def test_compile_does_not_merge_across_sync(robot):
+    drive_base, arm = robot
+    plan = MotionPlan(drive_base)
+    plan.turn(90).sync().sync().turn(90)
+    assert queues(plan) == [[[[TURN, 90, None, Stop.HOLD]]],
+                            [[[TURN, 90, None, Stop.HOLD]]]]
+
+
+def test_compile_blends_moves_that_continue(robot):
+    drive_base, arm = robot
+    plan = MotionPlan(drive_base)
+    plan.straight(200).curve(150, 90).straight(100)
+    plan.turn(-45).curve(100, -30).curve(100, 30)
+    plan.turn(90).straight(-100)
+    assert [move[3] for move in queues(plan)[0][0]] == [
+        Stop.NONE,  # straight into a forward curve
+        Stop.NONE,  # forward curve into a straight
+        Stop.HOLD,  # straight into a turn in place
+        Stop.NONE,  # turn into a curve turning the same way
+        Stop.HOLD,  # curve into a backward curve
+        Stop.HOLD,  # backward curve into a turn in place
+        Stop.HOLD,  # turn into a straight
+        Stop.HOLD,  # the last move holds
+    ]
+
+
+def test_blending_saves_time(robot):
+    drive_base, arm = robot
+    path = [("straight", 300), ("curve", 150, 90), ("straight", 200),
+            ("curve", 150, 90), ("straight", 100)]
+    
+    def run(blend):
+        from pybricks_sim import sim
+        plan = MotionPlan.from_moves(drive_base, path)
+        if not blend:
+            for segment in plan.compile():
+                for device, moves in segment:
+                    for move in moves:
+                        move[3] = Stop.HOLD
+        start = sim.now
+        run_task(plan.run_async())
+        return sim.now - start
+    
+    held = run(False)
+    assert run(True) < held - 500
+    # Both runs drove the whole path
+    assert drive_base.angle() == 2 * 180
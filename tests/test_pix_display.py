@@ -0,0 +1,213 @@
+import pytest
+
+import pix_display
+
+PATTERN = ["  8  ", " 898 ", "86#68", "6 # 6", "  #  "]
+
+
+def test_pack_round_trip():
+    packed = pix_display.pack_pattern(PATTERN)
+    assert len(packed) == pix_display.PATTERN_SIZE
+    assert pix_display.pattern_rows(packed) == PATTERN
+    assert (pix_display.unpack_pattern(packed)
+            == pix_display.compile_pattern(PATTERN))
+
+
+def test_pattern_pack_decodes_each_frame_once():
+    patterns = [PATTERN, ["#####"] * 5, ["     "] * 5]
+    pack = pix_display.PatternPack(pix_display.pack_patterns(patterns))
+    assert len(pack) == 3
+    for index, pattern in enumerate(patterns):
+        assert pack[index] == pix_display.compile_pattern(pattern)
+    assert pack[1] is pack[1]
+    assert pack[-1] is pack[2]
+    with pytest.raises(IndexError):
+        pack[3]
+
+
+def test_menu_prints_packed_patterns_as_rows():
+    from pybricks.hubs import PrimeHub
+    from menu import Menu
+
+    menu = Menu(PrimeHub())
+    menu.add_item(1, None)
+    menu.add_item(pix_display.pack_pattern(PATTERN), None, "crane")
+    assert str(menu) == (
+        "Menu (2 items):\n"
+        "> 1\n"
+        "  " + str(PATTERN) + " crane")
+
+
+# The numbers 0 to 19 as the 5x5 patterns the menu used to show. 11 now has
+# the bar-plus-digit layout of the other teens.
+NUMBERS = [
+    [" ### ", " # # ", " # # ", " # # ", " ### "],
+    ["  #  ", " ##  ", "  #  ", "  #  ", " ### "],
+    [" ### ", "   # ", " ### ", " #   ", " ### "],
+    [" ### ", "   # ", " ### ", "   # ", " ### "],
+    [" # # ", " # # ", " ### ", "   # ", "   # "],
+    [" ### ", " #   ", " ### ", "   # ", " ### "],
+    [" ### ", " #   ", " ### ", " # # ", " ### "],
+    [" ### ", "   # ", "   # ", "   # ", "   # "],
+    [" ### ", " # # ", " ### ", " # # ", " ### "],
+    [" ### ", " # # ", " ### ", "   # ", " ### "],
+    ["# ###", "# # #", "# # #", "# # #", "# ###"],
+    ["#  # ", "# ## ", "#  # ", "#  # ", "# ###"],
+    ["# ###", "#   #", "# ###", "# #  ", "# ###"],
+    ["# ###", "#   #", "# ###", "#   #", "# ###"],
+    ["# # #", "# # #", "# ###", "#   #", "#   #"],
+    ["# ###", "# #  ", "# ###", "#   #", "# ###"],
+    ["# ###", "# #  ", "# ###", "# # #", "# ###"],
+    ["# ###", "#   #", "#   #", "#   #", "#   #"],
+    ["# ###", "# # #", "# ###", "# # #", "# ###"],
+    ["# ###", "# # #", "# ###", "#   #", "# ###"],
+]
+
+
+@pytest.mark.parametrize("number", range(20))
+def test_number_glyphs_render_0_to_19(number):
+    frame = pix_display.number_frame(number)
+    assert frame == pix_display.compile_pattern(NUMBERS[number])
+    assert pix_display.number_frame(number) is frame
+
+
+
+def test_pattern_cache_evicts_least_recently_used():
+    cache = pix_display.PatternCache(size=2)
+    a, b, c = PATTERN, ["#####"] * 5, ["     "] * 5
+    frame = cache.get(a)
+    cache.get(b)
+    assert cache.get(a) is frame
+    cache.get(c)
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses) == (1, 3)
+    # b was used least recently, so it was evicted
+    cache.get(b)
+    assert cache.misses == 4
+    assert cache.get(c) is not None and cache.hits == 2
+
+
+def _display_calls(simulation):
+    return [e[2:] for e in simulation.events("display")]
+
+
+def test_frame_display_skips_what_is_already_shown(simulation):
+    from pybricks.hubs import PrimeHub
+
+    display = pix_display.FrameDisplay(PrimeHub().display)
+    display.char("A")
+    display.char("A")
+    display.number(7)
+    display.number(7)
+    display.off()
+    display.off()
+    assert _display_calls(simulation) == [
+        ("char", ("A",)), ("number", (7,)), ("off", ())]
+    assert (display.writes, display.skipped) == (3, 3)
+
+
+def test_frame_display_sends_only_changed_pixels(simulation):
+    from pybricks.hubs import PrimeHub
+
+    hub = PrimeHub()
+    display = pix_display.FrameDisplay(hub.display, max_pixel_writes=2)
+    first = pix_display.compile_pattern(["     "] * 5)
+    two_pixels = pix_display.compile_pattern(["#   #"] + ["     "] * 4)
+    full = pix_display.compile_pattern(["#####"] * 5)
+    display.icon(first)
+    display.icon(two_pixels)
+    display.icon(pix_display.compile_pattern(["#   #"] + ["     "] * 4))
+    display.icon(full)
+    assert [call[0] for call in _display_calls(simulation)] == [
+        "icon", "pixel", "pixel", "icon"]
+    assert (display.writes, display.pixel_writes, display.skipped) == (2, 2, 1)
+    assert hub.display.pixels == [[100.0] * 5] * 5
+
+
+def test_frame_display_invalidate_forces_a_redraw(simulation):
+    from pybricks.hubs import PrimeHub
+
+    display = pix_display.FrameDisplay(PrimeHub().display)
+    frame = pix_display.compile_pattern(PATTERN)
+    display.icon(frame)
+    display.icon(frame)
+    display.invalidate()
+    display.icon(frame)
+    display.char("A")
+    # Writing a pixel directly also forgets the frame
+    display.pixel(0, 0)
+    display.char("A")
+    assert [call[0] for call in _display_calls(simulation)] == [
+        "icon", "icon", "char", "pixel", "char"]
+
+
+def _frames(count):
+    """Patterns with the first `count` pixels of the top row lit."""
+    return [["#" * n + " " * (5 - n)] + ["     "] * 4 for n in range(count)]
+
+
+def test_animation_checks_its_frames():
+    with pytest.raises(ValueError):
+        pix_display.Animation([])
+    with pytest.raises(ValueError):
+        pix_display.Animation(_frames(2), [100])
+    with pytest.raises(ValueError):
+        pix_display.Animation(_frames(2), [100, 0])
+    animation = pix_display.Animation(_frames(3), [100, 200, 300])
+    assert animation.ends == (100, 300, 600)
+    assert animation.total == 600 and len(animation) == 3
+
+
+def test_animator_shows_the_frame_that_is_due(simulation):
+    from pybricks.hubs import PrimeHub
+
+    animation = pix_display.Animation(_frames(3), [100, 200, 300])
+    animator = pix_display.Animator(PrimeHub().display, clock=lambda: 0)
+    animator.play(animation, now=0)
+    assert animator.running
+    assert animator.time_to_next(0) == 100
+    assert animator.update(50)
+    assert animator.update(120)
+    assert animator.time_to_next(120) == 180
+    assert animator.update(299)
+    assert len(simulation.events("display", "icon")) == 2
+    # Finishing always ends on the last frame
+    assert not animator.update(700)
+    assert not animator.running
+    assert animator.time_to_next(700) is None
+    icons = [e[3][0] for e in simulation.events("display", "icon")]
+    assert icons == list(animation.frames)
+
+
+def test_animator_loops_and_stops(simulation):
+    from pybricks.hubs import PrimeHub
+
+    animation = pix_display.Animation(_frames(2), 100, loop=True)
+    animator = pix_display.Animator(PrimeHub().display)
+    animator.play(animation, now=0)
+    for now in (100, 200, 350):
+        assert animator.update(now)
+    icons = [e[3][0] for e in simulation.events("display", "icon")]
+    assert icons == [animation.frames[i] for i in (0, 1, 0, 1)]
+    animator.stop()
+    assert not animator.running
+    assert not animator.update(400)
+    assert len(simulation.events("display", "icon")) == 4
+
+
+def test_animator_max_fps_skips_frames_but_keeps_time(simulation):
+    from pybricks.hubs import PrimeHub
+
+    animation = pix_display.Animation(_frames(5), 20)
+    animator = pix_display.Animator(PrimeHub().display, max_fps=20)
+    animator.play(animation, now=0)
+    for now in range(10, 100, 10):
+        animator.update(now)
+    # One draw per 50 ms at most: frame 2 is due at 50, frame 1 is skipped
+    icons = [e[3][0] for e in simulation.events("display", "icon")]
+    assert icons == [animation.frames[0], animation.frames[2]]
+    assert animator.time_to_next(90) == 10
+    # The end is on time and always shows the last frame
+    assert not animator.update(100)
+    icons = [e[3][0] for e in simulation.events("display", "icon")]
+    assert icons[-1] is animation.frames[-1]
@@ -0,0 +1,112 @@
+import os
+import sys
+import time
+
+import pytest
+
+from pybricks_output import (OutputParser, PRINT, START, STATUS, STOP,
+                             TELEMETRY, TRACEBACK, parse_transcript)
+import run_pybricks
+
+TESTS = os.path.dirname(os.path.abspath(__file__))
+STUB = os.path.join(TESTS, "stub_robot.py")
+
+
+def transcript(name):
+    path = os.path.join(TESTS, "transcripts", name)
+    with open(path, encoding="utf-8", newline="") as f:
+        return f.read()
+
+
+def kinds(events):
+    return [event.kind for event in events]
+
+
+def test_normal_exit():
+    events = parse_transcript(transcript("normal_exit.txt"))
+    assert kinds(events) == [STATUS, STATUS, STATUS, STATUS, STATUS, START,
+                             PRINT, PRINT, PRINT, TELEMETRY]
+    assert events[6].text == "Running with auto_increment = False"
+    assert events[-1].data == ("run", ["0", "0", "1", "512", "completed",
+                                       "", "", ""])
+
+
+def test_stop_button_exit():
+    events = parse_transcript(transcript("stop_button.txt"))
+    assert kinds(events)[-4:] == [PRINT, PRINT, STOP, TELEMETRY]
+    assert events[-2].text == "The program was stopped (SystemExit)."
+    # The '@run' line printed after the stop still arrives
+    assert events[-1].data[1][4] == "stopped"
+
+
+def test_traceback_exit():
+    events = parse_transcript(transcript("traceback.txt"))
+    assert kinds(events)[-3:] == [PRINT, TRACEBACK, TELEMETRY]
+    exception, lines = events[-2].data
+    assert exception == "ValueError"
+    assert lines[0] == "Traceback (most recent call last):"
+    assert lines[-1] == "ValueError: bad speed"
+    assert STOP not in kinds(events)
+
+
+@pytest.mark.parametrize("name", ["normal_exit.txt", "stop_button.txt",
+                                  "traceback.txt"])
+def test_any_split_gives_the_same_events(name):
+    text = transcript(name)
+    whole = [(e.kind, e.text, e.data) for e in parse_transcript(text)]
+    for size in (1, 7, 64):
+        events = []
+        parser = OutputParser()
+        parser.subscribe(events.append)
+        for i in range(0, len(text), size):
+            parser.feed(text[i:i + size])
+        parser.close()
+        assert [(e.kind, e.text, e.data) for e in events] == whole
+
+
+def test_system_exit_traceback_stops():
+    events = parse_transcript(
+        "Traceback (most recent call last):\n"
+        "  File \"main.py\", line 3, in <module>\n"
+        "SystemExit:\n")
+    assert kinds(events) == [TRACEBACK, STOP]
+
+
+def test_subscribe_to_some_kinds():
+    stops = []
+    parser = OutputParser()
+    parser.subscribe(stops.append, kinds=(STOP,))
+    parser.feed(transcript("stop_button.txt"))
+    parser.close()
+    assert kinds(stops) == [STOP]
+
+
+def stub_command(name, *options):
+    return [sys.executable, STUB, "Bot", "menu.py",
+            "--transcript", os.path.join(TESTS, "transcripts", name)
+            ] + list(options)
+
+
+def test_wrapper_normal_exit(capsys):
+    assert run_pybricks.run(stub_command("normal_exit.txt")) == 0
+    assert "@run,0,0,1,512,completed" in capsys.readouterr().out
+
+
+def test_wrapper_traceback_exit(capsys):
+    code = run_pybricks.run(stub_command("traceback.txt", "--exit", "1"))
+    assert code == 1
+    assert "ValueError: bad speed" in capsys.readouterr().out
+
+
+def test_wrapper_keeps_output_after_stop(capsys):
+    # pybricksdev forwards the '@run' line a moment after the stop message
+    # and then does not exit by itself
+    start = time.monotonic()
+    code = run_pybricks.run(stub_command("stop_button.txt", "--pause", "0.2",
+                                         "--hold", "30"), stop_grace=1.0)
+    seconds = time.monotonic() - start
+    out = capsys.readouterr().out
+    assert code == 0
+    assert "@run,0,2,pattern,1834,stopped" in out
+    assert "Program terminated on robot" in out
+    assert seconds < 10
@@ -0,0 +1,193 @@
+import asyncio
+import struct
+import threading
+import time
+
+import pytest
+
+from compile_cache import CompileCache, HostCompiler
+import pybricks_session
+from pybricks_session import BleHub, FakeHub, SessionServer, request
+
+
+@pytest.fixture
+def program(tmp_path):
+    path = tmp_path / "program.py"
+    path.write_text("print('hello from the hub')\n")
+    return path
+
+
+@pytest.fixture
+def hub_factory(tmp_path):
+    hubs = []
+
+    def make(name):
+        hub = FakeHub(name)
+        hub.cache = CompileCache(HostCompiler(), str(tmp_path / "cache"))
+        hubs.append(hub)
+        return hub
+    make.hubs = hubs
+    return make
+
+
+def test_uploads_only_changed_programs(program, hub_factory):
+    server = SessionServer(hub_factory)
+    output = []
+
+    async def runs():
+        results = [await server.run_program("Bot", str(program),
+                                            output.append)]
+        results.append(await server.run_program("Bot", str(program),
+                                                output.append))
+        program.write_text("print('changed')\n")
+        results.append(await server.run_program("Bot", str(program),
+                                                output.append))
+        return results
+
+    assert asyncio.run(runs()) == [True, False, True]
+    text = "".join(output)
+    assert text.count("hello from the hub") == 2
+    assert "changed" in text
+    assert "[sim]" in text
+    # One connection for all three runs
+    assert len(hub_factory.hubs) == 1
+    robot = server.robots["Bot"]
+    assert (robot.runs, robot.uploads) == (3, 2)
+
+
+class ServerThread:
+    """Runs a SessionServer on a free port in a background thread."""
+
+    def __init__(self, server):
+        self.server = server
+        self.thread = threading.Thread(
+            target=lambda: asyncio.run(server.serve(0)), daemon=True)
+        self.thread.start()
+        deadline = time.monotonic() + 5
+        while server.port is None:
+            assert time.monotonic() < deadline, "server did not start"
+            time.sleep(0.01)
+
+
+def test_requests_over_socket(program, hub_factory):
+    served = ServerThread(SessionServer(hub_factory))
+    port = served.server.port
+    message = {"cmd": "run", "name": "Bot", "file": str(program)}
+
+    replies = list(request(message, port))
+    assert replies[-1] == {"event": "done", "uploaded": True, "error": None}
+    assert any("hello from the hub" in r.get("text", "") for r in replies)
+    assert list(request(message, port))[-1]["uploaded"] is False
+
+    status = list(request({"cmd": "status"}, port))[0]
+    assert status["robots"]["Bot"]["runs"] == 2
+    assert list(request({"cmd": "shutdown"}, port)) == [
+        {"event": "shutdown"}]
+    served.thread.join(5)
+    assert not served.thread.is_alive()
+
+
+def test_errors_are_reported(hub_factory, tmp_path):
+    served = ServerThread(SessionServer(hub_factory))
+    message = {"cmd": "run", "name": "Bot",
+               "file": str(tmp_path / "missing.py")}
+    reply = list(request(message, served.server.port))[-1]
+    assert reply["event"] == "done"
+    assert reply["error"].startswith("FileNotFoundError")
+    list(request({"cmd": "shutdown"}, served.server.port))
+
+
+def test_idle_server_shuts_down(program, hub_factory):
+    served = ServerThread(SessionServer(hub_factory, idle_timeout=0.3))
+    list(request({"cmd": "run", "name": "Bot", "file": str(program)},
+                 served.server.port))
+    served.thread.join(5)
+    assert not served.thread.is_alive()
+    assert not hub_factory.hubs[0].connected
+
+
+def make_loopback_hub():
+    """
+    A pybricksdev PybricksHub whose GATT link is a loopback, to check that
+    BleHub works with the pybricksdev version in requirements.txt.
+    """
+    connections = pytest.importorskip("pybricksdev.connections.pybricks")
+    from pybricksdev.ble.pybricks import Command, Event, StatusFlag
+    from pybricksdev.connections import ConnectionState
+
+    class LoopbackHub(connections.PybricksHub):
+        def __init__(self):
+            super().__init__()
+            self.program = bytearray()
+            self.commands = []
+
+        async def _client_connect(self):
+            self._max_write_size = 100
+            self._max_user_program_size = 100000
+            self._handlers = {}
+            return True
+
+        async def _client_disconnect(self):
+            self.connection_state_observable.on_next(
+                ConnectionState.DISCONNECTED)
+            return True
+
+        async def start_notify(self, uuid, callback):
+            self._handlers[uuid] = callback
+
+        def _send(self, event, payload):
+            self._pybricks_service_handler(0, bytes([event]) + payload)
+
+        def _status(self, flags):
+            self._send(Event.STATUS_REPORT, struct.pack("<I", flags))
+
+        async def _run_program(self):
+            self._status(StatusFlag.USER_PROGRAM_RUNNING)
+            await asyncio.sleep(0.01)
+            # Output split in the middle of a character
+            text = "ran {} bytes ✓\r\n".format(len(self.program)).encode()
+            self._send(Event.WRITE_STDOUT, text[:-4])
+            self._send(Event.WRITE_STDOUT, text[-4:])
+            await asyncio.sleep(0.01)
+            self._status(0)
+
+        async def write_gatt_char(self, uuid, data, response):
+            command = data[0]
+            self.commands.append(command)
+            if command == Command.COMMAND_WRITE_USER_RAM:
+                offset = struct.unpack_from("<I", data, 1)[0]
+                del self.program[offset:]
+                self.program += data[5:]
+            elif command == Command.START_USER_PROGRAM:
+                asyncio.ensure_future(self._run_program())
+
+    return LoopbackHub(), Command
+
+
+def test_ble_hub_uses_public_pybricksdev_api(program, tmp_path):
+    loopback, Command = make_loopback_hub()
+    hub = BleHub("Bot")
+    output = []
+
+    async def session():
+        hub.attach(loopback)
+        await loopback.connect()
+        hub.cache = CompileCache(HostCompiler(), str(tmp_path / "cache"))
+        blob = await hub.compile(str(program))
+        await hub.download(blob)
+        await hub.start(output.append)
+        await hub.start(output.append)
+        await hub.disconnect()
+        return blob
+
+    blob = asyncio.run(session())
+    assert bytes(loopback.program) == blob
+    assert loopback.commands.count(Command.START_USER_PROGRAM) == 2
+    assert "".join(output) == "ran {0} bytes ✓\r\nran {0} bytes ✓\r\n".format(
+        len(blob))
+
+
+def test_ble_hub_compiles_for_multi_file_mpy():
+    hub = BleHub("Bot")
+    hub.attach(object())
+    assert hub.cache.compiler.abi == pybricks_session.MPY_ABI == 6
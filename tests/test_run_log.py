@@ -0,0 +1,62 @@
+import run_log
+from run_log import COMPLETED, ERROR, STOPPED, RunLog
+
+
+class Clock:
+    """A clock that only moves when told to."""
+    
+    def __init__(self):
+        self.now = 0
+    
+    def __call__(self):
+        return self.now
+
+
+def test_finish_records_the_run():
+    clock = Clock()
+    log = RunLog(clock=clock)
+    clock.now = 100
+    log.start(2, "crane")
+    clock.now = 350
+    record = log.finish(STOPPED, 12)
+    assert record[:5] == (0, 2, "crane", 250, STOPPED)
+    assert record[7] == 12
+    assert log.records() == [record]
+    assert len(log) == 1
+
+
+def test_finish_without_start_records_nothing():
+    log = RunLog(clock=Clock())
+    assert log.finish(COMPLETED) is None
+    log.start(0, "a")
+    log.finish(COMPLETED)
+    # A run is only finished once
+    assert log.finish(ERROR) is None
+    assert len(log) == 1
+
+
+def test_full_log_overwrites_the_oldest_run():
+    log = RunLog(size=3, clock=Clock())
+    for index in range(5):
+        log.start(index, str(index))
+        log.finish(COMPLETED)
+    assert len(log) == 3
+    assert [record[0] for record in log.records()] == [2, 3, 4]
+    log.clear()
+    assert len(log) == 0 and log.records() == []
+    log.start(9, "b")
+    assert log.finish(COMPLETED)[0] == 5
+    assert [record[1] for record in log.records()] == [9]
+
+
+def test_dump_prints_one_line_per_run(capsys):
+    assert RunLog.format((3, 1, "arm", 40, ERROR, 2000, None, None)) == (
+        "@run,3,1,arm,40,error,2000,,")
+    log = RunLog(clock=Clock())
+    for index in range(2):
+        log.start(index, "item")
+        log.finish(COMPLETED)
+    log.dump()
+    lines = capsys.readouterr().out.splitlines()
+    assert lines == [RunLog.format(record) for record in log.records()]
+    assert all(line.startswith(run_log.PREFIX + ",") for line in lines)
@@ -0,0 +1,76 @@
+import pytest
+
+from telemetry import Telemetry
+from telemetry_decode import decode_transcript
+
+
+class Clock:
+    """A clock that only moves when told to."""
+    
+    def __init__(self):
+        self.now = 0
+    
+    def __call__(self):
+        return self.now
+
+
+def record(capsys, samples, **signals):
+    """
+    Sample signals at the given (time, values) points and decode the output.
+    
+    Returns:
+        tuple: (Telemetry, TelemetryDecoder, number of frames printed)
+    """
+    clock = Clock()
+    current = {}
+    telemetry = Telemetry(period=10, flush_interval=1000000, clock=clock)
+    for name, (fmt, scale) in signals.items():
+        telemetry.add(name, lambda name=name: current[name], fmt, scale)
+    telemetry.start()
+    for now, values in samples:
+        clock.now = now
+        current.update(values)
+        telemetry.sample()
+    telemetry.stop()
+    out = capsys.readouterr().out
+    frames = sum(line.startswith("@tlm,") for line in out.splitlines())
+    return telemetry, decode_transcript(out), frames
+
+
+def test_round_trip(capsys):
+    samples = [(t, {"angle": t * 3, "speed": t / 7}) for t in range(0, 200, 10)]
+    telemetry, decoder, frames = record(
+        capsys, samples, angle=("i", 1), speed=("h", 10))
+    assert decoder.columns == ["time_ms", "angle", "speed"]
+    assert decoder.rows == [[t, v["angle"], round(v["speed"] * 10) / 10]
+                            for t, v in samples]
+    # 20 rows in frames of 16
+    assert frames == 2
+    assert (decoder.lost, decoder.errors, telemetry.clamped) == (0, 0, 0)
+
+
+def test_row_time_overflow_starts_a_new_frame(capsys):
+    samples = [(0, {"x": 1}), (10, {"x": 2}), (70000, {"x": 3}),
+               (70010, {"x": 4})]
+    telemetry, decoder, frames = record(capsys, samples, x=("b", 1))
+    assert frames == 2
+    assert decoder.rows == [[0, 1], [10, 2], [70000, 3], [70010, 4]]
+    assert decoder.lost == 0
+
+
+def test_values_out_of_range_are_clamped(capsys):
+    samples = [(0, {"angle": 3500.4, "small": -200}),
+               (10, {"angle": -3500.4, "small": 100}),
+               (20, {"angle": 12.34, "small": 5})]
+    telemetry, decoder, frames = record(
+        capsys, samples, angle=("h", 10), small=("b", 1))
+    assert decoder.rows == [[0, 3276.7, -128], [10, -3276.8, 100],
+                            [20, 12.3, 5]]
+    assert telemetry.clamped == 3
+
+
+def test_signals_cannot_be_added_after_start(capsys):
+    telemetry = Telemetry(clock=Clock())
+    telemetry.start()
+    with pytest.raises(RuntimeError):
+        telemetry.add("late", lambda: 0)